@@ -14,8 +14,8 @@ from .config import AppConfig, Region, ensure_dirs
 from .logging_setup import setup_logging
 from .overlay import ask_region
 from .hotkey import start_hotkey_listener
-from .capture import CaptureRegion, capture_region
-from .ocr import ocr_image, extract_submarine_etas
+from .capture import CaptureRegion, CaptureSession, FrameGate, capture_region
+from .ocr import age_etas, ocr_image, extract_submarine_etas
 from .auto_setup_py import (
     detect_region_once as py_detect_once,
     watch_and_detect as py_watch_detect,
@@ -71,7 +71,7 @@ def cmd_run(cfg: AppConfig, enable_hotkey: bool = False) -> None:
                         logging.info("Hotkey: region updated to %s", cfg.region)
                         return
                 # Python fallback (no native helper)
-                res = py_watch_detect(timeout_s=60, interval_s=10, tesseract_cmd=cfg.tesseract_path, lang=f"{cfg.tesseract_lang}+eng")
+                res = py_watch_detect(timeout_s=60, interval_s=10, tesseract_cmd=cfg.tesseract_path, lang=f"{cfg.tesseract_lang}+eng", backend=cfg.ocr_backend)
                 if res:
                     cfg.region = Region(x=res.x, y=res.y, width=res.width, height=res.height)
                     cfg.save()
@@ -87,70 +87,95 @@ def cmd_run(cfg: AppConfig, enable_hotkey: bool = False) -> None:
         else:
             logging.warning("Global hotkey not available on this platform")
 
+    # OCR only when the panel changed; otherwise the last reading, aged
+    gate = (
+        FrameGate(cfg.frame_gate_threshold, max_skip_sec=cfg.frame_gate_max_skip_sec)
+        if cfg.frame_gate
+        else None
+    )
+    last_etas = []
+    last_ocr_at = 0.0
+
     logging.info("Monitoring started. Interval=%ss", cfg.capture_interval_sec)
-    while True:
-        try:
-            region = CaptureRegion(
-                left=cfg.region.x,
-                top=cfg.region.y,
-                width=cfg.region.width,
-                height=cfg.region.height,
-            )
-            img = capture_region(region)
-            text = ocr_image(
-                img,
-                cfg.tesseract_path,
-                cfg.tesseract_lang,
-                enable_preprocess=cfg.enable_preprocess,
-                preprocess_scale=cfg.preprocess_scale,
-                preprocess_threshold=cfg.preprocess_threshold,
-                preprocess_sharpen=cfg.preprocess_sharpen,
-                psm=cfg.tesseract_psm,
-                oem=cfg.tesseract_oem,
-            )
-            etas = extract_submarine_etas(text)
-
-            if etas:
-                logging.info("OCR detected %d entries", len(etas))
-                # Avoid creating service until needed (first success)
-                if service is None:
-                    from .calendar import get_service as _get
-                    service = _get()
-
-                for eta in etas:
-                    prev = last_seen.get(eta.name)
-                    if (
-                        prev is None
-                        or abs(prev - eta.remaining_minutes)
-                        >= cfg.min_minutes_threshold_update
-                    ):
-                        start = eta.eta
-                        end = start + timedelta(minutes=cfg.event_duration_minutes)
-                        title = f"潜水艦 {eta.name} 帰還"
-                        key = f"ff14-sub:{eta.name}"
-                        event_id = ensure_event(
-                            service,
-                            cfg.calendar_id,
-                            title,
-                            start,
-                            end,
-                            key,
-                            cfg.reminder_minutes,
-                        )
-                        logging.info(
-                            "Ensured event for %s at %s (id=%s)",
-                            eta.name,
-                            start.strftime("%Y-%m-%d %H:%M"),
-                            event_id,
-                        )
-                        last_seen[eta.name] = eta.remaining_minutes
-            else:
-                logging.info("No submarine lines recognized this cycle")
-
-        except Exception as e:
-            logging.exception("Error in main loop: %s", e)
-
-        time.sleep(max(10, cfg.capture_interval_sec))
+    # One grabber for the whole session (display connection and frame buffer are reused)
+    with CaptureSession() as session:
+        while True:
+            try:
+                region = CaptureRegion(
+                    left=cfg.region.x,
+                    top=cfg.region.y,
+                    width=cfg.region.width,
+                    height=cfg.region.height,
+                )
+                img = capture_region(region, session)
+                if gate is None or gate.changed(img):
+                    text = ocr_image(
+                        img,
+                        cfg.tesseract_path,
+                        cfg.tesseract_lang,
+                        enable_preprocess=cfg.enable_preprocess,
+                        preprocess_scale=cfg.preprocess_scale,
+                        preprocess_threshold=cfg.preprocess_threshold,
+                        preprocess_sharpen=cfg.preprocess_sharpen,
+                        preprocess_resample=cfg.preprocess_resample,
+                        psm=cfg.tesseract_psm,
+                        oem=cfg.tesseract_oem,
+                        backend=cfg.ocr_backend,
+                        segment_lines=cfg.ocr_line_segmentation,
+                        line_psm=cfg.ocr_line_psm,
+                        jobs=cfg.ocr_jobs,
+                    )
+                    etas = extract_submarine_etas(text)
+                    last_etas, last_ocr_at = etas, time.monotonic()
+                else:
+                    elapsed = int((time.monotonic() - last_ocr_at) // 60)
+                    etas = age_etas(last_etas, elapsed)
+                    logging.info("Panel unchanged; skipped OCR (last read %d min ago)", elapsed)
+
+                if etas:
+                    logging.info("OCR detected %d entries", len(etas))
+                    # Avoid creating service until needed (first success)
+                    if service is None:
+                        from .calendar import get_service as _get
+                        service = _get()
+
+                    for eta in etas:
+                        prev = last_seen.get(eta.name)
+                        if (
+                            prev is None
+                            or abs(prev - eta.remaining_minutes)
+                            >= cfg.min_minutes_threshold_update
+                        ):
+                            start = eta.eta
+                            end = start + timedelta(minutes=cfg.event_duration_minutes)
+                            title = f"潜水艦 {eta.name} 帰還"
+                            key = f"ff14-sub:{eta.name}"
+                            event_id = ensure_event(
+                                service,
+                                cfg.calendar_id,
+                                title,
+                                start,
+                                end,
+                                key,
+                                cfg.reminder_minutes,
+                            )
+                            logging.info(
+                                "Ensured event for %s at %s (id=%s)",
+                                eta.name,
+                                start.strftime("%Y-%m-%d %H:%M"),
+                                event_id,
+                            )
+                            last_seen[eta.name] = eta.remaining_minutes
+                else:
+                    logging.info("No submarine lines recognized this cycle")
+
+            except Exception as e:
+                logging.exception("Error in main loop: %s", e)
+                if gate is not None:
+                    # don't let the next frame be skipped against a failed cycle
+                    gate.reset()
+
+            time.sleep(max(10, cfg.capture_interval_sec))
 
 
 def main() -> None:
@@ -198,7 +223,7 @@ def main() -> None:
                 logging.exception("Failed to run auto_setup helper; falling back to Python")
         # Python fallback
         logging.info("Python fallback: watching screen up to 5 minutes for submarine list...")
-        res = py_watch_detect(timeout_s=300, interval_s=20, tesseract_cmd=cfg.tesseract_path, lang=f"{cfg.tesseract_lang}+eng")
+        res = py_watch_detect(timeout_s=300, interval_s=20, tesseract_cmd=cfg.tesseract_path, lang=f"{cfg.tesseract_lang}+eng", backend=cfg.ocr_backend)
         if res:
             cfg.region = Region(x=res.x, y=res.y, width=res.width, height=res.height)
             cfg.save()
@@ -4,9 +4,10 @@ import time
 from dataclasses import dataclass
 from typing import Optional, Tuple, Dict
 
-import mss
 from PIL import Image
-import pytesseract
+
+from .capture import CaptureSession
+from .ocr import OcrBackend, get_backend
 
 
 @dataclass
@@ -17,18 +18,18 @@ class DetectedRegion:
     height: int
 
 
-def _capture_fullscreen() -> Image.Image:
-    with mss.mss() as sct:
-        # Primary monitor full grab
-        mon = sct.monitors[0]
-        img = sct.grab(mon)
-        pil = Image.frombytes("RGB", img.size, img.rgb)
-        return pil
+def _capture_fullscreen(session: Optional[CaptureSession] = None) -> Image.Image:
+    # Primary monitor full grab
+    if session is not None:
+        return session.grab_monitor(0)
+    with CaptureSession() as s:
+        return s.grab_monitor(0)
 
 
-def _find_roi_by_tsv(img: Image.Image, lang: str = "jpn+eng") -> Optional[DetectedRegion]:
-    # Use pytesseract data dict to cluster by line
-    data = pytesseract.image_to_data(img, lang=lang, config="--psm 6", output_type=pytesseract.Output.DICT)
+def _find_roi_by_tsv(img: Image.Image, lang: str = "jpn+eng", backend: Optional[OcrBackend] = None) -> Optional[DetectedRegion]:
+    # Use the OCR data dict (pytesseract.image_to_data layout) to cluster by line
+    engine = backend or get_backend()
+    data = engine.image_to_data(img, lang=lang, psm=6)
     n = len(data["text"]) if data and "text" in data else 0
     if n == 0:
         return None
@@ -99,19 +100,30 @@ def _find_roi_by_tsv(img: Image.Image, lang: str = "jpn+eng") -> Optional[Detect
     return DetectedRegion(x, y, w, h)
 
 
-def detect_region_once(tesseract_cmd: Optional[str] = None, lang: str = "jpn+eng") -> Optional[DetectedRegion]:
-    if tesseract_cmd:
-        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
-    img = _capture_fullscreen()
-    return _find_roi_by_tsv(img, lang=lang)
+def detect_region_once(
+    tesseract_cmd: Optional[str] = None,
+    lang: str = "jpn+eng",
+    session: Optional[CaptureSession] = None,
+    backend: str = "auto",
+) -> Optional[DetectedRegion]:
+    img = _capture_fullscreen(session)
+    return _find_roi_by_tsv(img, lang=lang, backend=get_backend(backend, tesseract_cmd))
 
 
-def watch_and_detect(timeout_s: int = 300, interval_s: int = 20, tesseract_cmd: Optional[str] = None, lang: str = "jpn+eng") -> Optional[DetectedRegion]:
+def watch_and_detect(
+    timeout_s: int = 300,
+    interval_s: int = 20,
+    tesseract_cmd: Optional[str] = None,
+    lang: str = "jpn+eng",
+    backend: str = "auto",
+) -> Optional[DetectedRegion]:
     start = time.time()
-    while time.time() - start < timeout_s:
-        res = detect_region_once(tesseract_cmd=tesseract_cmd, lang=lang)
-        if res:
-            return res
-        time.sleep(max(5, interval_s))
+    # one grabber for the whole watch; it belongs to the calling thread
+    with CaptureSession() as session:
+        while time.time() - start < timeout_s:
+            res = detect_region_once(tesseract_cmd=tesseract_cmd, lang=lang, session=session, backend=backend)
+            if res:
+                return res
+            time.sleep(max(5, interval_s))
     return None
 
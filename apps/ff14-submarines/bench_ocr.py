@@ -0,0 +1,184 @@
+"""OCR パイプラインのマイクロベンチマーク。
+
+Usage:
+  python bench_ocr.py preprocess [capture.png ...] [--scales 2.0,3.0] [--threshold 180] [--repeat 30]
+  python bench_ocr.py ocr [capture.png ...] [--lang jpn] [--tesseract PATH] [--repeat 10]
+  python bench_ocr.py lines [capture.png ...] [--lang jpn] [--tesseract PATH] [--backend auto] [--jobs 4] [--repeat 10]
+
+preprocess: 従来の PIL チェーン（lambda による point → SHARPEN）と preprocess_image
+（NumPy 版、NumPy がない環境向けの PIL 版）を同じ画像で比較する。しきい値が数値
+なら3つの出力が一致することも確かめる。キャプチャ画像（領域を切り出した PNG）を
+渡して実測すること。省略時は潜水艦リスト風の画像を描いて使う。
+
+ocr: 前処理済みの画像1枚あたりの OCR 時間を、使えるエンジンごとに測る（pytesseract は
+呼び出しごとにプロセス起動、tesserocr は常駐。初回は言語データの読み込みを含むので
+別に表示する）。Tesseract 本体と言語データが必要。
+
+lines: 行の切り出し（line_bands）にかかる時間と見つかった行を表示し、Tesseract が
+使えればパネル全体を psm 6 で読む場合と、行ごとに psm 7 で並列に読む場合の時間と
+読み取った残り時間を並べる。
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from typing import List
+
+from PIL import Image, ImageDraw, ImageFilter, ImageOps
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import ocr  # noqa: E402  (ocr.py has no package-relative imports)
+
+
+def opt(args, name, default):
+    for i, a in enumerate(args):
+        if a == name and i + 1 < len(args):
+            return args[i + 1]
+    return default
+
+
+def positional(args) -> List[str]:
+    out, skip = [], False
+    for a in args:
+        if skip:
+            skip = False
+        elif a.startswith("--"):
+            skip = True
+        else:
+            out.append(a)
+    return out
+
+
+def sample_panel(rows: int = 4) -> Image.Image:
+    """潜水艦リスト風の 4 行パネル（暗い背景に明るい文字）。"""
+    img = Image.new("RGB", (520, 40 + rows * 36), (28, 34, 52))
+    d = ImageDraw.Draw(img)
+    for i in range(rows):
+        y = 24 + i * 36
+        d.rectangle((8, y - 6, 512, y + 22), fill=(40, 48, 70))
+        d.text((16, y), f"Sub-{i + 1}  [Rank{80 + i}]  [ETA: {i + 1}h {10 * i + 5:02d}m]", fill=(235, 235, 225))
+    return img
+
+
+def legacy_preprocess(img, scale, threshold, sharpen=True):
+    """preprocess_image before the NumPy path, as it was."""
+    g = ImageOps.grayscale(img)
+    if scale and scale != 1.0:
+        g = g.resize((max(1, int(g.width * scale)), max(1, int(g.height * scale))))
+    if threshold is not None:
+        g = g.point(lambda p: 255 if p >= int(threshold) else 0)
+    if sharpen:
+        g = g.filter(ImageFilter.SHARPEN)
+    return g
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def bench_preprocess(args):
+    paths = positional(args)
+    images = [(os.path.basename(p), Image.open(p).convert("RGB")) for p in paths] or [("sample panel", sample_panel())]
+    scales = [float(s) for s in opt(args, "--scales", "2.0,3.0").split(",")]
+    th = opt(args, "--threshold", "180")
+    threshold = None if th == "none" else (th if th in ("otsu", "adaptive") else int(th))
+    repeat = int(opt(args, "--repeat", "30"))
+    have_np = ocr.np is not None
+
+    print(f"preprocess_image, threshold={threshold}, sharpen=True, best of {repeat}")
+    print(f"{'image':<20} {'size':>9} {'scale':>5} {'legacy ms':>10} {'numpy ms':>9} {'pil ms':>7} {'speedup':>8}")
+    for name, img in images:
+        for scale in scales:
+            t_old, old = timed(lambda: legacy_preprocess(img, scale, threshold), repeat)
+            t_np = out_np = None
+            if have_np:
+                t_np, out_np = timed(lambda: ocr.preprocess_image(img, scale=scale, threshold=threshold), repeat)
+            saved, ocr.np = ocr.np, None
+            try:
+                t_pil, out_pil = timed(lambda: ocr.preprocess_image(img, scale=scale, threshold=threshold), repeat)
+            finally:
+                ocr.np = saved
+            if isinstance(threshold, int) or threshold is None:
+                outs = [o.tobytes() for o in (old, out_np, out_pil) if o is not None]
+                if any(o != outs[0] for o in outs):
+                    print(f"MISMATCH on {name} at scale {scale}")
+                    sys.exit(1)
+            best = min(t for t in (t_np, t_pil) if t is not None)
+            np_ms = f"{t_np * 1000:>9.2f}" if t_np is not None else f"{'-':>9}"
+            print(f"{name[:20]:<20} {img.width:>4}x{img.height:<4} {scale:>5.1f} {t_old * 1000:>10.2f} {np_ms} "
+                  f"{t_pil * 1000:>7.2f} {t_old / best:>7.1f}x")
+
+
+def bench_ocr(args):
+    paths = positional(args)
+    images = [(os.path.basename(p), Image.open(p).convert("RGB")) for p in paths] or [("sample panel", sample_panel())]
+    lang = opt(args, "--lang", "jpn")
+    cmd = opt(args, "--tesseract", None)
+    repeat = int(opt(args, "--repeat", "10"))
+    backends = [ocr.PytesseractBackend(cmd)]
+    if ocr.tesserocr is not None:
+        backends.append(ocr.TesserocrBackend(cmd))
+    else:
+        print("tesserocr not installed: timing pytesseract only")
+
+    print(f"OCR per image (preprocessed at 2.0x), lang={lang}, psm 6, best of {repeat}")
+    print(f"{'image':<20} {'backend':<12} {'first ms':>9} {'best ms':>8}")
+    for name, img in images:
+        pre = ocr.preprocess_image(img)
+        for backend in backends:
+            t0 = time.perf_counter()
+            backend.image_to_string(pre, lang)
+            first = time.perf_counter() - t0
+            best, _ = timed(lambda: backend.image_to_string(pre, lang), repeat)
+            print(f"{name[:20]:<20} {backend.name:<12} {first * 1000:>9.1f} {best * 1000:>8.1f}")
+    for backend in backends:
+        backend.close()
+
+
+def bench_lines(args):
+    paths = positional(args)
+    images = [(os.path.basename(p), Image.open(p).convert("RGB")) for p in paths] or [("sample panel", sample_panel())]
+    lang = opt(args, "--lang", "jpn")
+    cmd = opt(args, "--tesseract", None)
+    backend = ocr.get_backend(opt(args, "--backend", "auto"), cmd)
+    jobs = int(opt(args, "--jobs", "4"))
+    repeat = int(opt(args, "--repeat", "10"))
+
+    for name, img in images:
+        pre = ocr.preprocess_image(img)
+        t_seg, bands = timed(lambda: ocr.line_bands(pre), 30)
+        print(f"{name}: {len(bands)} lines {bands} in {t_seg * 1000:.2f} ms")
+        try:
+            backend.image_to_string(pre, lang)
+        except Exception as e:  # Tesseract or its language data missing
+            print(f"  OCR skipped: {e}")
+            continue
+        for label, kw in (("block psm 6", {}), (f"lines psm 7 x{jobs}", {"segment_lines": True, "jobs": jobs})):
+            best, text = timed(lambda: ocr.ocr_image(img, cmd, lang, backend=backend, **kw), repeat)
+            print(f"  {label:<16} {best * 1000:>8.1f} ms  {ocr.extract_submarine_etas(text)}")
+    backend.close()
+
+
+BENCHES = {
+    "preprocess": bench_preprocess,
+    "ocr": bench_ocr,
+    "lines": bench_lines,
+}
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in BENCHES:
+        print(__doc__.strip())
+        sys.exit(2)
+    BENCHES[args[0]](args[1:])
+
+
+if __name__ == "__main__":
+    main()
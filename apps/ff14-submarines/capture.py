@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple
 
-from PIL import Image
+from PIL import Image, ImageChops, ImageOps
 import mss
 
 
@@ -18,9 +19,119 @@ class CaptureRegion:
         return {"left": self.left, "top": self.top, "width": self.width, "height": self.height}
 
 
-def capture_region(region: CaptureRegion) -> Image.Image:
-    with mss.mss() as sct:
-        monitor = region.to_mss()
-        img = sct.grab(monitor)
-        return Image.frombytes("RGB", img.size, img.rgb)
+class CaptureSession:
+    """Long-lived screen grabber for capture loops.
 
+    mss.mss() opens a display connection (a device context on Windows) and
+    its grab buffers; opening one per capture repeats that every cycle. A
+    session opens it on the first grab and keeps it until close(). Frames are
+    decoded straight from mss's BGRA buffer into one RGB image that is reused
+    while the size stays the same, so the image a grab returns is overwritten
+    by the next grab: copy() it to keep it.
+
+    mss objects are bound to the thread that created them on Windows, so
+    use one session per thread.
+    """
+
+    def __init__(self) -> None:
+        self._sct: Optional[mss.base.MSSBase] = None
+        self._frame: Optional[Image.Image] = None
+
+    def __enter__(self) -> "CaptureSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _grab(self, monitor: dict) -> Image.Image:
+        if self._sct is None:
+            self._sct = mss.mss()
+        try:
+            shot = self._sct.grab(monitor)
+        except Exception:
+            # e.g. the display went away: reconnect on the next grab
+            self.close()
+            raise
+        size: Tuple[int, int] = shot.size
+        if self._frame is None or self._frame.size != size:
+            self._frame = Image.new("RGB", size)
+        # decode BGRA in place instead of building shot.rgb and a new image
+        self._frame.frombytes(shot.bgra, "raw", "BGRX")
+        return self._frame
+
+    def grab(self, region: CaptureRegion) -> Image.Image:
+        return self._grab(region.to_mss())
+
+    def grab_monitor(self, index: int = 0) -> Image.Image:
+        """Grab a whole monitor (0 = all monitors combined, 1 = primary)."""
+        if self._sct is None:
+            self._sct = mss.mss()
+        return self._grab(self._sct.monitors[index])
+
+    def close(self) -> None:
+        if self._sct is not None:
+            try:
+                self._sct.close()
+            finally:
+                self._sct = None
+        self._frame = None
+
+
+class FrameGate:
+    """Decides whether a captured frame changed enough to be worth OCR.
+
+    A frame's signature is its greyscale image reduced by `block` (the mean
+    of each block x block cell). A frame counts as changed when at least
+    `min_cells` cells moved by more than `threshold` grey levels from the
+    frame last let through: a changed digit moves several, a stray pixel or
+    faint flicker none. It also counts as changed when its size changed or
+    `max_skip_sec` passed since the last one went through, so a missed
+    change cannot stall OCR for good. Comparing with the frame last let
+    through rather than the previous one means slow drift adds up.
+    """
+
+    def __init__(
+        self,
+        threshold: int = 24,
+        block: int = 2,
+        min_cells: int = 3,
+        max_skip_sec: float = 1800.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.threshold = threshold
+        self.block = block
+        self.min_cells = min_cells
+        self.max_skip_sec = max_skip_sec
+        self._clock = clock
+        self._sig: Optional[Image.Image] = None
+        self._passed_at = 0.0
+
+    def _signature(self, img: Image.Image) -> Image.Image:
+        g = ImageOps.grayscale(img)
+        factor = max(1, min(self.block, g.width, g.height))
+        return g.reduce(factor) if factor > 1 else g.copy()
+
+    def changed(self, img: Image.Image) -> bool:
+        sig = self._signature(img)
+        now = self._clock()
+        if (
+            self._sig is None
+            or sig.size != self._sig.size
+            or now - self._passed_at >= self.max_skip_sec
+            or sum(ImageChops.difference(sig, self._sig).histogram()[self.threshold + 1:]) >= self.min_cells
+        ):
+            self._sig = sig
+            self._passed_at = now
+            return True
+        return False
+
+    def reset(self) -> None:
+        """Let the next frame through whatever it looks like."""
+        self._sig = None
+
+
+def capture_region(region: CaptureRegion, session: Optional[CaptureSession] = None) -> Image.Image:
+    if session is not None:
+        return session.grab(region)
+    with CaptureSession() as s:
+        return s.grab(region)
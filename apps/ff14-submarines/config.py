@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 import os
 from dataclasses import dataclass, asdict
-from typing import Optional
+from typing import Optional, Union
 
 
 DATA_DIR = os.path.join(os.getcwd(), "data")
@@ -35,6 +35,10 @@ class AppConfig:
     tesseract_lang: str = "jpn"
     tesseract_psm: int = 6
     tesseract_oem: Optional[int] = None
+    ocr_backend: str = "auto"  # auto / tesserocr (resident engine) / pytesseract (process per call)
+    ocr_line_segmentation: bool = True  # OCR each text line separately (psm below) instead of the whole panel
+    ocr_line_psm: int = 7
+    ocr_jobs: int = 4  # lines recognised in parallel
 
     # Main loop
     capture_interval_sec: int = 300  # 5 minutes
@@ -50,8 +54,14 @@ class AppConfig:
     # OCR preprocessing
     enable_preprocess: bool = True
     preprocess_scale: float = 2.0
-    preprocess_threshold: Optional[int] = 180
+    preprocess_threshold: Optional[Union[int, str]] = 180  # 0-255, "otsu", "adaptive" or None
     preprocess_sharpen: bool = True
+    preprocess_resample: str = "bicubic"  # nearest / bilinear / bicubic / lanczos
+
+    # Skip OCR while the captured panel is unchanged
+    frame_gate: bool = True
+    frame_gate_threshold: int = 24  # grey levels a cell must move to count as changed
+    frame_gate_max_skip_sec: int = 1800  # OCR at least this often anyway
 
     @staticmethod
     def load(path: str = CONFIG_PATH) -> "AppConfig":
@@ -68,6 +78,10 @@ class AppConfig:
                 tesseract_lang=raw.get("tesseract_lang", "jpn"),
                 tesseract_psm=raw.get("tesseract_psm", 6),
                 tesseract_oem=raw.get("tesseract_oem", None),
+                ocr_backend=raw.get("ocr_backend", "auto"),
+                ocr_line_segmentation=raw.get("ocr_line_segmentation", True),
+                ocr_line_psm=raw.get("ocr_line_psm", 7),
+                ocr_jobs=raw.get("ocr_jobs", 4),
                 capture_interval_sec=raw.get("capture_interval_sec", 300),
                 calendar_id=raw.get("calendar_id", "primary"),
                 reminder_minutes=raw.get("reminder_minutes", 10),
@@ -79,6 +93,10 @@ class AppConfig:
                 preprocess_scale=raw.get("preprocess_scale", 2.0),
                 preprocess_threshold=raw.get("preprocess_threshold", 180),
                 preprocess_sharpen=raw.get("preprocess_sharpen", True),
+                preprocess_resample=raw.get("preprocess_resample", "bicubic"),
+                frame_gate=raw.get("frame_gate", True),
+                frame_gate_threshold=raw.get("frame_gate_threshold", 24),
+                frame_gate_max_skip_sec=raw.get("frame_gate_max_skip_sec", 1800),
             )
             return cfg
         cfg = AppConfig()
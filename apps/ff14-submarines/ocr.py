@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+import logging
+import os
 import re
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import pytesseract
-from PIL import Image, ImageOps, ImageFilter
+from PIL import Image, ImageChops, ImageOps, ImageFilter
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: preprocess_image falls back to PIL
+    np = None
+
+try:
+    import tesserocr
+except ImportError:  # tesserocr is optional: OCR falls back to pytesseract
+    tesserocr = None
 
 
 # 正常な日本語表記のパターン（全角/半角や空白の揺れに許容）
@@ -56,6 +71,14 @@ def normalize_text(t: str) -> str:
     return t
 
 
+def age_etas(etas: List[SubmarineETA], minutes: int) -> List[SubmarineETA]:
+    """ETAs read `minutes` ago as they stand now: same return time, less remaining."""
+    return [
+        SubmarineETA(name=e.name, eta=e.eta, remaining_minutes=max(0, e.remaining_minutes - minutes))
+        for e in etas
+    ]
+
+
 def extract_submarine_etas(text: str, now: Optional[datetime] = None) -> List[SubmarineETA]:
     now = now or datetime.now().astimezone()
     text = normalize_text(text)
@@ -76,23 +99,312 @@ def extract_submarine_etas(text: str, now: Optional[datetime] = None) -> List[Su
     return list(found.values())[:4]
 
 
+# 拡大時の補間フィルタ（既定は従来どおり bicubic）
+RESAMPLE_FILTERS = {
+    "nearest": Image.NEAREST,
+    "bilinear": Image.BILINEAR,
+    "bicubic": Image.BICUBIC,
+    "lanczos": Image.LANCZOS,
+}
+# adaptive: 周囲 (2r+1)^2 の平均より OFFSET 以上明るい画素を白にする（暗い背景に明るい文字）
+ADAPTIVE_RADIUS = 15
+ADAPTIVE_OFFSET = 10
+
+Threshold = Union[int, str, None]  # 0-255 / "otsu" / "adaptive" / None（二値化なし）
+
+
+def otsu_level(g: Image.Image) -> int:
+    """大津の二値化のしきい値（この値以上を白とする）。"""
+    hist = g.histogram()[:256]
+    total = sum(hist)
+    sum_all = sum(i * h for i, h in enumerate(hist))
+    w0 = sum0 = 0
+    best, level = -1.0, 128
+    for k in range(255):
+        w0 += hist[k]
+        sum0 += k * hist[k]
+        w1 = total - w0
+        if w0 == 0 or w1 == 0:
+            continue
+        between = (sum_all * w0 - sum0 * total) ** 2 / (w0 * w1)
+        if between > best:
+            best, level = between, k + 1
+    return level
+
+
+def _sharpen_array(a: "np.ndarray") -> "np.ndarray":
+    # ImageFilter.SHARPEN（中心 32, 周囲 -2, 除数 16）を整数演算で。端の画素はそのまま（PIL と同じ結果）
+    x = a.astype(np.int16)
+    h, w = a.shape
+    s = np.zeros((h - 2, w - 2), np.int16)
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if dy != 1 or dx != 1:
+                s += x[dy:dy + h - 2, dx:dx + w - 2]
+    out = a.copy()
+    out[1:-1, 1:-1] = np.clip((32 * x[1:-1, 1:-1] - 2 * s + 8) >> 4, 0, 255)
+    return out
+
+
+def preprocess_array(
+    img: Image.Image,
+    *,
+    scale: float = 2.0,
+    threshold: Threshold = 180,
+    sharpen: bool = True,
+    resample: str = "bicubic",
+) -> "np.ndarray":
+    """preprocess_image の NumPy 版。uint8 の2次元配列を返す（NumPy 必須）。"""
+    # グレースケールと拡大は PIL の C 実装で1回ずつ、以降は配列演算のみ
+    g = ImageOps.grayscale(img)
+    if scale and scale != 1.0:
+        new_size = (max(1, int(g.width * scale)), max(1, int(g.height * scale)))
+        g = g.resize(new_size, RESAMPLE_FILTERS[resample])
+    if threshold is None:
+        a = np.asarray(g)
+        return _sharpen_array(a) if sharpen and min(a.shape) > 2 else a
+    # 二値化後の SHARPEN は何も変えない（2v - 周囲平均 が 0/255 に丸まって元に戻る）ので省く
+    if threshold == "adaptive":
+        mean = np.asarray(g.filter(ImageFilter.BoxBlur(ADAPTIVE_RADIUS)), dtype=np.int16)
+        return np.multiply(np.asarray(g) > mean + ADAPTIVE_OFFSET, 255, dtype=np.uint8)
+    level = otsu_level(g) if threshold == "otsu" else int(threshold)
+    return np.multiply(np.asarray(g) >= level, 255, dtype=np.uint8)
+
+
 def preprocess_image(
     img: Image.Image,
     *,
     scale: float = 2.0,
-    threshold: Optional[int] = 180,
+    threshold: Threshold = 180,
     sharpen: bool = True,
+    resample: str = "bicubic",
 ) -> Image.Image:
     # グレースケール→拡大→（任意）しきい値二値化→シャープ
+    if np is not None:
+        return Image.fromarray(preprocess_array(img, scale=scale, threshold=threshold, sharpen=sharpen, resample=resample))
+    # NumPy がなければ PIL のみで同じ結果を作る
     g = ImageOps.grayscale(img)
     if scale and scale != 1.0:
         new_size = (max(1, int(g.width * scale)), max(1, int(g.height * scale)))
-        g = g.resize(new_size)
-    if threshold is not None:
-        g = g.point(lambda p: 255 if p >= int(threshold) else 0)
-    if sharpen:
-        g = g.filter(ImageFilter.SHARPEN)
-    return g
+        g = g.resize(new_size, RESAMPLE_FILTERS[resample])
+    if threshold is None:
+        return g.filter(ImageFilter.SHARPEN) if sharpen else g
+    if threshold == "adaptive":
+        mean = g.filter(ImageFilter.BoxBlur(ADAPTIVE_RADIUS))
+        return ImageChops.subtract(g, mean).point([255 if p > ADAPTIVE_OFFSET else 0 for p in range(256)])
+    level = otsu_level(g) if threshold == "otsu" else int(threshold)
+    return g.point([255 if p >= level else 0 for p in range(256)])
+
+
+# Tesseract の TSV 出力の列（pytesseract.image_to_data と同じ dict にする）
+TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+
+
+def _tess_config(psm: int, oem: Optional[int]) -> str:
+    opts = [f"--psm {psm}"]
+    if oem is not None:
+        opts.append(f"--oem {oem}")
+    return " ".join(opts)
+
+
+class PytesseractBackend:
+    """pytesseract 経由の OCR。呼び出しごとに tesseract を起動し、言語データも毎回読む（従来の動作）。"""
+
+    name = "pytesseract"
+
+    def __init__(self, tesseract_cmd: Optional[str] = None) -> None:
+        self.tesseract_cmd = tesseract_cmd
+
+    def _prepare(self) -> None:
+        if self.tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = self.tesseract_cmd
+
+    def image_to_string(self, img: Image.Image, lang: str = "jpn", psm: int = 6, oem: Optional[int] = None) -> str:
+        self._prepare()
+        return pytesseract.image_to_string(img, lang=lang, config=_tess_config(psm, oem))
+
+    def image_to_data(self, img: Image.Image, lang: str = "jpn", psm: int = 6, oem: Optional[int] = None) -> Dict[str, list]:
+        self._prepare()
+        return pytesseract.image_to_data(img, lang=lang, config=_tess_config(psm, oem), output_type=pytesseract.Output.DICT)
+
+    def close(self) -> None:
+        pass
+
+
+def tessdata_dir(tesseract_cmd: Optional[str]) -> Optional[str]:
+    """tesseract.exe の隣の tessdata。なければ None（TESSDATA_PREFIX / 既定の場所を使う）。"""
+    if tesseract_cmd:
+        d = os.path.join(os.path.dirname(tesseract_cmd), "tessdata")
+        if os.path.isdir(d):
+            return d
+    return None
+
+
+class TesserocrBackend:
+    """tesserocr で Tesseract をプロセス内に常駐させる OCR。
+
+    (lang, psm, oem) ごとに初期化済みの API を使い回すので、言語データの読み込みと
+    プロセス起動・一時ファイルが1回目だけになる。API はスレッド間で共有できないため、
+    使用中でない API がなければ新しく作る（同時に使うスレッドの数だけ増える）。
+    初期化できない組み合わせ（言語データがない等）は警告を出して fallback に回す。
+    """
+
+    name = "tesserocr"
+
+    def __init__(
+        self,
+        tesseract_cmd: Optional[str] = None,
+        *,
+        tessdata: Optional[str] = None,
+        fallback: Optional[PytesseractBackend] = None,
+        api_module=None,
+    ) -> None:
+        self._api = api_module or tesserocr
+        if self._api is None:
+            raise RuntimeError("tesserocr is not installed")
+        self.tessdata = tessdata or tessdata_dir(tesseract_cmd)
+        self.fallback = fallback or PytesseractBackend(tesseract_cmd)
+        self._idle: Dict[Tuple[str, int, Optional[int]], list] = {}
+        self._failed: set = set()
+        self._lock = threading.Lock()
+
+    def _acquire(self, key):
+        with self._lock:
+            if key in self._failed:
+                return None
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop()
+        lang, psm, oem = key
+        kwargs = {"lang": lang, "psm": psm}
+        if self.tessdata:
+            kwargs["path"] = self.tessdata
+        if oem is not None:
+            kwargs["oem"] = oem
+        try:
+            return self._api.PyTessBaseAPI(**kwargs)
+        except RuntimeError as e:
+            logging.warning("tesserocr init failed for lang=%s psm=%s (%s); using pytesseract", lang, psm, e)
+            with self._lock:
+                self._failed.add(key)
+            return None
+
+    def _release(self, key, api) -> None:
+        with self._lock:
+            self._idle.setdefault(key, []).append(api)
+
+    def _run(self, img: Image.Image, lang: str, psm: int, oem: Optional[int], read: Callable):
+        key = (lang, psm, oem)
+        api = self._acquire(key)
+        if api is None:
+            return None
+        try:
+            api.SetImage(img)
+            return read(api)
+        finally:
+            api.Clear()  # 認識結果だけ捨てる（言語データは残す）
+            self._release(key, api)
+
+    def image_to_string(self, img: Image.Image, lang: str = "jpn", psm: int = 6, oem: Optional[int] = None) -> str:
+        text = self._run(img, lang, psm, oem, lambda api: api.GetUTF8Text())
+        return text if text is not None else self.fallback.image_to_string(img, lang, psm, oem)
+
+    def image_to_data(self, img: Image.Image, lang: str = "jpn", psm: int = 6, oem: Optional[int] = None) -> Dict[str, list]:
+        tsv = self._run(img, lang, psm, oem, lambda api: api.GetTSVText(0))
+        if tsv is None:
+            return self.fallback.image_to_data(img, lang, psm, oem)
+        return pytesseract.pytesseract.file_to_dict(f"{TSV_HEADER}\n{tsv}", "\t", -1)
+
+    def close(self) -> None:
+        with self._lock:
+            apis = [api for idle in self._idle.values() for api in idle]
+            self._idle.clear()
+        for api in apis:
+            api.End()
+
+
+OcrBackend = Union[PytesseractBackend, TesserocrBackend]
+OCR_BACKENDS = ("auto", "tesserocr", "pytesseract")
+_backends: Dict[Tuple[str, Optional[str]], OcrBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(name: str = "auto", tesseract_cmd: Optional[str] = None) -> OcrBackend:
+    """OCR エンジン（設定値 ocr_backend）。同じ指定には同じインスタンスを返す。
+
+    auto: tesserocr があればそれ、なければ pytesseract。
+    """
+    if name not in OCR_BACKENDS:
+        raise ValueError(f"unknown OCR backend: {name!r} (choose from {', '.join(OCR_BACKENDS)})")
+    with _backends_lock:
+        backend = _backends.get((name, tesseract_cmd))
+        if backend is None:
+            if name != "pytesseract" and tesserocr is not None:
+                backend = TesserocrBackend(tesseract_cmd)
+            else:
+                if name == "tesserocr":
+                    logging.warning("tesserocr is not installed; using pytesseract")
+                backend = PytesseractBackend(tesseract_cmd)
+            _backends[(name, tesseract_cmd)] = backend
+        return backend
+
+
+def line_bands(
+    binary: Image.Image,
+    *,
+    min_height: int = 8,
+    merge_gap: int = 4,
+    pad: int = 4,
+) -> List[Tuple[int, int]]:
+    """二値画像の横方向の射影（各行の文字画素数）から文字行の上端・下端 (top, bottom) を求める。
+
+    文字色は少ない方の色とみなす。ほぼ全幅が文字色の行は枠線として除き、merge_gap 行以下の
+    すき間はつなげ、min_height 未満の帯（ノイズや下線）は捨てる。
+    """
+    w, h = binary.size
+    hist = binary.histogram()
+    fg = 255 if hist[255] <= hist[0] else 0
+    if np is not None:
+        counts = (np.asarray(binary) == fg).sum(axis=1).tolist()
+    else:
+        mask = binary if fg == 255 else ImageOps.invert(binary)
+        counts = [v * w / 255 for v in mask.resize((1, h), Image.BOX).tobytes()]
+    min_ink, max_ink = max(1, w // 200), w * 0.9
+    bands: List[List[int]] = []
+    for y, c in enumerate(counts):
+        if not min_ink <= c <= max_ink:
+            continue
+        if bands and y - bands[-1][1] <= merge_gap:
+            bands[-1][1] = y + 1
+        else:
+            bands.append([y, y + 1])
+    return [(max(0, t - pad), min(h, b + pad)) for t, b in bands if b - t >= min_height]
+
+
+def _ocr_lines(
+    engine: OcrBackend,
+    img: Image.Image,
+    bands: List[Tuple[int, int]],
+    lang: str,
+    line_psm: int,
+    block_psm: int,
+    oem: Optional[int],
+    jobs: int,
+) -> str:
+    # 2行以上がつながった帯（行間が狭い等）は1行モードでは読めないのでブロックとして読む
+    typical = statistics.median(b - t for t, b in bands)
+
+    def read(band: Tuple[int, int]) -> str:
+        t, b = band
+        psm = block_psm if b - t > typical * 2.5 else line_psm
+        return engine.image_to_string(img.crop((0, t, img.width, b)), lang=lang, psm=psm, oem=oem).strip()
+
+    if jobs <= 1 or len(bands) == 1:
+        texts = [read(band) for band in bands]
+    else:
+        with ThreadPoolExecutor(max_workers=min(jobs, len(bands))) as pool:
+            texts = list(pool.map(read, bands))
+    return "\n".join(texts) + "\n"
 
 
 def ocr_image(
@@ -102,13 +414,23 @@ def ocr_image(
     *,
     enable_preprocess: bool = True,
     preprocess_scale: float = 2.0,
-    preprocess_threshold: Optional[int] = 180,
+    preprocess_threshold: Threshold = 180,
     preprocess_sharpen: bool = True,
+    preprocess_resample: str = "bicubic",
     psm: int = 6,
     oem: Optional[int] = None,
+    backend: Union[str, OcrBackend] = "auto",
+    segment_lines: bool = False,
+    line_psm: int = 7,
+    jobs: int = 4,
 ) -> str:
-    if tesseract_cmd:
-        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+    """img の文字列を OCR する。
+
+    segment_lines=True なら文字行ごとに切り出し、各行を line_psm（既定 7 = 1行）で
+    jobs 並列に読んで改行でつなぐ（Tesseract がパネル全体のレイアウト解析をしない分
+    速く、数字も読みやすい）。行が見つからなければ従来どおり全体を psm で読む。
+    """
+    engine = get_backend(backend, tesseract_cmd) if isinstance(backend, str) else backend
     use_img = img
     if enable_preprocess:
         use_img = preprocess_image(
@@ -116,11 +438,20 @@ def ocr_image(
             scale=preprocess_scale,
             threshold=preprocess_threshold,
             sharpen=preprocess_sharpen,
+            resample=preprocess_resample,
         )
-    # Tesseract options
-    opts = [f"--psm {psm}"]
-    if oem is not None:
-        opts.append(f"--oem {oem}")
-    config = " ".join(opts)
-    return pytesseract.image_to_string(use_img, lang=lang, config=config)
+    if segment_lines:
+        scale = preprocess_scale if enable_preprocess and preprocess_scale else 1.0
+        binary = use_img
+        if not enable_preprocess or preprocess_threshold is None:
+            binary = preprocess_image(img, scale=scale, threshold="otsu", sharpen=False, resample=preprocess_resample)
+        bands = line_bands(
+            binary,
+            min_height=max(2, round(4 * scale)),
+            merge_gap=max(1, round(2 * scale)),
+            pad=max(1, round(2 * scale)),
+        )
+        if bands:
+            return _ocr_lines(engine, use_img, bands, lang, line_psm, psm, oem, jobs)
+    return engine.image_to_string(use_img, lang=lang, psm=psm, oem=oem)
 
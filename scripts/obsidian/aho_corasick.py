@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Aho–Corasick automaton: find which of many patterns occur in a text in one pass.
+
+While the automaton sits in its root state no match is in progress, so it
+jumps straight to the next place a pattern could start (a regex search for
+the patterns' leading characters, done in C) instead of stepping through
+every character in Python.
+"""
+import re
+from collections import deque
+
+
+class AhoCorasick:
+    def __init__(self, patterns):
+        """patterns: iterable of non-empty strings; results refer to them by index."""
+        self.patterns = list(patterns)
+        goto = [{}]
+        out = [[]]
+        for idx, pat in enumerate(self.patterns):
+            if not pat:
+                raise ValueError('empty pattern')
+            state = 0
+            for ch in pat:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(idx)
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            s = queue.popleft()
+            for ch, t in goto[s].items():
+                queue.append(t)
+                f = fail[s]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[t] = goto[f].get(ch, 0)
+                out[t].extend(out[fail[t]])
+        self.goto = goto
+        self.fail = fail
+        self.out = [tuple(o) for o in out]
+        k = min([4] + [len(p) for p in self.patterns])
+        starts = sorted({p[:k] for p in self.patterns})
+        self.skip = re.compile('|'.join(re.escape(s) for s in starts)) if starts else None
+
+    def matches(self, text: str):
+        """Set of indexes of the patterns that occur in text."""
+        found = set()
+        if self.skip is None:
+            return found
+        goto, fail, out = self.goto, self.fail, self.out
+        search = self.skip.search
+        state = 0
+        i = 0
+        n = len(text)
+        while i < n:
+            if state == 0:
+                m = search(text, i)
+                if m is None:
+                    break
+                i = m.start()
+            ch = text[i]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+            i += 1
+        return found
@@ -4,30 +4,67 @@ import sys
 import time
 from pathlib import Path
 
-ROOT = Path(__file__).resolve().parents[1]
-MK = ROOT / 'notes' / 'MK'
+from apply_journal import ApplyTransaction
+from link_graph import LinkGraph
+from link_moves import link_rewriter, link_token, plan_link_rewrites
+from note_index import NoteIndex
+from vault_scan import ROOT, MK, decode_best_effort
+
 TASKS = ROOT / 'TASKS'
 PROPOSALS = TASKS / 'mk_classification_proposals.csv'
 
 
-def safe_move(src: Path, dst_dir: Path) -> Path:
-    dst_dir.mkdir(parents=True, exist_ok=True)
+def plan_destination(src: Path, dst_dir: Path, claimed) -> Path:
+    """src's name in dst_dir, suffixed -2, -3, ... past existing files and this batch's claims."""
     base = src.stem
     ext = src.suffix
     cand = dst_dir / (base + ext)
     i = 2
-    while cand.exists():
+    while cand in claimed or cand.exists():
         cand = dst_dir / (f"{base}-{i}{ext}")
         i += 1
-    src.rename(cand)
+    claimed.add(cand)
     return cand
 
 
+def rel_id(p: Path) -> str:
+    return p.relative_to(ROOT).as_posix()
+
+
+def link_rewrites(moves):
+    """{note Path before the move: (new text, encoding, {(kind, old raw): new raw})} for notes whose links the moves would break."""
+    with NoteIndex() as index:
+        for _ in index.scan(MK):
+            pass
+    with LinkGraph() as graph:
+        graph.sync()
+        plan = plan_link_rewrites(graph, {rel_id(a): rel_id(b) for a, b in moves})
+    out = {}
+    for src, mapping in sorted(plan.items()):
+        p = ROOT / src
+        try:
+            text, encoding = decode_best_effort(p.read_bytes())
+        except OSError:
+            continue
+        new_text = link_rewriter(mapping).rewrite(text)
+        if new_text != text:
+            out[p] = (new_text, encoding, mapping)
+    return out
+
+
+def write_report(report: Path, out_rows):
+    with report.open('w', newline='', encoding='utf-8') as fp:
+        w = csv.DictWriter(fp, fieldnames=['old','new','status','note'])
+        w.writeheader()
+        w.writerows(out_rows)
+
+
 def main():
     only = None
     limit = None
     dry = False
-    # args: --only FOLDER --limit N --dry-run
+    fix_links = True
+    # args: --only FOLDER --limit N --dry-run --no-link-fix
     args = sys.argv[1:]
     i = 0
     while i < len(args):
@@ -47,6 +84,10 @@ def main():
             dry = True
             i += 1
             continue
+        if a == '--no-link-fix':
+            fix_links = False
+            i += 1
+            continue
         i += 1
 
     if not PROPOSALS.exists():
@@ -61,9 +102,13 @@ def main():
 
     ts = time.strftime('%Y%m%d-%H%M%S')
     report = TASKS / f'mk_moves_applied_{only or "all"}_{ts}.csv'
+    links_report = TASKS / f'mk_moves_links_{only or "all"}_{ts}.csv'
     out_rows = []
+    moves = []
+    claimed = set()
     moved = 0
     skipped = 0
+    # Plan every move first so link rewrites can account for the whole batch.
     for r in targets:
         rel = Path(r['file'])
         src = ROOT / rel
@@ -74,23 +119,40 @@ def main():
         # Skip already in destination folder
         dest_key = r['proposed_folder']
         dest_dir = MK / dest_key
-        try:
-            if dry:
-                newp = dest_dir / src.name
-                out_rows.append({'old': str(rel), 'new': str(newp.relative_to(ROOT)), 'status': 'dry-run', 'note': ''})
-            else:
-                newp = safe_move(src, dest_dir)
-                out_rows.append({'old': str(rel), 'new': str(newp.relative_to(ROOT)), 'status': 'moved', 'note': ''})
-                moved += 1
-        except Exception as e:
-            out_rows.append({'old': str(rel), 'new': '', 'status': 'error', 'note': str(e)})
-            skipped += 1
+        newp = plan_destination(src, dest_dir, claimed)
+        moves.append((src, newp))
 
-    with report.open('w', newline='', encoding='utf-8') as fp:
-        w = csv.DictWriter(fp, fieldnames=['old','new','status','note'])
-        w.writeheader()
-        w.writerows(out_rows)
-    print(f"Applied moves: moved={moved}, skipped={skipped}, report={report}")
+    rewrites = link_rewrites(moves) if moves and fix_links else {}
+    link_rows = [
+        {'file': rel_id(p), 'old_link': link_token(kind, raw), 'new_link': link_token(kind, new_raw)}
+        for p, (_, _, mapping) in rewrites.items() for (kind, raw), new_raw in mapping.items()
+    ]
+
+    new_location = dict(moves)
+    # moves and link rewrites go through one journal: an error rolls the whole batch back
+    with ApplyTransaction('apply_classification') as txn:
+        if not dry:
+            for src, newp in moves:
+                txn.rename(src, newp)
+            for p, (text, encoding, _) in rewrites.items():
+                txn.write_text(new_location.get(p, p), text, encoding)
+    for src, newp in moves:
+        out_rows.append({'old': str(src.relative_to(ROOT)), 'new': str(newp.relative_to(ROOT)), 'status': 'dry-run' if dry else 'moved', 'note': ''})
+    if not dry:
+        moved = len(moves)
+        if fix_links:
+            with LinkGraph() as graph:
+                graph.refresh([a for a, _ in moves] + [b for _, b in moves] + [new_location.get(p, p) for p in rewrites])
+
+    write_report(report, out_rows)
+    if link_rows:
+        with links_report.open('w', newline='', encoding='utf-8') as fp:
+            w = csv.DictWriter(fp, fieldnames=['file','old_link','new_link'])
+            w.writeheader()
+            w.writerows(link_rows)
+    print(f"Applied moves: moved={moved}, skipped={skipped}, links_rewritten={len(link_rows)} in {len(rewrites)} notes, report={report}")
+    if txn.path:
+        print(f"Journal: {txn.describe()}")
 
 
 if __name__ == '__main__':
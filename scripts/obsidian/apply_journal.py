@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""Transactional writes for the --apply paths, journaled for rollback/resume.
+
+The apply scripts used to p.write_text() each note in place, so a crash
+midway left the vault half-modified and the only way back was restoring
+the whole vault from git. ApplyTransaction stages every write in a temp file
+next to the note and, per batch of FSYNC_BATCH files, fsyncs the temps and
+the journal, renames the temps over the notes (atomic per file) and fsyncs
+the folders, so there is one round of fsyncs per batch rather than per file.
+
+The journal (TASKS/artifacts/journal/<id>/) holds one JSON line per write:
+the note, its temp file, the SHA-1 of the old and new content, and where its
+pre-image sits in preimages.z (zlib-compressed; no pre-image for created
+files). A move (rename()) is journaled as the new and old ID and the
+content's SHA-1, and done right away. Rolling back or resuming reads only
+the journal and the files in it, O(changed files):
+
+  rollback: put every pre-image back (created files are removed) and move
+            moved notes back, newest first; a file changed again since is
+            left alone and reported unless --force is given;
+  resume:   finish an interrupted transaction: redo a move the crash cut
+            short, and rename the staged temps whose content is complete
+            and whose note is still untouched.
+
+Inside `with ApplyTransaction(...)` an exception (Ctrl-C included) rolls the
+transaction back; leaving the block normally commits it.
+
+Usage:
+  python apply_journal.py list
+  python apply_journal.py rollback [<id>] [--force]
+  python apply_journal.py resume [<id>]
+"""
+import json
+import os
+import stat
+import sys
+import time
+import zlib
+from pathlib import Path
+
+from note_index import content_hash
+from vault_scan import ROOT, read_text_best_effort
+
+JOURNAL_DIR = ROOT / 'TASKS' / 'artifacts' / 'journal'
+FSYNC_BATCH = 64
+LOG = 'journal.jsonl'
+PREIMAGES = 'preimages.z'
+
+
+def fsync_path(p: Path, directory: bool = False):
+    """fsync a file, or a folder entry list (skipped where folders can't be opened, e.g. Windows)."""
+    flags = os.O_RDONLY | (getattr(os, 'O_DIRECTORY', 0) if directory else 0)
+    try:
+        fd = os.open(str(p), flags)
+    except OSError:
+        if directory:
+            return
+        raise
+    try:
+        os.fsync(fd)
+    except OSError:
+        if not directory:
+            raise
+    finally:
+        os.close(fd)
+
+
+def file_hash(p: Path):
+    """Content hash of p, None when it does not exist."""
+    try:
+        return content_hash(p.read_bytes())
+    except FileNotFoundError:
+        return None
+
+
+def missing_dirs(d: Path):
+    """d and its ancestors that do not exist yet, outermost first."""
+    out = []
+    while not d.exists():
+        out.append(d)
+        d = d.parent
+    return out[::-1]
+
+
+class ApplyTransaction:
+    """Journaled, batched atomic writes; the journal is only created on the first write."""
+
+    def __init__(self, name: str, journal_dir: Path = JOURNAL_DIR, batch: int = FSYNC_BATCH, root: Path = ROOT):
+        self.name = name
+        self.journal_dir = Path(journal_dir)
+        self.batch = max(1, batch)
+        self.root = Path(root)
+        self.id = None
+        self.path = None
+        self.pending = {}    # note Path -> (temp Path, journal record) staged in this batch
+        self.written = 0     # files renamed into place
+        self.moved = 0       # rename() calls done
+        self._log = None
+        self._blob = None
+        self._blob_size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def _open(self):
+        base = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.name}"
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        i = 1
+        while True:
+            self.id = base if i == 1 else f"{base}-{i}"
+            self.path = self.journal_dir / self.id
+            try:
+                self.path.mkdir()
+                break
+            except FileExistsError:
+                i += 1
+        self._log = (self.path / LOG).open('a', encoding='utf-8')
+        self._blob = (self.path / PREIMAGES).open('ab')
+        self._append({'tx': self.id, 'name': self.name, 'root': str(self.root), 'started': time.strftime('%Y-%m-%dT%H:%M:%S')})
+
+    def _append(self, record):
+        self._log.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def exists(self, p: Path) -> bool:
+        """Like p.exists(), counting files staged in this transaction."""
+        return p in self.pending or p.exists()
+
+    def read_text(self, p: Path) -> str:
+        """p's text as this transaction will leave it (staged content first)."""
+        return read_text_best_effort(self.pending[p][0] if p in self.pending else p)
+
+    def write_text(self, p: Path, text: str, encoding: str = 'utf-8'):
+        """Stage text as p's new content (newlines are written as given).
+
+        UTF-8 unless encoding is given; text the encoding can't hold is
+        written as UTF-8.
+        """
+        try:
+            data = text.encode(encoding)
+        except UnicodeEncodeError:
+            data = text.encode('utf-8')
+        self.write_bytes(p, data)
+
+    def write_bytes(self, p: Path, data: bytes):
+        if self._log is None:
+            self._open()
+        p = Path(p)
+        staged = self.pending.get(p)
+        if staged is not None:
+            # written again in this batch: the pre-image recorded first still holds
+            tmp, record = staged
+            tmp.write_bytes(data)
+            record = dict(record, new_sha1=content_hash(data))
+            self._append(record)
+            self.pending[p] = (tmp, record)
+            return
+        try:
+            pre = p.read_bytes()
+            mode = stat.S_IMODE(p.stat().st_mode)
+        except FileNotFoundError:
+            pre = mode = None
+        created = missing_dirs(p.parent)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(f".{p.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        if mode is not None:
+            os.chmod(tmp, mode)
+        record = {
+            'rel': p.relative_to(self.root).as_posix(),
+            'tmp': tmp.name,
+            'pre_sha1': None,
+            'new_sha1': content_hash(data),
+        }
+        if pre is not None:
+            blob = zlib.compress(pre, 1)
+            self._blob.write(blob)
+            record.update(pre_sha1=content_hash(pre), pre=[self._blob_size, len(blob)])
+            self._blob_size += len(blob)
+        if created:
+            record['dirs'] = [d.relative_to(self.root).as_posix() for d in created]
+        self._append(record)
+        self.pending[p] = (tmp, record)
+        if len(self.pending) >= self.batch:
+            self.flush()
+
+    def rename(self, src: Path, dst: Path):
+        """Move src to dst (which must not exist yet), journaled first so rollback can move it back."""
+        src, dst = Path(src), Path(dst)
+        if self._log is None:
+            self._open()
+        self.flush()  # staged writes to either path go in first
+        if dst.exists():
+            raise FileExistsError(f"{dst} already exists")
+        created = missing_dirs(dst.parent)
+        record = {
+            'rel': dst.relative_to(self.root).as_posix(),
+            'from': src.relative_to(self.root).as_posix(),
+            'sha1': file_hash(src),
+        }
+        if created:
+            record['dirs'] = [d.relative_to(self.root).as_posix() for d in created]
+        self._append(record)
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        os.rename(src, dst)
+        for d in {src.parent, dst.parent}:
+            fsync_path(d, directory=True)
+        self.moved += 1
+
+    def flush(self):
+        """Make the staged batch durable and rename it into place."""
+        if not self.pending:
+            return
+        for tmp, _ in self.pending.values():
+            fsync_path(tmp)
+        for fp in (self._blob, self._log):
+            fp.flush()
+            os.fsync(fp.fileno())
+        folders = set()
+        for p, (tmp, _) in self.pending.items():
+            os.replace(tmp, p)
+            folders.add(p.parent)
+        for d in folders:
+            fsync_path(d, directory=True)
+        self.written += len(self.pending)
+        self.pending.clear()
+
+    def _close(self, record):
+        self._append(record)
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._log.close()
+        self._blob.close()
+        self._log = self._blob = None
+
+    def commit(self):
+        if self._log is None:
+            return
+        self.flush()
+        self._close({'commit': time.strftime('%Y-%m-%dT%H:%M:%S'), 'files': self.written, 'moved': self.moved})
+
+    def rollback(self):
+        """Undo everything written so far (staged temps are just dropped)."""
+        if self._log is None:
+            return
+        self._blob.flush()
+        self._log.flush()
+        self.pending.clear()
+        self._blob.close()
+        self._log.close()
+        self._log = self._blob = None
+        _, conflicts = rollback_journal(self.path)
+        for rel in conflicts:
+            print(f"rollback: {rel} changed since it was written, left alone", file=sys.stderr)
+
+    def describe(self) -> str:
+        """One line for the script's summary; '' when nothing was written."""
+        if self.path is None:
+            return ''
+        return f"journal={self.path} (undo: python {Path(__file__).name} rollback {self.id})"
+
+
+def read_journal(path: Path):
+    """(header, write records, final record or None) of a journal folder."""
+    header, records, final = None, [], None
+    with (path / LOG).open(encoding='utf-8') as fp:
+        for line in fp:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break  # torn last line after a crash
+            if header is None:
+                header = rec
+            elif 'rel' in rec:
+                records.append(rec)
+            else:
+                final = rec
+    return header, records, final
+
+
+def _append_final(path: Path, record):
+    with (path / LOG).open('a', encoding='utf-8') as fp:
+        fp.write(json.dumps(record) + '\n')
+        fp.flush()
+        os.fsync(fp.fileno())
+
+
+def _restore(p: Path, data: bytes):
+    tmp = p.with_name(f".{p.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    fsync_path(tmp)
+    os.replace(tmp, p)
+
+
+def _remove_dirs(root: Path, rec):
+    """Remove the folders a created file needed, innermost first, while they are empty."""
+    for d in reversed(rec.get('dirs', ())):
+        try:
+            (root / d).rmdir()
+        except OSError:
+            break
+
+
+def _unmove(root: Path, rec, force: bool, conflicts) -> bool:
+    """Move a renamed note back -> whether it was moved."""
+    p, src = root / rec['rel'], root / rec['from']
+    if not p.exists():
+        if src.exists():
+            _remove_dirs(root, rec)  # the crash came before the move
+        return False
+    if src.exists() or (file_hash(p) != rec['sha1'] and not force):
+        conflicts.append(rec['rel'])
+        return False
+    src.parent.mkdir(parents=True, exist_ok=True)
+    os.rename(p, src)
+    _remove_dirs(root, rec)
+    return True
+
+
+def rollback_journal(path: Path, force: bool = False):
+    """Put the pre-images of a journal back -> (restored, conflicts) note IDs."""
+    header, records, _ = read_journal(path)
+    root = Path(header['root'])
+    restored, conflicts = [], []
+    folders = set()
+    with (path / PREIMAGES).open('rb') as blob:
+        for rec in reversed(records):
+            p = root / rec['rel']
+            if 'from' in rec:
+                if _unmove(root, rec, force, conflicts):
+                    folders.update({p.parent, (root / rec['from']).parent})
+                    restored.append(rec['from'])
+                continue
+            tmp = p.with_name(rec['tmp'])
+            if tmp.exists():
+                tmp.unlink()  # staged, never renamed into place
+            cur = file_hash(p)
+            if cur == rec['pre_sha1']:
+                if cur is None:
+                    _remove_dirs(root, rec)
+                continue
+            if cur != rec['new_sha1'] and not force:
+                conflicts.append(rec['rel'])
+                continue
+            if rec.get('pre') is None:
+                if cur is not None:
+                    p.unlink()
+                _remove_dirs(root, rec)
+            else:
+                off, size = rec['pre']
+                blob.seek(off)
+                _restore(p, zlib.decompress(blob.read(size)))
+            folders.add(p.parent)
+            if rec['rel'] not in restored:
+                restored.append(rec['rel'])
+    for d in folders:
+        if d.exists():
+            fsync_path(d, directory=True)
+    _append_final(path, {'rollback': time.strftime('%Y-%m-%dT%H:%M:%S'), 'files': len(restored), 'conflicts': conflicts})
+    return restored, conflicts
+
+
+def resume_journal(path: Path):
+    """Finish an interrupted transaction -> (applied, skipped) note IDs."""
+    header, records, _ = read_journal(path)
+    root = Path(header['root'])
+    applied, skipped = [], []
+    folders = set()
+    # moves were done in journal order before any later write, so redo them first
+    for rec in records:
+        if 'from' in rec:
+            p, src = root / rec['rel'], root / rec['from']
+            if src.exists() and not p.exists():
+                p.parent.mkdir(parents=True, exist_ok=True)
+                os.rename(src, p)
+                folders.update({src.parent, p.parent})
+                applied.append(rec['rel'])
+    # the last record per note has its final content; earlier ones of the same batch share the temp
+    last = {}
+    for rec in records:
+        if 'from' not in rec:
+            last[rec['rel']] = rec
+    for rel, rec in last.items():
+        p = root / rel
+        tmp = p.with_name(rec['tmp'])
+        if not tmp.exists():
+            continue
+        if file_hash(tmp) != rec['new_sha1'] or file_hash(p) != rec['pre_sha1']:
+            # incomplete temp, or the note changed since: not ours to overwrite
+            tmp.unlink()
+            skipped.append(rel)
+            continue
+        fsync_path(tmp)
+        os.replace(tmp, p)
+        folders.add(p.parent)
+        applied.append(rel)
+    for d in folders:
+        fsync_path(d, directory=True)
+    _append_final(path, {'commit': time.strftime('%Y-%m-%dT%H:%M:%S'), 'resumed': len(applied), 'skipped': skipped})
+    return applied, skipped
+
+
+def journal_status(final) -> str:
+    if final is None:
+        return 'interrupted'
+    return 'rolled back' if 'rollback' in final else 'committed'
+
+
+def find_journal(tx_id: str = None, journal_dir: Path = JOURNAL_DIR):
+    if tx_id:
+        path = journal_dir / tx_id
+        return path if (path / LOG).exists() else None
+    paths = sorted(p for p in journal_dir.glob('*') if (p / LOG).exists()) if journal_dir.exists() else []
+    return paths[-1] if paths else None
+
+
+def main():
+    args = sys.argv[1:]
+    cmd = args[0] if args else ''
+    pos = [a for a in args[1:] if not a.startswith('--')]
+    if cmd == 'list':
+        paths = sorted(p for p in JOURNAL_DIR.glob('*') if (p / LOG).exists()) if JOURNAL_DIR.exists() else []
+        for path in paths:
+            _, records, final = read_journal(path)
+            print(f"{path.name}\t{journal_status(final)}\tfiles={len({r['rel'] for r in records})}")
+    elif cmd in ('rollback', 'resume'):
+        path = find_journal(pos[0] if pos else None)
+        if path is None:
+            print(f"Journal not found under {JOURNAL_DIR}")
+            sys.exit(1)
+        if cmd == 'rollback':
+            restored, conflicts = rollback_journal(path, force='--force' in args)
+            print(f"Rolled back {path.name}: restored={len(restored)} conflicts={len(conflicts)}")
+            for rel in conflicts:
+                print(f"  changed since, left alone: {rel}")
+        else:
+            _, _, final = read_journal(path)
+            if final is not None:
+                print(f"{path.name} is already {journal_status(final)}")
+                return
+            applied, skipped = resume_journal(path)
+            print(f"Resumed {path.name}: applied={len(applied)} skipped={len(skipped)}")
+    else:
+        print(__doc__.strip())
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
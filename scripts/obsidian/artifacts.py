@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Streaming writers for the plan CSVs and .diff files of the apply scripts.
+
+The apply scripts used to collect every plan row and every unified-diff
+line in lists and write them once the whole vault was done, so memory grew
+with the vault and nothing was on disk until the end. PlanWriter and
+DiffWriter write each note's rows/hunks as the note is processed instead;
+memory stays at one note's diff.
+
+With --gzip the artifacts are written gzip-compressed to '<name>.gz'
+(full retags produce diffs in the hundreds of MB); read them back with
+`zcat` / `gzip.open(path, 'rt')`.
+"""
+import csv
+import difflib
+import gzip
+import os
+from pathlib import Path
+
+
+def gzip_option(argv) -> bool:
+    return '--gzip' in argv
+
+
+def artifact_path(path: Path, compress: bool = False) -> Path:
+    return path.with_name(path.name + '.gz') if compress else path
+
+
+def open_artifact(path: Path, compress: bool = False, newline: str = None):
+    """Text stream for an artifact; gzip-compressed to path + '.gz' when compress."""
+    path = artifact_path(path, compress)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', newline=newline)
+    return path.open('w', encoding='utf-8', newline=newline)
+
+
+def write_csv(path: Path, fieldnames, rows):
+    """Write a report through a temp file and rename it, so readers never see half a CSV.
+
+    rows are dicts, or tuples in fieldnames order (the records.py rows).
+    """
+    tmp = path.with_name(path.name + '.tmp')
+    with tmp.open('w', newline='', encoding='utf-8') as fp:
+        w = csv.writer(fp)
+        w.writerow(fieldnames)
+        w.writerows(r if isinstance(r, tuple) else [r.get(f, '') for f in fieldnames] for r in rows)
+    os.replace(tmp, path)
+
+
+class PlanWriter:
+    """csv.DictWriter over an artifact; the header is written on open."""
+
+    def __init__(self, path: Path, fieldnames, compress: bool = False):
+        self.path = artifact_path(path, compress)
+        self.fp = open_artifact(path, compress, newline='')
+        self.writer = csv.DictWriter(self.fp, fieldnames=fieldnames)
+        self.writer.writeheader()
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.fp.close()
+
+    def write(self, row):
+        self.writer.writerow(row)
+        self.rows += 1
+
+
+class DiffWriter:
+    """Unified diffs of note rewrites, appended note by note."""
+
+    def __init__(self, path: Path, compress: bool = False):
+        self.path = artifact_path(path, compress)
+        self.fp = open_artifact(path, compress, newline='\n')
+        self.files = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.fp.close()
+
+    def write(self, rel: str, old: str, new: str):
+        """Diff of one note, headed a/rel -> b/rel; every line newline-terminated."""
+        lines = difflib.unified_diff(old.splitlines(True), new.splitlines(True), fromfile=f"a/{rel}", tofile=f"b/{rel}")
+        fp = self.fp
+        for line in lines:
+            fp.write(line)
+            if not line.endswith('\n'):
+                fp.write('\n')
+        self.files += 1
@@ -1,24 +1,15 @@
 #!/usr/bin/env python3
 import csv
 import os
-import re
 from pathlib import Path
 
-ROOT = Path(__file__).resolve().parents[1]
-MK = ROOT / 'notes' / 'MK'
+from patterns import EXTERNAL_RE
+from vault_scan import ROOT, MK, scan_vault
+
 TASKS = ROOT / 'TASKS' / 'artifacts'
 OUT = TASKS / 'mk_attachments_dry_run.csv'
 
 
-def read_text_best_effort(p: Path) -> str:
-    for enc in ('utf-8', 'utf-8-sig', 'cp932', 'shift_jis'):
-        try:
-            return p.read_text(encoding=enc)
-        except Exception:
-            continue
-    return p.read_text(errors='ignore')
-
-
 def relpath(from_path: Path, to_path: Path) -> str:
     try:
         return str(to_path.relative_to(from_path.parent)).replace('\\','/')
@@ -27,7 +18,7 @@ def relpath(from_path: Path, to_path: Path) -> str:
 
 
 def is_local_asset(url: str) -> bool:
-    if re.match(r"^[a-z]+://", url, flags=re.IGNORECASE):
+    if EXTERNAL_RE.match(url):
         return False
     if url.startswith('data:'):
         return False
@@ -37,15 +28,12 @@ def is_local_asset(url: str) -> bool:
 def main():
     TASKS.mkdir(parents=True, exist_ok=True)
     rows = []
-    for f in sorted(MK.rglob('*.md')):
-        low = str(f).lower()
-        if any(seg in low for seg in ['70_templates', '90_archive', '.obsidian\\', '/.obsidian/']):
-            continue
-        text = read_text_best_effort(f)
+    # Notes inside 60_attachments are scanned too (only templates/archive are skipped)
+    for note in scan_vault(MK, exclude=('70_templates', '90_archive', '.obsidian')):
+        f = note.path
         # Find markdown links and wiki embeds to files
         # Markdown images/files: ![alt](path) or [text](path)
-        for m in re.finditer(r"!??\[[^\]]*\]\(([^)\s]+)\)", text):
-            url = m.group(1)
+        for _, url in note.md_links:
             if not is_local_asset(url):
                 continue
             path_part = url.split('#', 1)[0]
@@ -71,8 +59,7 @@ def main():
             })
 
         # Wiki embeds: ![[path]] or [[path]] to non-md assets
-        for m in re.finditer(r"!??\[\[([^\]]+)\]\]", text):
-            inner = m.group(1)
+        for _, inner in note.wikilinks:
             base = inner.split('|',1)[0].split('#',1)[0]
             if base.lower().endswith('.md'):
                 continue
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the obsidian scripts.
+
+Usage:
+  python bench.py fuzzy [--sizes 1000,4000,16000] [--queries 200] [--min-score 0.5] [--seed 0]
+  python bench.py frontmatter [--notes 5000] [--seed 0]
+  python bench.py regex [--notes 10000] [--seed 0]
+  python bench.py records [--notes 20000] [--links 10] [--seed 0]
+"""
+import random
+import re
+import sys
+import time
+import tracemalloc
+from difflib import SequenceMatcher
+from types import SimpleNamespace
+
+import classify_mk
+import patterns as P
+from frontmatter import FrontMatter, split_front_matter
+from fuzzy_index import FuzzyNameIndex
+from link_audit_mk import audit_file
+from vault_scan import MK, ROOT
+
+JA_WORDS = 'メモ 設計 調査 ガイド まとめ 実装 検証 議事録 手順 比較 要約 プロンプト 日記'.split()
+
+
+def make_vocab(rng, n=3000):
+    """Pseudo-words, so note names share letters but rarely whole words (like a real vault)."""
+    letters = 'etaoinshrdlucmfwypvbgkjqxz'
+    weights = list(range(len(letters), 0, -1))
+    vocab = {''.join(rng.choices(letters, weights, k=rng.randint(3, 9))) for _ in range(n)}
+    return sorted(vocab) + JA_WORDS
+
+
+def opt(args, name, default):
+    for i, a in enumerate(args):
+        if a == name and i + 1 < len(args):
+            return args[i + 1]
+    return default
+
+
+def make_names(rng, vocab, n):
+    names = set()
+    while len(names) < n:
+        names.add(' '.join(rng.choice(vocab) for _ in range(rng.randint(1, 4))))
+    return sorted(names)
+
+
+def mutate(rng, s):
+    chars = list(s)
+    for _ in range(rng.randint(1, 3)):
+        op = rng.random()
+        i = rng.randrange(len(chars) + 1)
+        if op < 0.4 and chars:
+            del chars[min(i, len(chars) - 1)]
+        elif op < 0.7:
+            chars.insert(i, rng.choice('abcdefghijklmnopqrstuvwxyz '))
+        elif chars:
+            chars[min(i, len(chars) - 1)] = rng.choice('abcdefghijklmnopqrstuvwxyz')
+    return ''.join(chars).strip() or s
+
+
+def naive_search(names, q, min_score):
+    out = []
+    for name in names:
+        score = SequenceMatcher(None, q, name).ratio()
+        if score >= min_score:
+            out.append((score, name))
+    return out
+
+
+def bench_fuzzy(args):
+    sizes = [int(x) for x in opt(args, '--sizes', '1000,4000,16000').split(',')]
+    n_queries = int(opt(args, '--queries', '200'))
+    min_score = float(opt(args, '--min-score', '0.5'))
+    rng = random.Random(int(opt(args, '--seed', '0')))
+    vocab = make_vocab(rng)
+    print(f"fuzzy lookup, min_score={min_score}, {n_queries} queries per size (half typos, half unrelated)")
+    print(f"{'names':>8} {'naive ms/q':>11} {'index ms/q':>11} {'speedup':>8} {'scored/q':>9} {'build ms':>9}")
+    for n in sizes:
+        names = make_names(rng, vocab, n)
+        queries = [mutate(rng, rng.choice(names)) for _ in range(n_queries // 2)]
+        queries += [' '.join(rng.choice(vocab) for _ in range(rng.randint(1, 3))) for _ in range(n_queries - len(queries))]
+
+        t0 = time.perf_counter()
+        index = FuzzyNameIndex(names)
+        build = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        fast = []
+        scored = 0
+        for q in queries:
+            fast.append(sorted(index.search(q, min_score)))
+            scored += index.last_candidates
+        t_index = time.perf_counter() - t0
+
+        # The naive scan is the expensive part; time it on a sample for large sizes.
+        sample = queries if n <= 4000 else queries[:max(10, n_queries // 10)]
+        t0 = time.perf_counter()
+        slow = [sorted(naive_search(names, q, min_score)) for q in sample]
+        t_naive = time.perf_counter() - t0
+        if slow != fast[:len(sample)]:
+            print(f"MISMATCH at {n} names")
+            sys.exit(1)
+
+        per_naive = t_naive / len(sample) * 1000
+        per_index = t_index / len(queries) * 1000
+        print(f"{n:>8} {per_naive:>11.3f} {per_index:>11.3f} {per_naive / per_index:>7.1f}x "
+              f"{scored / len(queries):>9.1f} {build * 1000:>9.1f}")
+
+
+def legacy_scalar(yaml, key):
+    """parse_scalar as the audit/apply scripts had it: one regex compile and scan per key."""
+    m = re.compile(rf"(?im)^\s*{re.escape(key)}\s*:\s*(.+?)\s*$").search(yaml)
+    if not m:
+        return ''
+    val = m.group(1).strip()
+    if (val.startswith('"') and val.endswith('"')) or (val.startswith("'") and val.endswith("'")):
+        val = val[1:-1]
+    return val
+
+
+def legacy_list(yaml, key):
+    m = re.search(rf"(?im)^\s*{re.escape(key)}\s*:\s*(\[.*?\])\s*$", yaml)
+    if m:
+        inner = m.group(1).strip().strip('[]')
+        return [x.strip().strip('"\'') for x in inner.split(',') if x.strip()]
+    lines = yaml.splitlines()
+    out = []
+    start = None
+    for i, line in enumerate(lines):
+        if re.match(rf"(?i)^\s*{re.escape(key)}\s*:\s*$", line):
+            start = i + 1
+            break
+    if start is not None:
+        for l in lines[start:]:
+            if re.match(r"^\s*-\s+", l):
+                out.append(re.sub(r"^\s*-\s+", "", l).strip())
+            elif l.strip():
+                break
+    return out
+
+
+def make_note(rng, vocab):
+    words = lambda k: ' '.join(rng.choice(vocab) for _ in range(k))
+    lines = ['---', f'title: "{words(3)}"']
+    if rng.random() < 0.5:
+        lines.append('tags: [' + ', '.join(rng.choice(vocab) for _ in range(rng.randint(1, 6))) + ']')
+    else:
+        lines.append('tags:')
+        lines.extend(f'  - {rng.choice(vocab)}' for _ in range(rng.randint(1, 6)))
+    lines += ['status: draft', 'created: 2024-01-02', 'updated: 2024-03-04']
+    lines += [f'{rng.choice(vocab)}: {words(2)}' for _ in range(rng.randint(0, 8))]
+    if rng.random() < 0.3:
+        lines.append('aliases: [' + words(2) + ']')
+    lines.append('---')
+    lines += [f'# {words(3)}', words(40)]
+    return '\n'.join(lines) + '\n'
+
+
+SCALAR_KEYS = ('title', 'status', 'created', 'updated')
+LIST_KEYS = ('tags', 'aliases', 'source')
+
+
+def bench_frontmatter(args):
+    n = int(opt(args, '--notes', '5000'))
+    rng = random.Random(int(opt(args, '--seed', '0')))
+    vocab = make_vocab(rng)
+    texts = [make_note(rng, vocab) for _ in range(n)]
+    blocks = [split_front_matter(t)[0] for t in texts]
+
+    t0 = time.perf_counter()
+    for t in texts:
+        split_front_matter(t)
+    t_split = time.perf_counter() - t0
+
+    # the fields frontmatter_audit_mk reads, per note
+    t0 = time.perf_counter()
+    legacy = [[legacy_scalar(b, k) for k in SCALAR_KEYS] + [len(legacy_list(b, k)) for k in LIST_KEYS] for b in blocks]
+    t_legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    fast = []
+    for b in blocks:
+        fm = FrontMatter(b)
+        fast.append([fm.scalar(k) for k in SCALAR_KEYS] + [len(fm.list(k)) for k in LIST_KEYS])
+    t_fast = time.perf_counter() - t0
+    if fast != legacy:
+        print("MISMATCH between per-key regexes and FrontMatter")
+        sys.exit(1)
+
+    print(f"front matter, {n} notes, {len(SCALAR_KEYS)} scalar + {len(LIST_KEYS)} list lookups per note")
+    print(f"{'split us/note':>14} {'per-key us/note':>16} {'one-pass us/note':>17} {'speedup':>8}")
+    print(f"{t_split / n * 1e6:>14.1f} {t_legacy / n * 1e6:>16.1f} {t_fast / n * 1e6:>17.1f} {t_legacy / t_fast:>7.1f}x")
+
+
+def make_body(rng, vocab):
+    """A note body with the things the per-note regexes look for."""
+    words = lambda k: ' '.join(rng.choice(vocab) for _ in range(k))
+    lines = [f'# {words(3)}', words(30), f'## {rng.choice(["Summary", "Details", "Tasks", "Notes"])}']
+    for _ in range(rng.randint(2, 6)):
+        lines.append(f'{words(12)} #{rng.choice(vocab)} [[{words(2)}]] [doc](../{rng.choice(vocab)}.md)')
+        if rng.random() < 0.4:
+            lines.append(f'https://{rng.choice(vocab)}.com/{rng.choice(vocab)} {words(4)}')
+        if rng.random() < 0.3:
+            lines += ['```python', f'import {rng.choice(vocab)}', '```']
+    return '\n'.join(lines) + '\n'
+
+
+def regex_pass_strings(text, yaml):
+    """The per-note calls as the scripts made them: pattern strings through re's cache."""
+    n = len(re.findall(r"```", text)) + len(re.findall(r"https?://", text, flags=re.IGNORECASE))
+    n += len(re.findall(r"^#+\s+", text, flags=re.MULTILINE))
+    for pat in (r"(?im)^##?\s*(Task|Model|System|Few-?Shots|Input|Output)\b",
+                r"(?i)\b(import|class|def|function|const|var|let|SELECT\s+|curl\s+-|pip install|npm install|yarn add|dotnet |powershell )",
+                r"(?im)^##?\s*(Summary|Quotes|Excerpts|Source|Links)\b",
+                r"(?im)^##?\s*(Overview|Goals|Scope|Timeline|Milestones|Tasks)\b",
+                r"(?im)^##?\s*(TL;?DR|Details|Why|Key Points)\b"):
+        n += bool(re.search(pat, text))
+    n += bool(re.search(r"(?im)^status:\s*active\b", yaml) or re.search(r"(?im)^project:\s*\S+", yaml))
+    no_code = re.sub(r"```[\s\S]*?```", "\n", text)
+    n += len(list(re.finditer(r"#([^\s#]+)", no_code)))
+    n += len(list(re.finditer(r"https?://([^/\s]+)", text, flags=re.IGNORECASE)))
+    no_urls = re.sub(r"https?://\S+", " ", no_code)
+    heads = [re.sub(r"^#+\s*", "", ln.strip()) for ln in no_urls.splitlines() if ln.strip().startswith('#')]
+    n += len(re.findall(r"[A-Za-z][A-Za-z0-9\-]{2,}", no_urls)) + len(re.findall(r"[ァ-ヴー]{2,}", no_urls))
+    n += len(re.findall(r"[一-龠々〆ヵヶぁ-んァ-ヴー]{2,12}", ''.join(heads)))
+    n += len(re.findall(r"!??\[\[([^\]]+)\]\]", text)) + len(re.findall(r"!??\[[^\]]*\]\(([^)\s]+)\)", text))
+    return n
+
+
+def regex_pass_compiled(text, yaml):
+    """The same calls on the precompiled patterns of patterns.py / classify_mk."""
+    n = text.count("```") + len(P.URL_SCHEME_RE.findall(text)) + len(P.HEADING_RE.findall(text))
+    for pat in (classify_mk.PROMPT_SECTIONS_RE, classify_mk.DEV_TERMS_RE, classify_mk.RESEARCH_SECTIONS_RE,
+                classify_mk.PROJECT_SECTIONS_RE, classify_mk.NOTES_SECTIONS_RE):
+        n += bool(pat.search(text))
+    n += bool(classify_mk.PROJECT_YAML_RE.search(yaml))
+    no_code = P.CODE_BLOCK_RE.sub("\n", text)
+    n += len(list(P.INLINE_TAG_RE.finditer(no_code)))
+    n += len(list(P.URL_HOST_RE.finditer(text)))
+    no_urls = P.URL_RE.sub(" ", no_code)
+    heads = [P.HEADING_PREFIX_RE.sub("", ln.strip()) for ln in no_urls.splitlines() if ln.strip().startswith('#')]
+    n += len(P.EN_TOKEN_RE.findall(no_urls)) + len(P.KATA_TOKEN_RE.findall(no_urls))
+    n += len(P.JA_TOKEN_RE.findall(''.join(heads)))
+    n += len(P.WIKILINK_RE.findall(text)) + len(P.MDLINK_RE.findall(text))
+    return n
+
+
+def bench_regex(args):
+    n = int(opt(args, '--notes', '10000'))
+    rng = random.Random(int(opt(args, '--seed', '0')))
+    vocab = make_vocab(rng)
+    notes = [(make_body(rng, vocab), split_front_matter(make_note(rng, vocab))[0]) for _ in range(n)]
+
+    t0 = time.perf_counter()
+    slow = [regex_pass_strings(t, y) for t, y in notes]
+    t_strings = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    fast = [regex_pass_compiled(t, y) for t, y in notes]
+    t_compiled = time.perf_counter() - t0
+    if slow != fast:
+        print("MISMATCH between pattern strings and precompiled patterns")
+        sys.exit(1)
+
+    per10k = 10000 / n
+    print(f"per-note regex work of classify_mk/keywords/vault_scan, {n} notes")
+    print(f"{'strings us/note':>16} {'compiled us/note':>17} {'saved ms/10k notes':>19} {'speedup':>8}")
+    print(f"{t_strings / n * 1e6:>16.1f} {t_compiled / n * 1e6:>17.1f} "
+          f"{(t_strings - t_compiled) * per10k * 1000:>19.1f} {t_strings / t_compiled:>7.2f}x")
+
+
+def held(build):
+    """(result of build(), bytes it still holds), measured with tracemalloc."""
+    tracemalloc.start()
+    out = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return out, size
+
+
+def legacy_link_rows(notes, name_index):
+    """Audit rows as link_audit_mk built them: one dict and one path string per link."""
+    return [[{'file': str(n.path.relative_to(ROOT)), 'link_type': r.link_type, 'current': r.current,
+              'status': r.status, 'proposal': r.proposal} for r in audit_file(n, name_index, set())]
+            for n in notes]
+
+
+def bench_records(args):
+    n = int(opt(args, '--notes', '20000'))
+    k = int(opt(args, '--links', '10'))
+    rng = random.Random(int(opt(args, '--seed', '0')))
+    vocab = make_vocab(rng)
+    folders = ['00_inbox', '10_research', '20_notes', '30_projects', '40_prompts', '50_code']
+    notes, name_index = [], {}
+    for i in range(n):
+        p = MK / rng.choice(folders) / f"{rng.choice(vocab)} {rng.choice(vocab)} {i}.md"
+        name_index.setdefault(p.stem.lower(), []).append(p)
+        # name-only wikilinks and external links: no file system lookups in the audit
+        links = [('embed' if rng.random() < 0.1 else 'wikilink', f"{rng.choice(vocab)} {rng.choice(vocab)}")
+                 for _ in range(k)]
+        notes.append(SimpleNamespace(path=p, wikilinks=links, md_links=[('mdlink', f'https://{rng.choice(vocab)}.com/')]))
+    for j in range(0, n, 3):  # a third of the wikilinks resolve
+        notes[j].wikilinks[0] = ('wikilink', notes[(j * 7) % n].path.stem)
+
+    legacy, legacy_bytes = held(lambda: legacy_link_rows(notes, name_index))
+    compact, compact_bytes = held(lambda: [audit_file(note, name_index, set()) for note in notes])
+    if [[tuple(r.values()) for r in rows] for rows in legacy] != compact:
+        print("MISMATCH between dict rows and LinkRows")
+        sys.exit(1)
+    rows = sum(map(len, compact))
+
+    print(f"link audit rows held in memory, {n} notes, {rows} rows")
+    print(f"{'dict B/row':>11} {'LinkRow B/row':>14} {'dict MB':>8} {'LinkRow MB':>11} {'saved':>6}")
+    print(f"{legacy_bytes / rows:>11.0f} {compact_bytes / rows:>14.0f} {legacy_bytes / 2**20:>8.1f} "
+          f"{compact_bytes / 2**20:>11.1f} {1 - compact_bytes / legacy_bytes:>6.0%}")
+
+
+BENCHES = {
+    'fuzzy': bench_fuzzy,
+    'frontmatter': bench_frontmatter,
+    'regex': bench_regex,
+    'records': bench_records,
+}
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in BENCHES:
+        print(__doc__.strip())
+        sys.exit(2)
+    BENCHES[args[0]](args[1:])
+
+
+if __name__ == '__main__':
+    main()
@@ -1,55 +1,29 @@
 #!/usr/bin/env python3
-import csv
 import re
+import sys
 from pathlib import Path
 
-ROOT = Path(__file__).resolve().parents[1]
-MK = ROOT / 'notes' / 'MK'
+from artifacts import write_csv
+from parallel import jobs_option, pool_map
+from patterns import HEADING_RE, URL_SCHEME_RE
+from records import ClassificationRow
+from vault_scan import ROOT, MK, scan_vault
+
 TASKS = ROOT / 'TASKS'
 OUT_CSV = TASKS / 'mk_classification_proposals.csv'
 
-
-def read_text_best_effort(p: Path) -> str:
-    for enc in ('utf-8', 'utf-8-sig', 'cp932', 'shift_jis'):
-        try:
-            return p.read_text(encoding=enc)
-        except Exception:
-            continue
-    return p.read_text(errors='ignore')
+# Section headings / terms that hint at each target folder
+PROMPT_SECTIONS_RE = re.compile(r"(?im)^##?\s*(Task|Model|System|Few-?Shots|Input|Output)\b")
+DEV_TERMS_RE = re.compile(
+    r"(?i)\b(import|class|def|function|const|var|let|SELECT\s+|curl\s+-|pip install|npm install|yarn add|dotnet |powershell )"
+)
+RESEARCH_SECTIONS_RE = re.compile(r"(?im)^##?\s*(Summary|Quotes|Excerpts|Source|Links)\b")
+PROJECT_SECTIONS_RE = re.compile(r"(?im)^##?\s*(Overview|Goals|Scope|Timeline|Milestones|Tasks)\b")
+PROJECT_YAML_RE = re.compile(r"(?im)^(?:status:\s*active\b|project:\s*\S+)")
+NOTES_SECTIONS_RE = re.compile(r"(?im)^##?\s*(TL;?DR|Details|Why|Key Points)\b")
 
 
-def extract_yaml(text: str):
-    if not text.startswith('---'):
-        return None, text
-    lines = text.splitlines()
-    end = None
-    for i in range(1, min(300, len(lines))):
-        if lines[i].strip() == '---':
-            end = i
-            break
-    if end is None:
-        return None, text
-    yaml_block = "\n".join(lines[1:end])
-    body = "\n".join(lines[end+1:])
-    return yaml_block, body
-
-
-def parse_tags(yaml_block: str):
-    if not yaml_block:
-        return []
-    tags = []
-    for line in yaml_block.splitlines():
-        m = re.match(r"^(tags?|keywords)\s*:\s*(.*)$", line.strip(), re.IGNORECASE)
-        if not m:
-            continue
-        rest = m.group(2).strip()
-        if rest.startswith('[') and rest.endswith(']'):
-            inner = rest[1:-1]
-            parts = [p.strip() for p in inner.split(',') if p.strip()]
-            tags.extend(parts)
-        elif rest:
-            parts = [p.strip() for p in rest.split(',') if p.strip()]
-            tags.extend(parts)
+def normalize_tags(tags):
     norm = []
     seen = set()
     for t in tags:
@@ -60,7 +34,7 @@ def parse_tags(yaml_block: str):
     return norm
 
 
-def score_classification(path: Path, text: str, yaml_block: str):
+def score_classification(path: Path, text: str, yaml_block: str, tags):
     # Scores for each target folder
     scores = {
         '10_research': 0.0,
@@ -72,19 +46,18 @@ def score_classification(path: Path, text: str, yaml_block: str):
     reasons = []
 
     # Counts
-    code_fences = len(re.findall(r"```", text)) // 2
-    urls = len(re.findall(r"https?://", text, flags=re.IGNORECASE))
-    headings = len(re.findall(r"^#+\s+", text, flags=re.MULTILINE))
+    code_fences = text.count("```") // 2
+    urls = len(URL_SCHEME_RE.findall(text))
+    headings = len(HEADING_RE.findall(text))
 
     # YAML tags influence
-    tags = parse_tags(yaml_block or '')
-    tagset = set(tags)
+    tagset = set(normalize_tags(tags))
 
     # Prompt-like signals
     if any(t in tagset for t in ['prompt', 'prompts']):
         scores['40_prompts'] += 3
         reasons.append('tag:prompt')
-    if re.search(r"(?im)^##?\s*(Task|Model|System|Few-?Shots|Input|Output)\b", text):
+    if PROMPT_SECTIONS_RE.search(text):
         scores['40_prompts'] += 2.5
         reasons.append('sections:prompt-like')
 
@@ -95,7 +68,7 @@ def score_classification(path: Path, text: str, yaml_block: str):
     if code_fences >= 2:
         scores['50_code'] += 2.5
         reasons.append('codeblocks>=2')
-    if re.search(r"(?i)\b(import|class|def|function|const|var|let|SELECT\s+|curl\s+-|pip install|npm install|yarn add|dotnet |powershell )", text):
+    if DEV_TERMS_RE.search(text):
         scores['50_code'] += 1.5
         reasons.append('dev-terms')
 
@@ -106,7 +79,7 @@ def score_classification(path: Path, text: str, yaml_block: str):
     if urls >= 3:
         scores['10_research'] += 2.0
         reasons.append('urls>=3')
-    if re.search(r"(?im)^##?\s*(Summary|Quotes|Excerpts|Source|Links)\b", text):
+    if RESEARCH_SECTIONS_RE.search(text):
         scores['10_research'] += 1.5
         reasons.append('sections:research-like')
 
@@ -115,15 +88,15 @@ def score_classification(path: Path, text: str, yaml_block: str):
     if name_l == 'readme.md' or path.parent.name.lower() == '30_projects':
         scores['30_projects'] += 3.0
         reasons.append('readme/projects-folder')
-    if re.search(r"(?im)^##?\s*(Overview|Goals|Scope|Timeline|Milestones|Tasks)\b", text):
+    if PROJECT_SECTIONS_RE.search(text):
         scores['30_projects'] += 1.5
         reasons.append('sections:project-like')
-    if re.search(r"(?im)^status:\s*active\b", yaml_block or '') or re.search(r"(?im)^project:\s*\S+", yaml_block or ''):
+    if PROJECT_YAML_RE.search(yaml_block or ''):
         scores['30_projects'] += 1.0
         reasons.append('yaml:project/status')
 
     # Notes default
-    if re.search(r"(?im)^##?\s*(TL;?DR|Details|Why|Key Points)\b", text):
+    if NOTES_SECTIONS_RE.search(text):
         scores['20_notes'] += 1.5
         reasons.append('sections:notes-like')
     if headings >= 3 and urls < 3 and code_fences <= 1:
@@ -156,50 +129,41 @@ def score_classification(path: Path, text: str, yaml_block: str):
     return target, confidence, ','.join(reasons)
 
 
+def classify_note(note):
+    f = note.path
+    rel = note.rel
+    target, conf, reason = score_classification(f, note.text, note.yaml_block, note.tags)
+
+    # Already in a target folder?
+    cur_folder = f.parent
+    cur_key = None
+    for key in ['00_inbox','10_research','20_notes','30_projects','40_prompts','50_code']:
+        if cur_folder.parts[-1] == key:
+            cur_key = key
+            break
+    action = 'move'
+    if cur_key and cur_key == target:
+        action = 'keep'
+
+    return ClassificationRow(
+        file=sys.intern(str(rel)),
+        current_folder=cur_key or '',
+        proposed_folder=target,
+        action=action,
+        confidence=f"{conf:.2f}",
+        reasons=reason,
+    )
+
+
 def main():
     TASKS.mkdir(parents=True, exist_ok=True)
     if not MK.exists():
         print(f"MK not found: {MK}")
         return
-    files = sorted(MK.rglob('*.md'))
-    rows = []
-    for f in files:
-        rel = f.relative_to(ROOT)
-        # Skip templates, attachments, archive
-        low = str(rel).lower()
-        if any(seg in low for seg in ['70_templates/', '60_attachments/', '90_archive/', '70_templates\\', '60_attachments\\', '90_archive\\']):
-            continue
-        # Skip dashboard and plugin data
-        if '/.obsidian/' in low or '\\.obsidian\\' in low:
-            continue
-        text = read_text_best_effort(f)
-        yaml_block, _ = extract_yaml(text)
-        target, conf, reason = score_classification(f, text, yaml_block)
-
-        # Already in a target folder?
-        cur_folder = f.parent
-        cur_key = None
-        for key in ['00_inbox','10_research','20_notes','30_projects','40_prompts','50_code']:
-            if cur_folder.parts[-1] == key:
-                cur_key = key
-                break
-        action = 'move'
-        if cur_key and cur_key == target:
-            action = 'keep'
-
-        rows.append({
-            'file': str(rel),
-            'current_folder': cur_key or '',
-            'proposed_folder': target,
-            'action': action,
-            'confidence': f"{conf:.2f}",
-            'reasons': reason,
-        })
-
-    with OUT_CSV.open('w', newline='', encoding='utf-8') as fp:
-        writer = csv.DictWriter(fp, fieldnames=['file','current_folder','proposed_folder','action','confidence','reasons'])
-        writer.writeheader()
-        writer.writerows(rows)
+    # Templates, attachments, archive and .obsidian are pruned by the scanner
+    rows = pool_map(classify_note, scan_vault(MK), jobs_option(sys.argv[1:]))
+
+    write_csv(OUT_CSV, ClassificationRow._fields, rows)
     print(f"Wrote proposals: {OUT_CSV} ({len(rows)} files)")
 
 
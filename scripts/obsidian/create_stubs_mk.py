@@ -1,12 +1,13 @@
 #!/usr/bin/env python3
 import csv
 import os
-import re
 from datetime import datetime
 from pathlib import Path
 
-ROOT = Path(__file__).resolve().parents[1]
-MK = ROOT / 'notes' / 'MK'
+from apply_journal import ApplyTransaction
+from patterns import EXTERNAL_RE, PATH_SEP_RE
+from vault_scan import ROOT
+
 TASKS = ROOT / 'TASKS'
 ART = TASKS / 'artifacts'
 AUDIT = TASKS / 'mk_link_audit.csv'
@@ -14,11 +15,10 @@ AUDIT_ALT = ART / 'mk_link_audit.csv'
 PLAN = ART / 'mk_stub_create_plan.csv'
 
 
-def write_stub(p: Path, title: str):
-    p.parent.mkdir(parents=True, exist_ok=True)
+def write_stub(txn, p: Path, title: str):
     today = datetime.today().strftime('%Y-%m-%d')
     content = f"---\ntitle: \"{title}\"\nstatus: draft\ncreated: {today}\nupdated: {today}\n---\n\n# {title}\n\n> Stub note (auto-generated to resolve a link).\n"
-    p.write_text(content, encoding='utf-8', newline='\n')
+    txn.write_text(p, content)
 
 
 INVALID_CHARS = '<>:"|?*'
@@ -40,13 +40,13 @@ def sanitize_component(name: str) -> str:
 
 def resolve_target(src_note: Path, current: str, link_type: str):
     # Only create .md stubs
-    if re.match(r"^[a-z]+://", current, flags=re.IGNORECASE):
+    if EXTERNAL_RE.match(current):
         return None
     base = current
     if 'wikilink' in (link_type or ''):
         base = current.split('|', 1)[0].split('#', 1)[0]
         # split possible subfolders and sanitize each
-        parts = re.split(r"[\\/]+", base)
+        parts = PATH_SEP_RE.split(base)
         parts = [sanitize_component(p) for p in parts if p]
         if not parts:
             parts = ['untitled']
@@ -58,7 +58,7 @@ def resolve_target(src_note: Path, current: str, link_type: str):
     else:
         # markdown link
         base = current.split('#', 1)[0]
-        parts = re.split(r"[\\/]+", base)
+        parts = PATH_SEP_RE.split(base)
         parts = [sanitize_component(p) for p in parts if p]
         if not parts:
             parts = ['untitled']
@@ -88,24 +88,25 @@ def main():
     rows = list(csv.DictReader(audit_path.open(encoding='utf-8')))
     plan_rows = []
     created = 0
-    for r in rows:
-        if r.get('status') != 'not_found':
-            continue
-        rel = r['file']
-        link_type = r.get('link_type','')
-        current = r.get('current','')
-        src_note = ROOT / rel
-        if not src_note.exists():
-            continue
-        tgt = resolve_target(src_note, current, link_type)
-        if not tgt:
-            continue
-        if tgt.exists():
-            continue
-        plan_rows.append({'note': str(src_note.relative_to(ROOT)).replace('\\','/'), 'create': str(tgt.relative_to(ROOT)).replace('\\','/'), 'link': current})
-        if apply:
-            write_stub(tgt, title_from_path(tgt))
-            created += 1
+    with ApplyTransaction('create_stubs') as txn:
+        for r in rows:
+            if r.get('status') != 'not_found':
+                continue
+            rel = r['file']
+            link_type = r.get('link_type','')
+            current = r.get('current','')
+            src_note = ROOT / rel
+            if not src_note.exists():
+                continue
+            tgt = resolve_target(src_note, current, link_type)
+            if not tgt:
+                continue
+            if txn.exists(tgt):
+                continue
+            plan_rows.append({'note': str(src_note.relative_to(ROOT)).replace('\\','/'), 'create': str(tgt.relative_to(ROOT)).replace('\\','/'), 'link': current})
+            if apply:
+                write_stub(txn, tgt, title_from_path(tgt))
+                created += 1
 
     with PLAN.open('w', newline='', encoding='utf-8') as fp:
         w = csv.DictWriter(fp, fieldnames=['note','create','link'])
@@ -113,6 +114,8 @@ def main():
         w.writerows(plan_rows)
     mode = 'APPLIED' if apply else 'dry-run'
     print(f"Stub notes {mode}: planned={len(plan_rows)}, created={created}, plan={PLAN}")
+    if txn.path:
+        print(f"Journal: {txn.describe()}")
 
 
 if __name__ == '__main__':
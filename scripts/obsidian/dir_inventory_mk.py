@@ -1,48 +1,118 @@
 #!/usr/bin/env python3
 import csv
 import os
+from fnmatch import fnmatch
 from pathlib import Path
 
-ROOT = Path(__file__).resolve().parents[1]
-NOTES = ROOT / 'notes'
-MK = NOTES / 'MK'
+from aho_corasick import AhoCorasick
+from vault_scan import ROOT, NOTES, MK
+
 ART = ROOT / 'TASKS' / 'artifacts'
 OUT = ART / 'dir_inventory.csv'
 
 CANON = {'00_inbox','10_research','20_notes','30_projects','40_prompts','50_code','60_attachments','70_templates','90_archive','.obsidian'}
 
 
-def dir_stats(base: Path):
+class DirStats:
+    __slots__ = ('files', 'md_files', 'md_glob', 'size', 'children')
+
+    def __init__(self):
+        self.files = 0
+        self.md_files = 0
+        self.md_glob = 0  # names matching '*.md' the way rglob does (case-sensitive on POSIX)
+        self.size = 0
+        self.children = []
+
+
+def walk(base: Path):
+    """One os.scandir walk of base: {dir: DirStats with direct counts} and every '*.md' file."""
+    stats = {}
+    md_paths = []
+    stack = [base]
+    while stack:
+        d = stack.pop()
+        st = stats[d] = DirStats()
+        try:
+            it = os.scandir(d)
+        except OSError:
+            continue
+        with it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        child = d / e.name
+                        st.children.append(child)
+                        stack.append(child)
+                    elif e.is_file():
+                        st.files += 1
+                        if os.path.splitext(e.name)[1].lower() == '.md':
+                            st.md_files += 1
+                        if fnmatch(e.name, '*.md'):
+                            st.md_glob += 1
+                            md_paths.append(Path(e.path))
+                        try:
+                            st.size += e.stat().st_size
+                        except OSError:
+                            pass
+                except OSError:
+                    continue
+    return stats, md_paths
+
+
+def subtree_totals(stats, d: Path):
+    """(files, md_files, md_glob, size) for d and everything below it."""
+    st = stats.get(d)
+    if st is None:
+        return 0, 0, 0, 0
+    files, md, glob_md, size = st.files, st.md_files, st.md_glob, st.size
+    for c in st.children:
+        cf, cm, cg, cs = subtree_totals(stats, c)
+        files += cf
+        md += cm
+        glob_md += cg
+        size += cs
+    return files, md, glob_md, size
+
+
+def subdirs(stats, d: Path):
+    out = []
+    stack = [d]
+    while stack:
+        for c in stats[stack.pop()].children:
+            out.append(c)
+            stack.append(c)
+    return out
+
+
+def count_link_refs(dirs, md_paths):
+    """{dir: number of notes mentioning 'dir/' (or 'dir\\')}, matching all dirs in one pass per note."""
+    tokens = []
+    owner = []
+    for i, d in enumerate(dirs):
+        rel = str(d.relative_to(ROOT))
+        tokens.append(rel.replace('\\','/') + '/')
+        tokens.append(rel.replace('/','\\') + '\\')
+        owner.extend((i, i))
+    ac = AhoCorasick(tokens)
+    counts = [0] * len(dirs)
+    for p in md_paths:
+        try:
+            t = p.read_text(encoding='utf-8', errors='ignore')
+        except Exception:
+            continue
+        for i in {owner[k] for k in ac.matches(t)}:
+            counts[i] += 1
+    return dict(zip(dirs, counts))
+
+
+def dir_stats(base: Path, stats, link_refs):
     rows = []
-    for d in sorted([p for p in base.rglob('*') if p.is_dir()] + [base]):
+    for d in sorted(subdirs(stats, base) + [base]):
         try:
             rel = d.relative_to(ROOT)
         except Exception:
             continue
-        files = list(d.iterdir())
-        total_files = 0
-        md_files = 0
-        total_size = 0
-        for p in d.rglob('*'):
-            if p.is_file():
-                total_files += 1
-                if p.suffix.lower() == '.md':
-                    md_files += 1
-                try:
-                    total_size += p.stat().st_size
-                except Exception:
-                    pass
-        # count references to this directory by path in md files
-        link_refs = 0
-        dir_token_fwd = str(rel).replace('\\','/') + '/'
-        dir_token_bak = str(rel).replace('/','\\') + '\\'
-        for p in ROOT.rglob('*.md'):
-            try:
-                t = p.read_text(encoding='utf-8', errors='ignore')
-            except Exception:
-                continue
-            if dir_token_fwd in t or dir_token_bak in t:
-                link_refs += 1
+        total_files, md_files, _, total_size = subtree_totals(stats, d)
         top = rel.parts[1] if len(rel.parts) > 1 else rel.parts[0] if rel.parts else ''
         rows.append({
             'dir': str(rel),
@@ -50,7 +120,7 @@ def dir_stats(base: Path):
             'total_files': total_files,
             'md_files': md_files,
             'total_size': total_size,
-            'link_refs': link_refs,
+            'link_refs': link_refs.get(d, 0),
             'is_mk': 'yes' if str(rel).startswith('notes/MK') or rel == Path('notes/MK') else 'no',
             'is_canon_top': 'yes' if (d.parent == MK and d.name in CANON) else 'no'
         })
@@ -59,12 +129,18 @@ def dir_stats(base: Path):
 
 def main():
     ART.mkdir(parents=True, exist_ok=True)
+    # One walk of ROOT gives the per-directory counts and every note to scan for references.
+    stats, md_paths = walk(ROOT)
+    tops = sorted(NOTES.joinpath(c.name) for c in stats.get(NOTES, DirStats()).children)
+    dirs = [d for top in tops for d in [top] + subdirs(stats, top)]
+    link_refs = count_link_refs(dirs, md_paths)
     rows = []
     # top-level under notes
-    for d in sorted([p for p in NOTES.iterdir() if p.is_dir()]):
-        rows.extend(dir_stats(d))
+    for d in tops:
+        rows.extend(dir_stats(d, stats, link_refs))
     # include notes root
-    rows.append({'dir': 'notes', 'top': 'notes', 'total_files': sum(1 for _ in NOTES.rglob('*') if _.is_file()), 'md_files': sum(1 for _ in NOTES.rglob('*.md')), 'total_size': 0, 'link_refs': 0, 'is_mk': 'n/a', 'is_canon_top': 'n/a'})
+    total_files, _, md_glob, _ = subtree_totals(stats, NOTES)
+    rows.append({'dir': 'notes', 'top': 'notes', 'total_files': total_files, 'md_files': md_glob, 'total_size': 0, 'link_refs': 0, 'is_mk': 'n/a', 'is_canon_top': 'n/a'})
 
     with OUT.open('w', newline='', encoding='utf-8') as fp:
         w = csv.DictWriter(fp, fieldnames=['dir','top','total_files','md_files','total_size','link_refs','is_mk','is_canon_top'])
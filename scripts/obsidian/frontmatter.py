@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Front-matter parsing shared by the scripts/obsidian tools.
+
+The audit/apply scripts each used to carry their own extract_yaml /
+parse_scalar / parse_list / parse_tags_from_yaml, compiling a fresh regex
+per key and rescanning the YAML block once per field, and disagreeing on
+block lists (`tags:` followed by `- item` lines) and comma-separated values.
+
+FrontMatter tokenizes the block in one pass into {key: value} with
+precompiled patterns; lookups afterwards are dict hits. It is a line-based
+reader for the flat front matter Obsidian notes use, not a YAML parser:
+
+  key: value          scalar (surrounding quotes stripped on lookup)
+  key: [a, "b"]       inline list
+  key:                block list of the `- item` lines that follow
+    - a
+  key: a, b           read as a list where a list is asked for
+
+Keys are matched case-insensitively, at any indentation, and the first
+occurrence wins, as parse_scalar did.
+"""
+import re
+
+FENCE = '---'
+MAX_LINES = 300
+
+# One alternative per line kind: `key: raw`, `- item`, anything else that is not blank.
+LINE_RE = re.compile(r"^[ \t]*(?:([A-Za-z0-9_-]+)[ \t]*:(.*)|-(?:[ \t]+(.*))?$|(\S.*))", re.MULTILINE)
+ITEM_RE = re.compile(r"\s*-(?:\s+(.*))?$")
+TAGS_LINE_RE = re.compile(r"^(\s*)(tags?|keywords)\s*:", re.IGNORECASE)
+TAG_KEYS = ('tags', 'tag', 'keywords')
+
+
+def split_front_matter(text: str, max_lines: int = MAX_LINES):
+    """(yaml_block, body); yaml_block is None when the note has no closed front matter."""
+    if not text.startswith(FENCE):
+        return None, text
+    lines = text.splitlines()
+    for i in range(1, min(max_lines, len(lines))):
+        if lines[i].strip() == FENCE:
+            return "\n".join(lines[1:i]), "\n".join(lines[i+1:])
+    return None, text
+
+
+def unquote(val: str) -> str:
+    if len(val) >= 2 and val[0] == val[-1] and val[0] in '"\'':
+        return val[1:-1]
+    return val
+
+
+def split_list(raw: str):
+    """Items of an inline value: '[a, "b"]' or 'a, b'."""
+    if raw.startswith('[') and raw.endswith(']'):
+        raw = raw[1:-1]
+    return [unquote(p.strip()) for p in raw.split(',') if p.strip()]
+
+
+class FrontMatter:
+    """Front matter of one note, tokenized once.
+
+    entries keeps every key line in order as (key, raw, items): raw is the
+    stripped text after the colon, items the list for inline [..] and block
+    lists (None for plain scalars).
+    """
+
+    def __init__(self, yaml_block=None):
+        self.entries = []
+        self.first = {}
+        if yaml_block:
+            self._parse(yaml_block)
+
+    def _parse(self, yaml_block: str):
+        entries = self.entries
+        first = self.first
+        block = None  # items of the block list being collected
+        for key, raw, item, other in LINE_RE.findall(yaml_block):
+            if key:
+                key = key.lower()
+                raw = raw.strip()
+                if not raw:
+                    items = block = []
+                elif raw[0] == '[' and raw[-1] == ']':
+                    items, block = split_list(raw), None
+                else:
+                    items = block = None
+                entry = (key, raw, items)
+                entries.append(entry)
+                if key not in first:
+                    first[key] = entry
+            elif other:
+                block = None
+            elif block is not None:
+                item = item.strip()
+                if item:
+                    block.append(unquote(item))
+
+    def __contains__(self, key):
+        return key.lower() in self.first
+
+    def scalar(self, key: str) -> str:
+        """Value of key as a string ('' when missing or a block list)."""
+        entry = self.first.get(key.lower())
+        return unquote(entry[1]) if entry else ''
+
+    def list(self, key: str):
+        """Items of key: inline or block list, or a comma-separated scalar."""
+        entry = self.first.get(key.lower())
+        if entry is None:
+            return []
+        return list(entry[2]) if entry[2] is not None else split_list(entry[1])
+
+    def tags(self):
+        """Raw tag strings from every tags/tag/keywords key, in order."""
+        out = []
+        for key, raw, items in self.entries:
+            if key in TAG_KEYS:
+                out.extend(items if items is not None else split_list(raw))
+        return out
+
+
+def parse_front_matter(text: str):
+    """(FrontMatter, yaml_block, body) for a note's text."""
+    yaml_block, body = split_front_matter(text)
+    return FrontMatter(yaml_block), yaml_block, body
+
+
+def replace_tags(yaml_block: str, tags, drop_empty: bool = False):
+    """yaml_block with its tags/tag/keywords keys (and block lists under them) replaced by `tags: [...]`.
+
+    The new line takes the place of the first such key; later ones are
+    dropped, since tags() already merged their values. It is appended when
+    there is no such key. With drop_empty and no tags nothing is written.
+    """
+    tags_line = f"tags: [{', '.join(tags)}]"
+    out = []
+    replaced = False
+    skipping = False
+    for line in (yaml_block.splitlines() if yaml_block else []):
+        if skipping and ITEM_RE.match(line):
+            continue
+        skipping = False
+        m = TAGS_LINE_RE.match(line)
+        if m:
+            if not replaced and (tags or not drop_empty):
+                out.append(m.group(1) + tags_line)
+            replaced = skipping = True
+            continue
+        out.append(line)
+    if not replaced and (tags or not drop_empty):
+        out.append(tags_line)
+    return "\n".join(out)
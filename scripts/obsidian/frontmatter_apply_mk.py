@@ -1,86 +1,27 @@
 #!/usr/bin/env python3
-import difflib
-import re
 from datetime import datetime
 from pathlib import Path
-import csv
 
-ROOT = Path(__file__).resolve().parents[1]
-MK = ROOT / 'notes' / 'MK'
+from apply_journal import ApplyTransaction
+from artifacts import DiffWriter, PlanWriter, gzip_option
+from frontmatter import parse_front_matter
+from patterns import HEADING_PREFIX_RE
+from vault_scan import ROOT, MK, scan_vault
+
 TASKS = ROOT / 'TASKS'
 AUDIT_CSV = TASKS / 'mk_frontmatter_dry_run.csv'
 DIFF_PATH = TASKS / 'mk_frontmatter_apply_dry.diff'
 PLAN_CSV = TASKS / 'mk_frontmatter_apply_plan.csv'
 
 
-def read_text_best_effort(p: Path) -> str:
-    for enc in ('utf-8', 'utf-8-sig', 'cp932', 'shift_jis'):
-        try:
-            return p.read_text(encoding=enc)
-        except Exception:
-            continue
-    return p.read_text(errors='ignore')
-
-
-def extract_yaml(text: str):
-    if not text.startswith('---'):
-        return None, text
-    lines = text.splitlines()
-    end = None
-    for i in range(1, min(300, len(lines))):
-        if lines[i].strip() == '---':
-            end = i
-            break
-    if end is None:
-        return None, text
-    yaml_block = "\n".join(lines[1:end])
-    body = "\n".join(lines[end+1:])
-    return yaml_block, body
-
-
 def get_h1_title(text: str):
     for line in text.splitlines():
         if line.strip().startswith('#'):
-            t = re.sub(r"^#+\s*", "", line.strip())
+            t = HEADING_PREFIX_RE.sub("", line.strip())
             return t.strip()
     return ''
 
 
-def parse_scalar(yaml: str, key: str):
-    pat = re.compile(rf"(?im)^\s*{re.escape(key)}\s*:\s*(.+?)\s*$")
-    m = pat.search(yaml)
-    if m:
-        val = m.group(1).strip()
-        if (val.startswith('"') and val.endswith('"')) or (val.startswith("'") and val.endswith("'")):
-            val = val[1:-1]
-        return val
-    return ''
-
-
-def parse_list(yaml: str, key: str):
-    m = re.search(rf"(?im)^\s*{re.escape(key)}\s*:\s*(\[.*?\])\s*$", yaml)
-    if m:
-        inner = m.group(1).strip().strip('[]')
-        return [x.strip().strip('"\'') for x in inner.split(',') if x.strip()]
-    lines = yaml.splitlines()
-    out = []
-    start = None
-    for i, line in enumerate(lines):
-        if re.match(rf"(?i)^\s*{re.escape(key)}\s*:\s*$", line):
-            start = i + 1
-            break
-    if start is not None:
-        for j in range(start, len(lines)):
-            l = lines[j]
-            if re.match(r"^\s*-\s+", l):
-                out.append(re.sub(r"^\s*-\s+", "", l).strip())
-            else:
-                if l.strip() == '':
-                    continue
-                break
-    return out
-
-
 def file_times(p: Path):
     try:
         stat = p.stat()
@@ -93,14 +34,14 @@ def file_times(p: Path):
 
 
 def build_new_text(p: Path, text: str):
-    yaml_block, body = extract_yaml(text)
+    fm, yaml_block, body = parse_front_matter(text)
     created_fs, updated_fs = file_times(p)
     fields_to_add = []
-    title_current = parse_scalar(yaml_block or '', 'title') if yaml_block is not None else ''
-    tags_list = parse_list(yaml_block or '', 'tags') if yaml_block is not None else []
-    status_current = parse_scalar(yaml_block or '', 'status') if yaml_block is not None else ''
-    created_current = parse_scalar(yaml_block or '', 'created') if yaml_block is not None else ''
-    updated_current = parse_scalar(yaml_block or '', 'updated') if yaml_block is not None else ''
+    title_current = fm.scalar('title')
+    tags_list = fm.list('tags')
+    status_current = fm.scalar('status')
+    created_current = fm.scalar('created')
+    updated_current = fm.scalar('updated')
 
     h1 = get_h1_title(body if yaml_block is not None else text)
 
@@ -147,39 +88,27 @@ def main():
     import sys
     if '--apply' in sys.argv:
         apply = True
+    compress = gzip_option(sys.argv)
     TASKS.mkdir(parents=True, exist_ok=True)
-    plan_rows = []
-    diffs = []
     count = 0
-    for p in sorted(MK.rglob('*.md')):
-        low = str(p).lower()
-        if any(seg in low for seg in ['70_templates', '60_attachments', '90_archive', '.obsidian\\', '/.obsidian/']):
-            continue
-        old = read_text_best_effort(p)
-        new, added = build_new_text(p, old)
-        if new is None:
-            continue
-        count += 1
-        rel = str(p.relative_to(ROOT)).replace('\\', '/')
-        plan_rows.append({'file': rel, 'added_fields': ' '.join([k for k, _ in added])})
-        diff = difflib.unified_diff(
-            old.splitlines(True), new.splitlines(True),
-            fromfile=f"a/{rel}", tofile=f"b/{rel}", lineterm=""
-        )
-        diffs.extend(list(diff))
-        if apply:
-            p.write_text(new, encoding='utf-8', newline='\n')
-
-    with DIFF_PATH.open('w', encoding='utf-8', newline='\n') as fp:
-        for line in diffs:
-            fp.write(line)
-            fp.write('\n')
-    with PLAN_CSV.open('w', newline='', encoding='utf-8') as fp:
-        w = csv.DictWriter(fp, fieldnames=['file','added_fields'])
-        w.writeheader()
-        w.writerows(plan_rows)
+    with ApplyTransaction('frontmatter_apply') as txn, \
+            DiffWriter(DIFF_PATH, compress) as diff, PlanWriter(PLAN_CSV, ['file','added_fields'], compress) as plan:
+        for note in scan_vault(MK):
+            p = note.path
+            old = note.text
+            new, added = build_new_text(p, old)
+            if new is None:
+                continue
+            count += 1
+            rel = str(p.relative_to(ROOT)).replace('\\', '/')
+            plan.write({'file': rel, 'added_fields': ' '.join([k for k, _ in added])})
+            diff.write(rel, old, new)
+            if apply:
+                txn.write_text(p, new)
     mode = 'APPLIED' if apply else 'dry-run'
-    print(f"Frontmatter apply {mode}: files={count}, diff={DIFF_PATH}, plan={PLAN_CSV}")
+    print(f"Frontmatter apply {mode}: files={count}, diff={diff.path}, plan={plan.path}")
+    if txn.path:
+        print(f"Journal: {txn.describe()}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Candidate index for fuzzy note-name lookups.
+
+SequenceMatcher.ratio() is 2*M/T, where M (matched characters) can never
+exceed the multiset character overlap of the two strings, nor their longest
+common subsequence (matching blocks never cross). The index only runs the
+full ratio on names that could still reach min_score:
+
+- every character occurrence becomes a token (ch, k) for the k-th occurrence
+  of ch, so the number of shared tokens is exactly the multiset overlap.
+  Counting the query's posting lists (in C, via Counter) gives that overlap
+  for every name sharing a character at all; the rest score 0;
+- names whose overlap bound misses min_score are dropped, then those whose
+  LCS bound (bit-parallel over Python ints) misses it;
+- the survivors get the real ratio.
+
+Results are identical to scoring every name.
+"""
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from itertools import chain
+
+
+def char_tokens(s: str):
+    """Positional character tokens: ('a', 0), ('a', 1), ... for each repeat."""
+    counts = {}
+    out = []
+    for ch in s:
+        k = counts.get(ch, 0)
+        counts[ch] = k + 1
+        out.append((ch, k))
+    return out
+
+
+def char_masks(s: str):
+    """{ch: bitmask of the positions of ch in s} for lcs_length()."""
+    masks = {}
+    for i, ch in enumerate(s):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    return masks
+
+
+def lcs_length(a: str, b_masks, lb: int) -> int:
+    """Length of the longest common subsequence of a and b (Hyyrö's bit-vector algorithm)."""
+    full = (1 << lb) - 1
+    v = full
+    for ch in a:
+        u = v & b_masks.get(ch, 0)
+        if u:
+            v = (v + u) | (v - u)
+    return lb - bin(v & full).count('1')
+
+
+class FuzzyNameIndex:
+    def __init__(self, names):
+        self.names = list(dict.fromkeys(names))
+        self.lengths = []
+        self.masks = []
+        self.postings = defaultdict(list)
+        for i, name in enumerate(self.names):
+            self.lengths.append(len(name))
+            self.masks.append(char_masks(name))
+            for t in char_tokens(name):
+                self.postings[t].append(i)
+        # how many names were fully scored by the last search() (for benchmarks)
+        self.last_candidates = 0
+
+    def __len__(self):
+        return len(self.names)
+
+    def _full_scan(self, q: str, min_score: float):
+        out = []
+        for name in self.names:
+            score = SequenceMatcher(None, q, name).ratio()
+            if score >= min_score:
+                out.append((score, name))
+        self.last_candidates = len(self.names)
+        return out
+
+    def search(self, q: str, min_score: float):
+        """[(score, name)] for every indexed name with ratio(q, name) >= min_score."""
+        if min_score <= 0 or not q:
+            return self._full_scan(q, min_score)
+        la = len(q)
+        postings = self.postings
+        overlap = Counter(chain.from_iterable(postings.get(t, ()) for t in char_tokens(q)))
+        out = []
+        scored = 0
+        for i, shared in overlap.items():
+            lb = self.lengths[i]
+            if 2.0 * shared / (la + lb) < min_score:
+                continue
+            if 2.0 * lcs_length(q, self.masks[i], lb) / (la + lb) < min_score:
+                continue
+            scored += 1
+            name = self.names[i]
+            score = SequenceMatcher(None, q, name).ratio()
+            if score >= min_score:
+                out.append((score, name))
+        self.last_candidates = scored
+        return out
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Vault-wide TF-IDF ranking of the per-note keyword candidates.
+
+keywords.keyword_scores() gives every note a weighted term frequency (token
+counts, a heading bonus, linked domains). Ranked on their own, those favour
+words that half the vault uses. KeywordEngine takes the scores of the whole
+vault once, counts document frequencies and ranks each note's candidates by
+tf * idf, so the terms that set a note apart come first.
+
+Terms are interned to integer ids. A note is a sparse vector of two parallel
+arrays (term ids, term frequencies) and idf is a single array('d'), so
+weighting a note is a couple of C-level map()s over its own terms.
+"""
+import math
+import sys
+from array import array
+from operator import mul
+
+from keywords import rank_keywords
+
+
+class KeywordEngine:
+    def __init__(self):
+        self.ids = {}
+        self.terms = []
+        self.df = array('L')
+        self.docs = []
+        self._idf = None
+
+    def __len__(self):
+        return len(self.docs)
+
+    @classmethod
+    def from_notes(cls, notes):
+        """Engine with notes[i].keyword_scores added as document i."""
+        engine = cls()
+        for note in notes:
+            engine.add(note.keyword_scores)
+        return engine
+
+    def term_id(self, term: str) -> int:
+        i = self.ids.get(term)
+        if i is None:
+            i = len(self.terms)
+            term = sys.intern(term)
+            self.ids[term] = i
+            self.terms.append(term)
+            self.df.append(0)
+        return i
+
+    def add(self, scores) -> int:
+        """Add one note's {term: tf}; returns its document number."""
+        known = self.ids
+        for term in scores:
+            if term not in known:
+                self.term_id(term)
+        ids = array('L', map(known.__getitem__, scores))
+        df = self.df
+        for i in ids:
+            df[i] += 1
+        self.docs.append((ids, array('d', scores.values())))
+        self._idf = None
+        return len(self.docs) - 1
+
+    @property
+    def idf(self) -> array:
+        """Smoothed idf per term id: ln((1 + N) / (1 + df)) + 1."""
+        if self._idf is None:
+            n = len(self.docs) + 1
+            self._idf = array('d', [math.log(n / (d + 1)) + 1.0 for d in self.df])
+        return self._idf
+
+    def weights(self, doc: int):
+        """{term: tf * idf} for the terms of document doc."""
+        ids, tf = self.docs[doc]
+        return dict(zip(map(self.terms.__getitem__, ids), map(mul, tf, map(self.idf.__getitem__, ids))))
+
+    def keywords(self, doc: int):
+        """Terms of document doc, highest tf-idf first (ties alphabetical)."""
+        return rank_keywords(self.weights(doc))
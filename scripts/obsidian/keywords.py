@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Tag normalisation and keyword extraction shared by the retag scripts."""
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+from lexer import NoteLex, lex_note
+from patterns import EN_TOKEN_RE, KATA_TOKEN_RE, WHITESPACE_RE, WWW_PREFIX_RE
+
+STOP_TAGS = {'mk'}
+STOPWORDS_EN = set('''a an the and or for of to in on with without from by as is are was were be been being this that these those it its at into about over under above below out up down off so not no yes you your our their we they them i me my mine ourselves himself herself itself themselves if else when than then which who whom whose what where why how all any each few more most other some such only own same can will just don t should now here there very via etc com www http https md txt json yaml yml csv tsv pdf png jpg jpeg gif mp4 webm mov mkv ts html htm css js tag tags hashtag hashtags document documents user users file files folder folders title titles page pages link links post posts content contents draft drafts sample samples example examples todo todos today update updated updates version versions note notes'''.split())
+STOPWORDS_JA = set('''これ それ あれ ここ そこ あそこ こちら どれ どこ そして しかし また ため ので から こと もの とき です ます でした でしたら では には が は に を へ と も の より や など ために ように ような における に対して について まで までに そして また さらに 等 等々 的 的な 的に のような のように できる できない する しない 使用 利用 参考 注意 例 例示 例として 概要 要約'''.split())
+GENERIC_TOKENS = {'note', 'notes', 'index', 'todo', 'draft', 'temp', 'test'}
+
+
+def normalize_tag(tag: str) -> str:
+    t = tag.strip()
+    if t.startswith('#'):
+        t = t[1:]
+    t = unicodedata.normalize('NFKC', t)
+    t = WHITESPACE_RE.sub("-", t)
+    t = t.strip(".,;:'\"()[]{}<>")
+    t = t.replace('—', '-').replace('–', '-')
+    t = t.lower()
+    return t
+
+
+def normalize_tags(tags):
+    """Normalise, de-duplicate and drop STOP_TAGS, keeping first-seen order."""
+    out = []
+    seen = set()
+    for t in tags:
+        nt = normalize_tag(t)
+        if nt and nt not in seen and nt not in STOP_TAGS:
+            out.append(nt)
+            seen.add(nt)
+    return out
+
+
+def inline_tags_of(lx: NoteLex):
+    return normalize_tags(lx.tags)
+
+
+def extract_inline_tags(text: str):
+    return inline_tags_of(lex_note(text))
+
+
+def domains_of(lx: NoteLex):
+    """Site names of the note's URLs ('github', 'twitter', ...), normalised and de-duplicated."""
+    hosts = []
+    for host in lx.hosts:
+        host = WWW_PREFIX_RE.sub("", host.lower())
+        parts = host.split('.')
+        root = parts[-2] if len(parts) >= 2 else parts[0]
+        mapping = {'x': 'twitter', 't': 'twitter'}
+        root = mapping.get(root, root)
+        if root and root not in {'com','net','org','co','jp','io'}:
+            hosts.append(root)
+    out = []
+    seen = set()
+    for h in hosts:
+        nh = normalize_tag(h)
+        if nh and nh not in seen and nh not in STOP_TAGS and nh not in STOPWORDS_EN:
+            out.append(nh)
+            seen.add(nh)
+    return out
+
+
+def extract_domains(text: str):
+    return domains_of(lex_note(text))
+
+
+@lru_cache(maxsize=1 << 16)
+def keyword_candidate(token: str, lang: str = 'en'):
+    """Normalised keyword for a raw token, or None when it is a stop word or generic."""
+    nt = normalize_tag(token)
+    if not nt or nt in STOP_TAGS or nt in GENERIC_TOKENS:
+        return None
+    if nt in (STOPWORDS_EN if lang == 'en' else STOPWORDS_JA):
+        return None
+    return nt
+
+
+def keyword_scores_of(lx: NoteLex):
+    """Score candidate keywords: token counts, +2 when the token is also a heading token, +1.5 per domain.
+
+    These are a note's term frequencies; keyword_engine.KeywordEngine weighs
+    them by how many notes of the vault share each term.
+    """
+    score = {}
+    def bump(tok, w=1.0):
+        score[tok] = score.get(tok, 0.0) + w
+
+    ja_tokens = lx.ja_tokens
+    # each distinct raw token is normalised once, however often it repeats
+    for tokens, lang in ((lx.en_tokens, 'en'), (lx.kata_tokens, 'ja'), (ja_tokens, 'ja')):
+        for t, n in Counter(tokens).items():
+            nt = keyword_candidate(t, lang)
+            if nt:
+                bump(nt, n)
+
+    # whole heading tokens only: 'log' no longer scores for a '# Blog' heading
+    head_text = '\n'.join(lx.headings)
+    head_tokens = {keyword_candidate(t, 'en') for t in EN_TOKEN_RE.findall(head_text)}
+    head_tokens.update(keyword_candidate(t, 'ja') for t in KATA_TOKEN_RE.findall(head_text))
+    head_tokens.update(keyword_candidate(t, 'ja') for t in ja_tokens)
+    for t in head_tokens.intersection(score):
+        bump(t, 2.0)
+    for d in domains_of(lx):
+        bump(d, 1.5)
+    return score
+
+
+def keyword_scores(text: str):
+    return keyword_scores_of(lex_note(text))
+
+
+def rank_keywords(scores):
+    return [k for k, _ in sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))]
+
+
+def extract_keywords(text: str):
+    return rank_keywords(keyword_scores(text))
+
+
+def pick_tags(sources, initial=(), limit=5):
+    """Fill up to `limit` tags from `sources` in order, after any `initial` tags."""
+    final = list(initial)
+    seen = set(initial)
+    for src in sources:
+        for t in src:
+            if t not in seen and t not in STOP_TAGS:
+                final.append(t)
+                seen.add(t)
+            if len(final) >= limit:
+                return final
+    return final
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Single-pass lexer for the per-note features of the tagging tools.
+
+keywords.keyword_scores() used to strip code blocks with one regex, URLs with
+another, split the lines for headings and then run separate findall passes
+for latin, katakana and kana/kanji tokens, while extract_inline_tags() and
+extract_domains() scanned the text again. lex_note() walks the text once with
+a single alternation over its structure and sorts every match into a NoteLex
+by group name:
+
+- code: a fenced block; skipped for everything but the hosts of its URLs;
+- heading: a line whose first non-blank character is '#'; its tags and URLs
+  are lexed, the rest kept (without the '#' prefix and URLs) as a heading;
+- url: an http(s) URL outside code (scheme in any case, as URL_HOST_RE); its
+  host is kept, the rest is not tokenised;
+- tag: an inline #tag.
+
+The plain text between those matches (and heading/tag text) is collected as
+the walk goes; latin and katakana words are then taken from it with one
+findall each, so the per-word work stays in C. Kana/kanji tokens come from
+the (short) joined headings, as before.
+"""
+import re
+
+from patterns import EN_TOKEN_RE, HEADING_PREFIX_RE, JA_TOKEN_RE, KATA_TOKEN_RE, URL_HOST_RE
+
+# URLs, tags and heading lines stop short of a ``` that opens a closed code
+# block, so the block is always lexed as code (an unclosed ``` is plain text).
+# Every branch starts with a literal and there are no groups, which lets the
+# regex engine skip ahead to the next '`', newline, 'h'/'H' or '#'; a match is
+# classified by its first character instead.
+_NOT_FENCE = r"`(?!``[\s\S]*?```)"
+_INLINE = (
+    rf"[hH][tT][tT][pP][sS]?://[^\s`]*(?:{_NOT_FENCE}[^\s`]*)*"
+    rf"|\#[^\s\#`]+(?:{_NOT_FENCE}[^\s\#`]*)*"
+    rf"|\#{_NOT_FENCE}[^\s\#`]*(?:{_NOT_FENCE}[^\s\#`]*)*"
+)
+NOTE_TOKEN_RE = re.compile(
+    r"```[\s\S]*?```"
+    rf"|\n[^\S\n]*\#[^\n`]*(?:{_NOT_FENCE}[^\n`]*)*"
+    rf"|{_INLINE}"
+)
+# URLs and tags only, for the inside of a heading line or a tag.
+INLINE_TOKEN_RE = re.compile(_INLINE)
+
+
+class NoteLex:
+    """Everything the tagging tools read from a note body."""
+
+    def __init__(self):
+        self.code_spans = []    # (start, end) of each fenced block
+        self.urls = []          # URLs outside code blocks
+        self.hosts = []         # URL hosts, code blocks included, in text order
+        self.headings = []      # heading texts, '#' prefix and URLs removed
+        self.tags = []          # raw inline #tag names
+        self.en_tokens = []
+        self.kata_tokens = []
+
+    @property
+    def ja_tokens(self):
+        return JA_TOKEN_RE.findall(''.join(self.headings))
+
+    def _url(self, url: str):
+        self.urls.append(url)
+        self.hosts.append(url.split('://', 1)[1].split('/', 1)[0])
+
+    def _inline(self, text: str, words):
+        """Lex the URLs/tags of a heading line or tag name; the rest goes to words."""
+        pos = 0
+        for m in INLINE_TOKEN_RE.finditer(text):
+            words.append(text[pos:m.start()])
+            pos = m.end()
+            tok = m.group()
+            if tok[0] == '#':
+                self._tag(tok[1:], words)
+            else:
+                self._url(tok)
+        words.append(text[pos:])
+
+    def _tag(self, name: str, words):
+        self.tags.append(name)
+        # the name is tokenised too ('#python' counts as the word python)
+        if '://' in name:
+            self._inline(name, words)
+        else:
+            words.append(name)
+
+    def _heading(self, line: str, words):
+        first_url = len(self.urls)
+        self._inline(line, words)
+        for url in self.urls[first_url:]:
+            line = line.replace(url, ' ', 1)
+        s = line.strip()
+        self.headings.append(HEADING_PREFIX_RE.sub('', s))
+
+
+def lex_note(text: str) -> NoteLex:
+    lx = NoteLex()
+    words = []
+    # a heading match starts at the newline before it; one is added so the
+    # first line can be a heading too (spans are shifted back by one)
+    text = '\n' + text
+    pos = 0
+    for m in NOTE_TOKEN_RE.finditer(text):
+        start, end = m.span()
+        words.append(text[pos:start])
+        pos = end
+        tok = m.group()
+        first = tok[0]
+        if first == '#':
+            lx._tag(tok[1:], words)
+        elif first == '\n':
+            lx._heading(tok[1:], words)
+        elif first == '`':
+            lx.code_spans.append((start - 1, end - 1))
+            if '://' in tok:
+                lx.hosts.extend(URL_HOST_RE.findall(tok))
+        else:
+            lx._url(tok)
+    words.append(text[pos:])
+    # the pieces never share a word, so any separator keeps the tokens apart
+    plain = ' '.join(words)
+    lx.en_tokens = EN_TOKEN_RE.findall(plain)
+    lx.kata_tokens = KATA_TOKEN_RE.findall(plain)
+    return lx
@@ -1,32 +1,28 @@
 #!/usr/bin/env python3
-import csv
-import re
+"""Link audit of the MK notes -> TASKS/mk_link_audit.csv.
+
+With --watch the report is kept current: changed notes are re-audited, and
+when a note or attachment appears or disappears so are the notes linking to
+it (or to anything of the same name), found through the link graph. With
+--no-index there is no graph, so such a change re-audits every note. See
+watch.py for --poll/--debounce.
+"""
+import sys
+from functools import partial
 from pathlib import Path
 
-ROOT = Path(__file__).resolve().parents[1]
-MK = ROOT / 'notes' / 'MK'
+from artifacts import write_csv
+from link_graph import LinkGraph
+from note_index import index_options, load_notes_indexed
+from parallel import jobs_option, pool_map
+from patterns import EXTERNAL_RE
+from records import LinkRow, note_rel
+from vault_scan import ROOT
+from watch import stale_notes, watch, watch_option
+
 TASKS = ROOT / 'TASKS'
 OUT = TASKS / 'mk_link_audit.csv'
-
-
-def read_text_best_effort(p: Path) -> str:
-    for enc in ('utf-8', 'utf-8-sig', 'cp932', 'shift_jis'):
-        try:
-            return p.read_text(encoding=enc)
-        except Exception:
-            continue
-    return p.read_text(errors='ignore')
-
-
-def all_md_files():
-    files = [p for p in MK.rglob('*.md')]
-    out = []
-    for f in files:
-        low = str(f).lower()
-        if any(seg in low for seg in ['70_templates', '60_attachments', '90_archive', '.obsidian\\', '/.obsidian/']):
-            continue
-        out.append(f)
-    return out
+FIELDS = list(LinkRow._fields)
 
 
 def build_name_index(files):
@@ -46,15 +42,15 @@ def relpath(from_path: Path, to_path: Path) -> str:
         return os.path.relpath(str(to_path), str(from_path.parent))
 
 
-def audit_file(p: Path, name_index, all_files_set):
+def audit_file(note, name_index, all_files_set):
     rows = []
-    text = read_text_best_effort(p)
+    p = note.path
+    file = note_rel(p)  # shared by all of the note's rows
     # Wiki links: [[target|alias]] or [[target]] or ![[...]]
-    for m in re.finditer(r"!??\[\[([^\]]+)\]\]", text):
-        raw = m.group(1)
+    for typ, raw in note.wikilinks:
+        typ = sys.intern(typ)
         target = raw.split('|', 1)[0]
         target = target.split('#', 1)[0]
-        typ = 'embed-wikilink' if text[m.start():m.start()+3] == '![[' else 'wikilink'
         if '/' in target or '\\' in target:
             # path-specified wikilink: check existence (respect explicit extension)
             pt = Path(target)
@@ -63,7 +59,7 @@ def audit_file(p: Path, name_index, all_files_set):
             else:
                 cand = (p.parent / target)
             if cand.exists():
-                rows.append({'file': str(p.relative_to(ROOT)), 'link_type': typ, 'current': target, 'status': 'ok', 'proposal': ''})
+                rows.append(LinkRow(file, typ, target, 'ok'))
             else:
                 # try by name for md targets only
                 if pt.suffix.lower() in ('', '.md'):
@@ -71,28 +67,27 @@ def audit_file(p: Path, name_index, all_files_set):
                     hits = name_index.get(name, [])
                     if len(hits) == 1:
                         new_rel = relpath(p, hits[0])
-                        rows.append({'file': str(p.relative_to(ROOT)), 'link_type': typ, 'current': target, 'status': 'broken', 'proposal': new_rel})
+                        rows.append(LinkRow(file, typ, target, 'broken', new_rel))
                     elif len(hits) > 1:
-                        rows.append({'file': str(p.relative_to(ROOT)), 'link_type': typ, 'current': target, 'status': 'ambiguous', 'proposal': ''})
+                        rows.append(LinkRow(file, typ, target, 'ambiguous'))
                     else:
-                        rows.append({'file': str(p.relative_to(ROOT)), 'link_type': typ, 'current': target, 'status': 'not_found', 'proposal': ''})
+                        rows.append(LinkRow(file, typ, target, 'not_found'))
                 else:
-                    rows.append({'file': str(p.relative_to(ROOT)), 'link_type': typ, 'current': target, 'status': 'not_found', 'proposal': ''})
+                    rows.append(LinkRow(file, typ, target, 'not_found'))
         else:
             # name-only wikilink (accept both bare and with .md)
             name = Path(target).stem.lower()
             hits = name_index.get(name, [])
             if len(hits) >= 1:
-                rows.append({'file': str(p.relative_to(ROOT)), 'link_type': typ, 'current': target, 'status': 'ok', 'proposal': ''})
+                rows.append(LinkRow(file, typ, target, 'ok'))
             else:
-                rows.append({'file': str(p.relative_to(ROOT)), 'link_type': typ, 'current': target, 'status': 'not_found', 'proposal': ''})
+                rows.append(LinkRow(file, typ, target, 'not_found'))
 
     # Markdown links: [text](path)
-    for m in re.finditer(r"!??\[[^\]]*\]\(([^)\s]+)\)", text):
-        url = m.group(1)
-        typ = 'embed-md' if text[m.start()] == '!' else 'md'
-        if re.match(r"^[a-z]+://", url, flags=re.IGNORECASE):
-            rows.append({'file': str(p.relative_to(ROOT)), 'link_type': typ, 'current': url, 'status': 'external', 'proposal': ''})
+    for typ, url in note.md_links:
+        typ = sys.intern(typ)
+        if EXTERNAL_RE.match(url):
+            rows.append(LinkRow(file, typ, url, 'external'))
             continue
         # normalize anchors
         path_part = url.split('#', 1)[0]
@@ -105,7 +100,7 @@ def audit_file(p: Path, name_index, all_files_set):
         else:
             md_try = target_path
         if md_try.exists():
-            rows.append({'file': str(p.relative_to(ROOT)), 'link_type': typ, 'current': url, 'status': 'ok', 'proposal': ''})
+            rows.append(LinkRow(file, typ, url, 'ok'))
         else:
             # try by name lookup
             name = Path(path_part).stem.lower()
@@ -115,34 +110,63 @@ def audit_file(p: Path, name_index, all_files_set):
                 # preserve original anchor if present
                 if '#' in url:
                     new_rel = new_rel + '#' + url.split('#', 1)[1]
-                rows.append({'file': str(p.relative_to(ROOT)), 'link_type': typ, 'current': url, 'status': 'broken', 'proposal': new_rel})
+                rows.append(LinkRow(file, typ, url, 'broken', new_rel))
             elif len(hits) > 1:
-                rows.append({'file': str(p.relative_to(ROOT)), 'link_type': typ, 'current': url, 'status': 'ambiguous', 'proposal': ''})
+                rows.append(LinkRow(file, typ, url, 'ambiguous'))
             else:
-                rows.append({'file': str(p.relative_to(ROOT)), 'link_type': typ, 'current': url, 'status': 'not_found', 'proposal': ''})
+                rows.append(LinkRow(file, typ, url, 'not_found'))
 
     return rows
 
 
+def audit_notes(notes, files, jobs: int = 1):
+    """[(note, audit rows)] for notes, resolving links against files (every note of the vault)."""
+    audit = partial(audit_file, name_index=build_name_index(files), all_files_set=set(files))
+    return list(zip(notes, pool_map(audit, notes, jobs)))
+
+
 def main():
     TASKS.mkdir(parents=True, exist_ok=True)
-    files = all_md_files()
-    name_index = build_name_index(files)
-    all_set = set(files)
-    rows = []
-    for f in files:
-        rows.extend(audit_file(f, name_index, all_set))
-    with OUT.open('w', newline='', encoding='utf-8') as fp:
-        w = csv.DictWriter(fp, fieldnames=['file','link_type','current','status','proposal'])
-        w.writeheader()
-        w.writerows(rows)
-    # Basic summary
-    total = len(rows)
-    broken = sum(1 for r in rows if r['status'] == 'broken')
-    ambiguous = sum(1 for r in rows if r['status'] == 'ambiguous')
-    not_found = sum(1 for r in rows if r['status'] == 'not_found')
-    external = sum(1 for r in rows if r['status'] == 'external')
-    print(f"Link audit written: {OUT} rows={total} broken={broken} ambiguous={ambiguous} not_found={not_found} external={external}")
+    argv = sys.argv[1:]
+    # the backlink graph only pays off in watch mode, to find the notes a move affects
+    use_graph = index_options(argv)[0] and watch_option(argv)
+    jobs = jobs_option(argv)
+    by_path = {}  # note path -> audit rows
+
+    def refresh(touched):
+        known = set(by_path)
+        files, stale, removed = stale_notes(known, touched)
+        for p in removed:
+            del by_path[p]
+        # a note or attachment appearing or disappearing changes how other notes' links resolve
+        current = set(files)
+        moved = removed | (stale - known)
+        if touched is not None:
+            moved.update(p for p in touched if p not in current)
+        if moved and not use_graph:
+            stale = current
+        notes = list(load_notes_indexed([p for p in files if p in stale], argv=argv))
+        if use_graph:
+            with LinkGraph() as graph:
+                graph.sync()
+                if touched is not None:
+                    srcs = {src for p in moved for src in graph.referrers(p.relative_to(ROOT).as_posix())}
+                    extra = [p for p in files if p not in stale and p.relative_to(ROOT).as_posix() in srcs]
+                    notes += load_notes_indexed(extra, argv=argv)
+        for note, file_rows in audit_notes(notes, files, jobs):
+            by_path[note.path] = file_rows
+        rows = [r for p in files for r in by_path.get(p, ())]
+        write_csv(OUT, FIELDS, rows)
+        # Basic summary
+        total = len(rows)
+        broken = sum(1 for r in rows if r.status == 'broken')
+        ambiguous = sum(1 for r in rows if r.status == 'ambiguous')
+        not_found = sum(1 for r in rows if r.status == 'not_found')
+        external = sum(1 for r in rows if r.status == 'external')
+        print(f"Link audit written: {OUT} rows={total} broken={broken} ambiguous={ambiguous} not_found={not_found} external={external}")
+
+    # attachment folders are watched too: links into them are audited
+    watch(refresh, argv, exclude=('.obsidian',))
 
 
 if __name__ == '__main__':
@@ -1,26 +1,19 @@
 #!/usr/bin/env python3
 import csv
-import re
-import difflib
-from pathlib import Path
 
-ROOT = Path(__file__).resolve().parents[1]
-MK = ROOT / 'notes' / 'MK'
+from apply_journal import ApplyTransaction
+from artifacts import DiffWriter, PlanWriter, gzip_option
+from link_fuzzy_proposals_mk import FuzzyProposal, Suggestion
+from link_rewrite import LinkRewriter
+from vault_scan import ROOT, read_text_best_effort
+
 TASKS = ROOT / 'TASKS'
 ART = TASKS / 'artifacts'
 FUZZY = ART / 'mk_link_fuzzy_proposals.csv'
 FUZZY_ALT = TASKS / 'artifacts' / 'mk_link_fuzzy_proposals.csv'
 DIFF = ART / 'mk_link_autoapply_dry.diff'
 PLAN = ART / 'mk_link_autoapply_plan.csv'
-
-
-def read_text_best_effort(p: Path) -> str:
-    for enc in ('utf-8', 'utf-8-sig', 'cp932', 'shift_jis'):
-        try:
-            return p.read_text(encoding=enc)
-        except Exception:
-            continue
-    return p.read_text(errors='ignore')
+PLAN_FIELDS = ['file','link_type','current','proposal','score']
 
 
 def parse_suggestions(s: str):
@@ -32,34 +25,79 @@ def parse_suggestions(s: str):
     for part in parts:
         try:
             rel, stem, score = part.split('|', 2)
-            out.append((rel, stem, float(score)))
+            out.append(Suggestion(rel, stem, float(score)))
         except Exception:
             continue
     return out
 
 
-def replace_links(text: str, current: str, proposal: str, link_type: str):
-    changed = False
-    new = text
-    if link_type and 'wikilink' in link_type:
-        pattern = re.compile(r"(!?\[\[)" + re.escape(current) + r"(?=(\]|\||#))")
-        new2 = pattern.sub(r"\1" + proposal, new)
-    else:
-        pattern = re.compile(r"(!?\[[^\]]*\]\()" + re.escape(current) + r"(\))")
-        new2 = pattern.sub(r"\1" + proposal + r"\2", new)
-    if new2 != new:
-        changed = True
-        new = new2
-    return changed, new
+def proposals_from_csv(rows):
+    """FuzzyProposals back from the rows of mk_link_fuzzy_proposals.csv."""
+    return [FuzzyProposal(r['file'], r['link_type'], r['current'], tuple(parse_suggestions(r['suggestions']))) for r in rows]
 
 
-def main():
+def pick_suggestion(sugg, th: float, margin: float):
+    """The suggestion to apply, or None: best score >= th and ahead of the runner-up by margin."""
+    qualified = [x for x in sugg if x[2] >= th]
+    if not qualified:
+        return None
+    # sort by score DESC
+    qualified.sort(key=lambda x: -x[2])
+    # margin rule: top1 - top2 >= margin (or only one candidate)
+    if len(qualified) > 1 and (qualified[0][2] - qualified[1][2] < margin):
+        return None
+    return qualified[0]
+
+
+def plan_autoapply(proposals, th: float, margin: float, diff, plan, apply: bool = False, read_text=read_text_best_effort):
+    """Rewrite the links of the qualifying proposals -> (links rewritten, {note Path: new text}).
+
+    Proposals are grouped by note; each note is read once (through read_text),
+    rewritten in one LinkRewriter pass, with later proposals seeing the
+    earlier rewrites, and diffed once. Only with apply are the new texts kept
+    and returned for writing.
+    """
+    per_file = {}
+    for prop in proposals:
+        picked = pick_suggestion(prop.suggestions, th, margin)
+        if picked is not None:
+            # proposal should keep anchors if present in current link (handled by replacement patterns)
+            per_file.setdefault(prop.file, []).append((prop, picked))
+    changed = 0
+    dirty = {}
+    for file, picks in per_file.items():
+        p = ROOT / file
+        if not p.exists():
+            continue
+        old = read_text(p)
+        rewriter = LinkRewriter((prop.current, picked.rel, prop.link_type) for prop, picked in picks)
+        new, fired = rewriter.rewrite_rows(old)
+        if not any(fired):
+            continue
+        rel_unix = file.replace('\\', '/')
+        for (prop, picked), hit in zip(picks, fired):
+            if not hit:
+                continue
+            changed += 1
+            plan.write({
+                'file': rel_unix,
+                'link_type': prop.link_type,
+                'current': prop.current,
+                'proposal': picked.rel,
+                'score': f"{picked.score:.2f}"
+            })
+        diff.write(rel_unix, old, new)
+        if apply:
+            dirty[p] = new
+    return changed, dirty
+
+
+def autoapply_options(args):
+    """(threshold, margin, apply) from the command line."""
     th = 0.85
     margin = 0.10
     apply = False
     # optional args: --threshold 0.85, --margin 0.10, --apply
-    import sys
-    args = sys.argv[1:]
     i = 0
     while i < len(args):
         a = args[i]
@@ -82,66 +120,28 @@ def main():
             i += 1
             continue
         i += 1
+    return th, margin, apply
+
 
+def main():
+    import sys
+    th, margin, apply = autoapply_options(sys.argv[1:])
     ART.mkdir(parents=True, exist_ok=True)
     fuzzy_path = FUZZY_ALT if FUZZY_ALT.exists() else FUZZY
     if not fuzzy_path.exists():
         print(f"Fuzzy proposals not found: {FUZZY} or {FUZZY_ALT}")
         return
-    rows = list(csv.DictReader(fuzzy_path.open(encoding='utf-8')))
-    plan_rows = []
-    diffs = []
-    changed_files = 0
-    for r in rows:
-        file_rel = r['file']
-        link_type = r['link_type']
-        current = r['current']
-        sugg = parse_suggestions(r['suggestions'])
-        if not sugg:
-            continue
-        qualified = [(rel, stem, score) for (rel, stem, score) in sugg if score >= th]
-        if not qualified:
-            continue
-        # sort by score DESC
-        qualified.sort(key=lambda x: -x[2])
-        # margin rule: top1 - top2 >= margin (or only one candidate)
-        if len(qualified) > 1 and (qualified[0][2] - qualified[1][2] < margin):
-            continue
-        rel_path, stem, score = qualified[0]
-        # proposal should keep anchors if present in current link (handled by replacement patterns)
-        proposal = rel_path
-        p = ROOT / file_rel
-        if not p.exists():
-            continue
-        old = read_text_best_effort(p)
-        ok, new = replace_links(old, current, proposal, link_type)
-        if not ok:
-            continue
-        changed_files += 1
-        rel_unix = file_rel.replace('\\', '/')
-        plan_rows.append({
-            'file': rel_unix,
-            'link_type': link_type,
-            'current': current,
-            'proposal': proposal,
-            'score': f"{score:.2f}"
-        })
-        diff = difflib.unified_diff(old.splitlines(True), new.splitlines(True), fromfile=f"a/{rel_unix}", tofile=f"b/{rel_unix}")
-        diffs.extend(list(diff))
-        if apply:
-            p.write_text(new, encoding='utf-8', newline='\n')
-
-    with DIFF.open('w', encoding='utf-8', newline='\n') as fp:
-        for line in diffs:
-            fp.write(line)
-            if not line.endswith('\n'):
-                fp.write('\n')
-    with PLAN.open('w', newline='', encoding='utf-8') as fp:
-        w = csv.DictWriter(fp, fieldnames=['file','link_type','current','proposal','score'])
-        w.writeheader()
-        w.writerows(plan_rows)
+    proposals = proposals_from_csv(csv.DictReader(fuzzy_path.open(encoding='utf-8')))
+    compress = gzip_option(sys.argv)
+    with DiffWriter(DIFF, compress) as diff, PlanWriter(PLAN, PLAN_FIELDS, compress) as plan:
+        changed_files, dirty = plan_autoapply(proposals, th, margin, diff, plan, apply=apply)
+    with ApplyTransaction('link_autoapply') as txn:
+        for p, new in dirty.items():
+            txn.write_text(p, new)
     mode = 'APPLIED' if apply else 'dry-run'
-    print(f"Link auto-apply {mode}: files={changed_files}, diff={DIFF}, plan={PLAN}, threshold={th}, margin={margin}")
+    print(f"Link auto-apply {mode}: files={changed_files}, diff={diff.path}, plan={plan.path}, threshold={th}, margin={margin}")
+    if txn.path:
+        print(f"Journal: {txn.describe()}")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""Persisted link graph (forward + backward adjacency) over the note index.
+
+Edges live in the note index database, keyed by note ID (the path relative
+to ROOT, as in the notes table), and are derived from the wikilinks/markdown
+links the index already parsed. sync() only re-derives the edges of notes
+whose content hash changed since the last sync, so keeping the graph current
+costs O(changed notes); backlinks()/outlinks()/move_impact() are indexed
+lookups, O(degree).
+
+Path links (markdown links, wikilinks with a folder) are stored resolved to
+the target's ID. Name-only wikilinks are stored by name and matched at query
+time, so they follow a note wherever it moves.
+
+Usage:
+  python link_graph.py sync [--rehash] [--jobs N]
+  python link_graph.py backlinks <note>
+  python link_graph.py outlinks <note>
+  python link_graph.py impact <note> [<new path>]
+"""
+import json
+import posixpath
+import sqlite3
+import sys
+from pathlib import Path
+
+from note_index import INDEX_DB, NoteIndex, index_options
+from parallel import jobs_option
+from patterns import EXTERNAL_RE
+from vault_scan import ROOT, MK
+
+
+def link_name(target: str) -> str:
+    """Lookup name of a link target / note: stem for notes, file name for attachments."""
+    base = posixpath.basename(target.replace('\\', '/')).lower()
+    stem, ext = posixpath.splitext(base)
+    return stem if ext in ('', '.md') else base
+
+
+def resolve_link(src: str, kind: str, raw: str):
+    """(dst, name) for one parsed link of note `src`; None for external links.
+
+    dst is the resolved note ID for path links, name the lookup name for
+    name-only wikilinks. Resolution follows link_audit_mk: relative to the
+    linking note, '.md' implied when there is no extension.
+    """
+    if kind in ('wikilink', 'embed-wikilink'):
+        target = raw.split('|', 1)[0].split('#', 1)[0]
+        if '/' not in target and '\\' not in target:
+            return None, link_name(target)
+    else:
+        if EXTERNAL_RE.match(raw):
+            return None
+        target = raw.split('#', 1)[0].replace('%20', ' ')
+    target = target.replace('\\', '/')
+    if not posixpath.splitext(target)[1]:
+        target += '.md'
+    return posixpath.normpath(posixpath.join(posixpath.dirname(src), target)), None
+
+
+class LinkGraph:
+    def __init__(self, db_path: Path = INDEX_DB):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._init_schema()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _init_schema(self):
+        c = self.conn
+        c.execute("CREATE TABLE IF NOT EXISTS links (src TEXT, kind TEXT, raw TEXT, dst TEXT, name TEXT)")
+        c.execute("CREATE INDEX IF NOT EXISTS links_src ON links (src)")
+        c.execute("CREATE INDEX IF NOT EXISTS links_dst ON links (dst)")
+        c.execute("CREATE INDEX IF NOT EXISTS links_name ON links (name)")
+        # which version (content hash) of each note the edges were derived from
+        c.execute("CREATE TABLE IF NOT EXISTS link_sources (src TEXT PRIMARY KEY, sha1 TEXT)")
+        # the notes table normally exists already; create it so a fresh DB can be queried
+        c.execute(
+            "CREATE TABLE IF NOT EXISTS notes ("
+            "rel TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, sha1 TEXT, encoding TEXT, data TEXT)"
+        )
+        c.commit()
+
+    def set_links(self, src: str, links, sha1: str = None):
+        """Replace the outgoing edges of src with links [(kind, raw)]."""
+        rows = []
+        for kind, raw in links:
+            resolved = resolve_link(src, kind, raw)
+            if resolved is not None:
+                rows.append((src, kind, raw) + resolved)
+        c = self.conn
+        c.execute("DELETE FROM links WHERE src = ?", (src,))
+        c.executemany("INSERT INTO links VALUES (?, ?, ?, ?, ?)", rows)
+        c.execute("INSERT OR REPLACE INTO link_sources VALUES (?, ?)", (src, sha1))
+
+    def remove(self, src: str):
+        self.conn.execute("DELETE FROM links WHERE src = ?", (src,))
+        self.conn.execute("DELETE FROM link_sources WHERE src = ?", (src,))
+
+    def sync(self):
+        """Bring the edges in line with the note index; returns (updated, removed) note IDs."""
+        c = self.conn
+        stale = c.execute(
+            "SELECT n.rel, n.sha1, n.data FROM notes n LEFT JOIN link_sources s ON s.src = n.rel "
+            "WHERE s.sha1 IS NULL OR s.sha1 != n.sha1"
+        ).fetchall()
+        gone = [r[0] for r in c.execute(
+            "SELECT s.src FROM link_sources s LEFT JOIN notes n ON n.rel = s.src WHERE n.rel IS NULL"
+        )]
+        for rel, sha1, data in stale:
+            fields = json.loads(data)
+            self.set_links(rel, [tuple(x) for x in fields['wikilinks'] + fields['md_links']], sha1)
+        for rel in gone:
+            self.remove(rel)
+        c.commit()
+        return [r[0] for r in stale], gone
+
+    def refresh(self, paths, root: Path = ROOT):
+        """Re-index just these notes (e.g. after a tool rewrote or moved them) and update their edges."""
+        with NoteIndex(self.db_path) as index:
+            for p in paths:
+                rel = p.relative_to(root).as_posix()
+                try:
+                    index.load_note(p, root)
+                except OSError:
+                    index.removed.append(rel)
+        return self.sync()
+
+    def outlinks(self, rel: str):
+        """[(kind, raw, dst, name)] for the links in note rel."""
+        return self.conn.execute(
+            "SELECT kind, raw, dst, name FROM links WHERE src = ? ORDER BY rowid", (rel,)
+        ).fetchall()
+
+    def backlinks(self, rel: str):
+        """[(src, kind, raw)] for every link pointing at rel, by path or by name."""
+        return self.conn.execute(
+            "SELECT src, kind, raw FROM links WHERE dst = ? "
+            "UNION ALL SELECT src, kind, raw FROM links WHERE name = ? AND dst IS NULL "
+            "ORDER BY 1, 3",
+            (rel, link_name(rel)),
+        ).fetchall()
+
+    def referrers(self, rel: str):
+        """Sorted IDs of the notes whose links may resolve differently once rel appears or disappears.
+
+        That is backlinks() plus every link that link_audit_mk would fall back
+        to a lookup by rel's stem for: links to any file of that stem, in any
+        folder, with any extension.
+        """
+        stem = posixpath.splitext(posixpath.basename(rel))[0].lower()
+        like = stem.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '.%'
+        rows = self.conn.execute(
+            "SELECT src FROM links WHERE dst = ? OR name = ? OR name LIKE ? ESCAPE '\\' "
+            "OR dst LIKE ? ESCAPE '\\' OR dst LIKE ? ESCAPE '\\'",
+            (rel, link_name(rel), like, like, '%/' + like),
+        )
+        return sorted({r[0] for r in rows})
+
+    def move_impact(self, rel: str, new_rel: str = None):
+        """[(src, kind, raw, reason)] for links that break if rel moves to new_rel.
+
+        Path links into rel always break; name-only wikilinks only when the
+        file name changes. Relative path links out of rel break when it
+        changes folder. Without new_rel a move to another folder is assumed.
+        """
+        renamed = new_rel is not None and link_name(new_rel) != link_name(rel)
+        out = []
+        for src, kind, raw in self.backlinks(rel):
+            if src == rel:
+                continue
+            if resolve_link(src, kind, raw)[0] is not None:
+                out.append((src, kind, raw, 'path'))
+            elif renamed:
+                out.append((src, kind, raw, 'name'))
+        moves_folder = new_rel is None or posixpath.dirname(new_rel) != posixpath.dirname(rel)
+        if moves_folder:
+            for kind, raw, dst, name in self.outlinks(rel):
+                if dst is not None:
+                    out.append((rel, kind, raw, 'outgoing'))
+        return out
+
+
+def note_id(arg: str, root: Path = ROOT) -> str:
+    p = Path(arg)
+    if p.is_absolute() or p.exists():
+        try:
+            return p.resolve().relative_to(root).as_posix()
+        except ValueError:
+            pass
+    return arg.replace('\\', '/')
+
+
+def main():
+    args = sys.argv[1:]
+    cmd = args[0] if args else ''
+    pos = [a for a in args[1:] if not a.startswith('--')]
+    if cmd == 'sync':
+        _, verify_hash = index_options(args)
+        with NoteIndex(verify_hash=verify_hash) as index:
+            for _ in index.scan(MK, jobs=jobs_option(args)):
+                pass
+        with LinkGraph() as graph:
+            updated, removed = graph.sync()
+        print(f"Link graph synced: {INDEX_DB} (updated={len(updated)} removed={len(removed)})")
+    elif cmd in ('backlinks', 'outlinks', 'impact') and pos:
+        rel = note_id(pos[0])
+        with LinkGraph() as graph:
+            if cmd == 'backlinks':
+                rows = graph.backlinks(rel)
+            elif cmd == 'outlinks':
+                rows = graph.outlinks(rel)
+            else:
+                rows = graph.move_impact(rel, note_id(pos[1]) if len(pos) > 1 else None)
+        for r in rows:
+            print('\t'.join('' if x is None else str(x) for x in r))
+    else:
+        print(__doc__.strip())
+        sys.exit(2)
+
+
+if __name__ == '__main__':
+    main()
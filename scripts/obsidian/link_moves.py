@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Plan the link rewrites that keep relative links intact across note moves.
+
+Given a batch of moves {old ID: new ID}, the backlink graph yields exactly
+the links that can break: path links into a moved note and path links out
+of it. Each is re-pointed from the (possibly moved) source to the (possibly
+moved) target; nothing else in the vault is read. Name-only wikilinks follow
+a note on their own and are left alone.
+"""
+import posixpath
+from collections import defaultdict
+
+from link_graph import resolve_link
+from link_rewrite import LinkRewriter
+
+MD_KINDS = ('md', 'embed-md')
+
+
+def link_token(kind: str, raw: str) -> str:
+    """The link as it reads in the note, for reports: [[raw]] or ](raw)."""
+    return f"]({raw})" if kind in MD_KINDS else f"[[{raw}]]"
+
+
+def relink(kind: str, raw: str, new_target: str) -> str:
+    """raw re-pointed at new_target (relative path), keeping anchor, alias and extension style."""
+    if kind in MD_KINDS:
+        path_part, sep, rest = raw.partition('#')
+        path_part = path_part.replace('%20', ' ')
+    else:
+        path_part = raw.split('|', 1)[0].split('#', 1)[0]
+        sep, rest = '', raw[len(path_part):]
+    if not posixpath.splitext(path_part.replace('\\', '/'))[1] and new_target.endswith('.md'):
+        new_target = new_target[:-3]
+    if kind in MD_KINDS:
+        new_target = new_target.replace(' ', '%20')
+    elif '/' not in new_target:
+        # keep it a path link; a bare name would resolve by name instead
+        new_target = './' + new_target
+    return new_target + sep + rest
+
+
+def plan_link_rewrites(graph, moves):
+    """{source ID (before the move): {(kind, old raw): new raw}} for a batch of moves."""
+    edges = set()
+    for old in moves:
+        for src, kind, raw in graph.backlinks(old):
+            if resolve_link(src, kind, raw)[0] == old:
+                edges.add((src, kind, raw))
+        for kind, raw, dst, _ in graph.outlinks(old):
+            if dst is not None:
+                edges.add((old, kind, raw))
+    rewrites = defaultdict(dict)
+    for src, kind, raw in sorted(edges):
+        dst = resolve_link(src, kind, raw)[0]
+        new_src = moves.get(src, src)
+        new_dst = moves.get(dst, dst)
+        if new_src == src and new_dst == dst:
+            continue
+        if posixpath.dirname(new_src) == posixpath.dirname(src) and new_dst == dst:
+            continue
+        new_raw = relink(kind, raw, posixpath.relpath(new_dst, posixpath.dirname(new_src)))
+        if new_raw != raw:
+            rewrites[src][(kind, raw)] = new_raw
+    return dict(rewrites)
+
+
+def link_rewriter(mapping) -> LinkRewriter:
+    """One note's planned rewrites as a single pass; chained ones (a->b, b->c) don't cascade."""
+    return LinkRewriter(((raw, new_raw, kind) for (kind, raw), new_raw in mapping.items()), chain=False)
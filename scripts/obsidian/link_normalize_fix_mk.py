@@ -2,12 +2,15 @@
 import csv
 import os
 import re
-import difflib
 from datetime import datetime
 from pathlib import Path
 
-ROOT = Path(__file__).resolve().parents[1]
-MK = ROOT / 'notes' / 'MK'
+from apply_journal import ApplyTransaction
+from artifacts import DiffWriter, PlanWriter, gzip_option
+from link_rewrite import LinkRewriter
+from patterns import PATH_SEP_RE
+from vault_scan import ROOT, MK
+
 TASKS = ROOT / 'TASKS'
 ART = TASKS / 'artifacts'
 AUDIT1 = TASKS / 'mk_link_audit.csv'
@@ -16,22 +19,12 @@ PLAN = ART / 'mk_link_normalize_plan.csv'
 DIFF = ART / 'mk_link_normalize_dry.diff'
 
 INVALID_CHARS = '<>:"|?*'
+# link targets that are images with a '|size' suffix / any attachment type
+PIPED_IMAGE_RE = re.compile(r"\.(png|jpg|jpeg|gif|webp)(\||$)", re.IGNORECASE)
+ASSET_EXT_RE = re.compile(r"\.(png|jpg|jpeg|gif|webp|pdf|svg|bmp)$", re.IGNORECASE)
 RESERVED_NAMES = {"CON","PRN","AUX","NUL","COM1","COM2","COM3","COM4","COM5","COM6","COM7","COM8","COM9","LPT1","LPT2","LPT3","LPT4","LPT5","LPT6","LPT7","LPT8","LPT9"}
 
 
-def read_text_best_effort(p: Path) -> str:
-    for enc in ('utf-8', 'utf-8-sig', 'cp932', 'shift_jis'):
-        try:
-            return p.read_text(encoding=enc)
-        except Exception:
-            continue
-    return p.read_text(errors='ignore')
-
-
-def write_text_utf8(p: Path, text: str):
-    p.write_text(text, encoding='utf-8', newline='\n')
-
-
 def sanitize_component(name: str) -> str:
     for ch in INVALID_CHARS:
         name = name.replace(ch, '-')
@@ -57,29 +50,14 @@ def relpath(from_path: Path, to_path: Path) -> str:
         return os.path.relpath(str(to_path), str(from_path.parent)).replace('\\','/')
 
 
-def replace_links_in_text(text: str, link_type: str, current: str, proposal: str) -> str:
-    if 'wikilink' in (link_type or ''):
-        pattern = re.compile(r"(!?\[\[)" + re.escape(current) + r"(?=(\]|\||#))")
-        return pattern.sub(r"\1" + proposal, text)
-    else:
-        pattern = re.compile(r"(!?\[[^\]]*\]\()" + re.escape(current) + r"(\))")
-        return pattern.sub(r"\1" + proposal + r"\2", text)
-
-
-def create_md_stub(path: Path, title: str):
-    path.parent.mkdir(parents=True, exist_ok=True)
+def create_md_stub(txn, path: Path, title: str):
     today = datetime.today().strftime('%Y-%m-%d')
     content = f"---\ntitle: \"{title}\"\nstatus: draft\ncreated: {today}\nupdated: {today}\n---\n\n# {title}\n\n> Stub note (auto-generated).\n"
-    write_text_utf8(path, content)
+    txn.write_text(path, content)
 
 
-def create_placeholder(path: Path):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    try:
-        path.write_bytes(b"")
-    except Exception:
-        with open(path, 'wb') as f:
-            pass
+def create_placeholder(txn, path: Path):
+    txn.write_bytes(path, b"")
 
 
 def classify_and_propose(src_note: Path, link_type: str, current: str):
@@ -90,18 +68,18 @@ def classify_and_propose(src_note: Path, link_type: str, current: str):
         target = src_note.parent / new
         return 'note', new, target
     # pipe-separated extensions
-    if '|' in cur and re.search(r"\.(png|jpg|jpeg|gif|webp)(\||$)", cur, flags=re.IGNORECASE):
+    if '|' in cur and PIPED_IMAGE_RE.search(cur):
         new = relpath(src_note, MK / '60_attachments' / 'placeholder.png')
         target = MK / '60_attachments' / 'placeholder.png'
         return 'asset', new, target
     # explicit asset extensions
-    if re.search(r"\.(png|jpg|jpeg|gif|webp|pdf|svg|bmp)$", cur, flags=re.IGNORECASE):
+    if ASSET_EXT_RE.search(cur):
         fname = sanitize_component(Path(cur).name)
         new = relpath(src_note, MK / '60_attachments' / fname)
         target = MK / '60_attachments' / fname
         return 'asset', new, target
     # default: treat as note (may contain subfolders)
-    parts = re.split(r"[\\/]+", cur)
+    parts = PATH_SEP_RE.split(cur)
     parts = [sanitize_component(p) for p in parts if p]
     if not parts:
         parts = ['untitled']
@@ -124,54 +102,52 @@ def main():
         print(f"Audit not found: {AUDIT1} or {AUDIT2}")
         return
     rows = list(csv.DictReader(audit_path.open(encoding='utf-8')))
-    targets = [r for r in rows if r.get('status') == 'not_found']
-    plan_rows = []
-    diffs = []
+    per_file = {}
+    for r in rows:
+        if r.get('status') == 'not_found':
+            per_file.setdefault(r['file'], []).append(r)
     changed_files = 0
     creates = 0
-    for r in targets:
-        rel = r['file']
-        link_type = r.get('link_type','')
-        current = r.get('current','')
-        src = ROOT / rel
-        if not src.exists():
-            continue
-        kind, proposal, target = classify_and_propose(src, link_type, current)
-        old = read_text_best_effort(src)
-        new_text = replace_links_in_text(old, link_type, current, proposal)
-        if new_text != old:
-            changed_files += 1
-            diff = difflib.unified_diff(old.splitlines(True), new_text.splitlines(True), fromfile=f"a/{rel}", tofile=f"b/{rel}")
-            diffs.extend(list(diff))
-            if apply:
-                write_text_utf8(src, new_text)
-        # plan/create targets
-        if kind == 'note':
-            # create markdown stub if missing
-            if not target.exists():
-                plan_rows.append({'file': rel, 'action': 'create_note', 'target': str(target.relative_to(ROOT)).replace('\\','/'), 'link_replaced_to': proposal})
-                if apply:
-                    create_md_stub(target, target.stem)
-                    creates += 1
-        else:
-            # asset placeholder
-            if not target.exists():
-                plan_rows.append({'file': rel, 'action': 'create_asset', 'target': str(target.relative_to(ROOT)).replace('\\','/'), 'link_replaced_to': proposal})
+    compress = gzip_option(sys.argv)
+    with ApplyTransaction('link_normalize') as txn, \
+            PlanWriter(PLAN, ['file','action','target','link_replaced_to'], compress) as plan, DiffWriter(DIFF, compress) as diff:
+        for rel, file_rows in per_file.items():
+            src = ROOT / rel
+            if not src.exists():
+                continue
+            proposals = []
+            for r in file_rows:
+                link_type = r.get('link_type','')
+                current = r.get('current','')
+                proposals.append((current, link_type) + classify_and_propose(src, link_type, current))
+            # all of the note's links in one pass, then one diff and one write per note
+            old = txn.read_text(src)
+            new_text = LinkRewriter((current, proposal, link_type) for current, link_type, _, proposal, _ in proposals).rewrite(old)
+            if new_text != old:
+                changed_files += 1
+                diff.write(rel, old, new_text)
                 if apply:
-                    create_placeholder(target)
-                    creates += 1
-
-    with PLAN.open('w', newline='', encoding='utf-8') as fp:
-        w = csv.DictWriter(fp, fieldnames=['file','action','target','link_replaced_to'])
-        w.writeheader()
-        w.writerows(plan_rows)
-    with DIFF.open('w', encoding='utf-8', newline='\n') as fp:
-        for line in diffs:
-            fp.write(line)
-            if not line.endswith('\n'):
-                fp.write('\n')
+                    txn.write_text(src, new_text)
+            # plan/create targets
+            for current, link_type, kind, proposal, target in proposals:
+                if kind == 'note':
+                    # create markdown stub if missing
+                    if not txn.exists(target):
+                        plan.write({'file': rel, 'action': 'create_note', 'target': str(target.relative_to(ROOT)).replace('\\','/'), 'link_replaced_to': proposal})
+                        if apply:
+                            create_md_stub(txn, target, target.stem)
+                            creates += 1
+                else:
+                    # asset placeholder
+                    if not txn.exists(target):
+                        plan.write({'file': rel, 'action': 'create_asset', 'target': str(target.relative_to(ROOT)).replace('\\','/'), 'link_replaced_to': proposal})
+                        if apply:
+                            create_placeholder(txn, target)
+                            creates += 1
     mode = 'APPLIED' if apply else 'dry-run'
-    print(f"Link normalize {mode}: files_changed={changed_files}, created={creates}, plan={PLAN}, diff={DIFF}")
+    print(f"Link normalize {mode}: files_changed={changed_files}, created={creates}, plan={plan.path}, diff={diff.path}")
+    if txn.path:
+        print(f"Journal: {txn.describe()}")
 
 
 if __name__ == '__main__':
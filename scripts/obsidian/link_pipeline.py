@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Link clean-up in one process: audit -> fuzzy proposals -> auto-apply.
+
+link_audit_mk.py, link_fuzzy_proposals_mk.py and link_autoapply_from_fuzzy_mk.py
+hand their results on through CSVs, and each stage scans the vault or re-reads
+the notes again. This runner scans the vault once and passes the records in
+memory: the audit rows go straight to the fuzzy stage (whose name index is
+built from the same Notes), its FuzzyProposals to the auto-apply stage, which
+takes the note texts from the same scan. The plan, diff and rewritten notes
+are the same as running the three scripts in a row.
+
+The auto-apply plan and diff are written as before. The intermediate CSVs
+(mk_link_audit.csv, mk_link_fuzzy_proposals.csv) are only written with --csv.
+
+Usage:
+  python link_pipeline.py [--apply] [--csv] [--min-score 0.5] [--threshold 0.85] [--margin 0.10]
+                          [--gzip] [--jobs N] [--no-index] [--rehash]
+"""
+import sys
+
+from apply_journal import ApplyTransaction
+from artifacts import DiffWriter, PlanWriter, gzip_option, write_csv
+from link_audit_mk import FIELDS as AUDIT_FIELDS, OUT as AUDIT_OUT, audit_notes
+from link_autoapply_from_fuzzy_mk import DIFF, PLAN, PLAN_FIELDS, autoapply_options, plan_autoapply
+from link_fuzzy_proposals_mk import (
+    FIELDS as FUZZY_FIELDS, OUT as FUZZY_OUT, build_name_index, fuzzy_proposals, min_score_option, proposal_row,
+)
+from note_index import load_notes_indexed
+from parallel import jobs_option
+from vault_scan import MK, iter_note_paths, read_text_best_effort
+
+
+def main():
+    argv = sys.argv[1:]
+    th, margin, apply = autoapply_options(argv)
+    min_score = min_score_option(argv)
+    write_csvs = '--csv' in argv
+    compress = gzip_option(argv)
+
+    files = iter_note_paths(MK)
+    notes = list(load_notes_indexed(files, argv=argv))
+
+    findings = [r for _, rows in audit_notes(notes, files, jobs_option(argv)) for r in rows]
+    if write_csvs:
+        AUDIT_OUT.parent.mkdir(parents=True, exist_ok=True)
+        write_csv(AUDIT_OUT, AUDIT_FIELDS, findings)
+
+    proposals = fuzzy_proposals(findings, build_name_index(notes), min_score)
+    if write_csvs:
+        FUZZY_OUT.parent.mkdir(parents=True, exist_ok=True)
+        write_csv(FUZZY_OUT, FUZZY_FIELDS, [proposal_row(prop) for prop in proposals])
+
+    by_path = {note.path: note for note in notes}
+
+    def read_text(p):
+        note = by_path.get(p)
+        return note.text if note is not None else read_text_best_effort(p)
+
+    with DiffWriter(DIFF, compress) as diff, PlanWriter(PLAN, PLAN_FIELDS, compress) as plan:
+        changed, dirty = plan_autoapply(proposals, th, margin, diff, plan, apply=apply, read_text=read_text)
+    with ApplyTransaction('link_pipeline') as txn:
+        for p, new in dirty.items():
+            txn.write_text(p, new)
+
+    mode = 'APPLIED' if apply else 'dry-run'
+    suggested = sum(1 for prop in proposals if prop.suggestions)
+    print(f"Link pipeline {mode}: links={len(findings)} not_found={len(proposals)} with_suggestions={suggested} "
+          f"rewritten={changed} notes_written={len(dirty)}, diff={diff.path}, plan={plan.path}")
+    if write_csvs:
+        print(f"Artifacts: {AUDIT_OUT}, {FUZZY_OUT}")
+    if txn.path:
+        print(f"Journal: {txn.describe()}")
+
+
+if __name__ == '__main__':
+    main()
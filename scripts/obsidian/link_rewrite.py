@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Batched link rewriting: every replacement for a note in one regex pass.
+
+The apply scripts used to compile one pattern per (current, proposal) pair
+and run it over the whole note, in order:
+
+  wikilinks:  (!?\\[\\[)CURRENT(?=(\\]|\\||#))  ->  \\1PROPOSAL
+  md links:   (!?\\[[^\\]]*\\]\\()CURRENT(\\))    ->  \\1PROPOSAL\\2
+
+LinkRewriter compiles all currents of a note into one alternation instead.
+Only the link target itself is consumed (the [[ / ]( prefix is checked
+with a lookbehind), so wikilink and markdown matches never compete for the
+same text. Chains, where a later replacement's current equals an earlier
+proposal, are resolved up front, so the single pass gives the same text as
+the sequential passes did. With chain=False a link is rewritten at most
+once instead, as a batch of simultaneous moves needs (a->b, b->c sends a
+link to a to b).
+"""
+import re
+
+
+def is_wikilink(link_type) -> bool:
+    return bool(link_type) and 'wikilink' in link_type
+
+
+def _alternation(keys) -> str:
+    return '|'.join(re.escape(k) for k in sorted(keys, key=len, reverse=True))
+
+
+class LinkRewriter:
+    def __init__(self, replacements, chain: bool = True):
+        """replacements: [(current, proposal, link_type)] in the order they used to be applied."""
+        self.replacements = replacements = list(replacements)
+        self.chain = chain
+        self.wiki = {}
+        self.md = {}
+        for cur, _, link_type in replacements:
+            (self.wiki if is_wikilink(link_type) else self.md).setdefault(cur, cur)
+        for table, wiki in ((self.wiki, True), (self.md, False)):
+            for cur in table:
+                val = cur
+                for c, prop, link_type in replacements:
+                    if is_wikilink(link_type) == wiki and val == c:
+                        val = prop
+                        if not chain:
+                            break
+                table[cur] = val
+        parts = []
+        if self.wiki:
+            parts.append(r"(?<=\[\[)(?P<w>" + _alternation(self.wiki) + r")(?=[\]|#])")
+        if self.md:
+            parts.append(r"(?<=\]\()(?P<m>" + _alternation(self.md) + r")(?=\))")
+        self.pattern = re.compile('|'.join(parts)) if parts else None
+
+    def rewrite(self, text: str) -> str:
+        return self._sub(text, None)
+
+    def rewrite_rows(self, text: str):
+        """(new_text, fired): fired[i] is whether replacements[i] changed a link,
+        as it would have when the replacements were applied one after another."""
+        hits = set()
+        new = self._sub(text, hits)
+        fired = [False] * len(self.replacements)
+        for wiki, val in hits:
+            # follow each matched target through the replacements in order
+            for i, (cur, prop, link_type) in enumerate(self.replacements):
+                if is_wikilink(link_type) == wiki and val == cur:
+                    fired[i] = fired[i] or cur != prop
+                    val = prop
+                    if not self.chain:
+                        break
+        return new, fired
+
+    def _sub(self, text: str, hits):
+        if self.pattern is None:
+            return text
+
+        def repl(m):
+            if m.lastgroup == 'w':
+                cur = m.group('w')
+                if hits is not None:
+                    hits.add((True, cur))
+                return self.wiki[cur]
+            # markdown link: the "](" must close a "[" with no "]" in between
+            end = m.start() - 2
+            i = text.rfind('[', 0, end)
+            if i < 0 or text.find(']', i + 1, end) != -1:
+                return m.group(0)
+            cur = m.group('m')
+            if hits is not None:
+                hits.add((False, cur))
+            return self.md[cur]
+
+        return self.pattern.sub(repl, text)
+
+
+def rewrite_links(text: str, replacements):
+    """(changed, new_text) after applying all replacements in one pass."""
+    new = LinkRewriter(replacements).rewrite(text)
+    return new != text, new
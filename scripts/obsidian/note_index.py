@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""Persistent incremental note index (SQLite under TASKS/artifacts).
+
+Per-note parse results (YAML block, tags, H1, wikilinks, markdown links,
+inline tags, keyword scores) are cached keyed on the note's path relative to
+ROOT and invalidated by mtime+size. With --rehash a content hash is checked
+as well; a touched-but-unchanged file is then recognised by its hash and not
+re-parsed. Notes served from the index load their text only if a consumer
+asks for it.
+
+Scripts opt out with --no-index. With --jobs N, cache misses (or, with
+--no-index, all notes) are read and parsed by N worker processes.
+"""
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+
+from parallel import jobs_option, pool_map
+from vault_scan import ROOT, MK, EXCLUDE_DIRS, Note, decode_best_effort, iter_note_paths, load_notes
+
+INDEX_DB = ROOT / 'TASKS' / 'artifacts' / 'mk_note_index.sqlite'
+
+# Bump whenever a parser feeding INDEXED_FIELDS changes, so stale entries are dropped.
+PARSER_VERSION = 6
+INDEXED_FIELDS = ('yaml_block', 'tags', 'h1', 'wikilinks', 'md_links', 'inline_tags', 'keyword_scores')
+TUPLE_FIELDS = ('wikilinks', 'md_links')
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha1(data).hexdigest()
+
+
+def dump_fields(note: Note) -> str:
+    return json.dumps({k: getattr(note, k) for k in INDEXED_FIELDS}, ensure_ascii=False)
+
+
+def parse_entry(args):
+    """Worker: read, hash and parse one note -> (sha1, encoding, data).
+
+    encoding/data are None when the hash equals known_sha1; None overall when
+    the file can't be read.
+    """
+    path, root, known_sha1 = args
+    p = Path(path)
+    try:
+        data = p.read_bytes()
+    except OSError:
+        return None
+    sha1 = content_hash(data)
+    if sha1 == known_sha1:
+        return sha1, None, None
+    text, enc = decode_best_effort(data)
+    return sha1, enc, dump_fields(Note(p, text, enc, Path(root)))
+
+
+class NoteIndex:
+    def __init__(self, db_path: Path = INDEX_DB, verify_hash: bool = False):
+        self.db_path = Path(db_path)
+        self.verify_hash = verify_hash
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+        self._rows = None
+        self._pending = []
+        # rel paths re-parsed / dropped during the last scan
+        self.changed = []
+        self.removed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def _init_schema(self):
+        c = self.conn
+        c.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        c.execute(
+            "CREATE TABLE IF NOT EXISTS notes ("
+            "rel TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, sha1 TEXT, encoding TEXT, data TEXT)"
+        )
+        row = c.execute("SELECT value FROM meta WHERE key = 'parser_version'").fetchone()
+        if row is None or int(row[0]) != PARSER_VERSION:
+            c.execute("DELETE FROM notes")
+            c.execute("INSERT OR REPLACE INTO meta VALUES ('parser_version', ?)", (str(PARSER_VERSION),))
+        c.commit()
+
+    def _load_rows(self):
+        if self._rows is None:
+            self._rows = {
+                r[0]: r[1:] for r in self.conn.execute("SELECT rel, mtime_ns, size, sha1, encoding, data FROM notes")
+            }
+        return self._rows
+
+    @staticmethod
+    def _note_from_row(p: Path, root: Path, encoding, data: str, text=None) -> Note:
+        note = Note(p, text, encoding, root)
+        fields = json.loads(data)
+        for k in TUPLE_FIELDS:
+            fields[k] = [tuple(x) for x in fields[k]]
+        # Pre-populate the cached_property slots so nothing is re-parsed.
+        note.__dict__.update(fields)
+        return note
+
+    def _store(self, rel: str, st, sha1: str, encoding, data: str):
+        self._pending.append((rel, st.st_mtime_ns, st.st_size, sha1, encoding, data))
+        self._rows[rel] = (st.st_mtime_ns, st.st_size, sha1, encoding, data)
+        self.changed.append(rel)
+
+    def _touch(self, rel: str, st, row):
+        _, _, sha1, encoding, data = row
+        self._pending.append((rel, st.st_mtime_ns, st.st_size, sha1, encoding, data))
+        self._rows[rel] = (st.st_mtime_ns, st.st_size, sha1, encoding, data)
+
+    def flush(self):
+        c = self.conn
+        if self._pending:
+            c.executemany("INSERT OR REPLACE INTO notes VALUES (?, ?, ?, ?, ?, ?)", self._pending)
+            self._pending = []
+        if self.removed:
+            c.executemany("DELETE FROM notes WHERE rel = ?", [(r,) for r in self.removed])
+        c.commit()
+
+    def load_note(self, p: Path, root: Path = ROOT) -> Note:
+        """Return a Note for p, served from the index when its entry is still fresh."""
+        rows = self._load_rows()
+        rel = p.relative_to(root).as_posix()
+        st = p.stat()
+        row = rows.get(rel)
+        same_stat = bool(row) and row[0] == st.st_mtime_ns and row[1] == st.st_size
+        if same_stat and not self.verify_hash:
+            return self._note_from_row(p, root, row[3], row[4])
+        data = p.read_bytes()
+        sha1 = content_hash(data)
+        if row and row[2] == sha1:
+            if not same_stat:
+                self._touch(rel, st, row)
+            text, enc = decode_best_effort(data, row[3])
+            return self._note_from_row(p, root, enc, row[4], text)
+        text, enc = decode_best_effort(data)
+        note = Note(p, text, enc, root)
+        self._store(rel, st, sha1, enc, dump_fields(note))
+        return note
+
+    def _load_serial(self, paths, root: Path):
+        for p in paths:
+            try:
+                yield self.load_note(p, root)
+            except OSError:
+                continue
+
+    def _load_parallel(self, paths, root: Path, jobs: int):
+        rows = self._load_rows()
+        entries = []
+        work = []
+        for p in paths:
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            rel = p.relative_to(root).as_posix()
+            row = rows.get(rel)
+            same_stat = bool(row) and row[0] == st.st_mtime_ns and row[1] == st.st_size
+            fresh = same_stat and not self.verify_hash
+            entries.append((p, rel, st, row, same_stat, fresh))
+            if not fresh:
+                work.append((str(p), str(root), row[2] if row else None))
+        results = iter(pool_map(parse_entry, work, jobs))
+        for p, rel, st, row, same_stat, fresh in entries:
+            if not fresh:
+                res = next(results)
+                if res is None:
+                    continue
+                sha1, enc, data = res
+                if data is not None:
+                    self._store(rel, st, sha1, enc, data)
+                    yield self._note_from_row(p, root, enc, data)
+                    continue
+                if not same_stat:
+                    self._touch(rel, st, row)
+            yield self._note_from_row(p, root, row[3], row[4])
+
+    def load_notes(self, paths, root: Path = ROOT, jobs: int = 1):
+        """Yield indexed Notes for paths, then drop entries whose file no longer exists.
+
+        With jobs > 1 stale entries are re-parsed in worker processes; the
+        notes still come out in the order of paths.
+        """
+        self.changed = []
+        self.removed = []
+        seen = set()
+        loader = self._load_parallel(paths, root, jobs) if jobs > 1 else self._load_serial(paths, root)
+        try:
+            for note in loader:
+                seen.add(note.path.relative_to(root).as_posix())
+                yield note
+            for rel in list(self._load_rows()):
+                if rel not in seen and not (root / rel).exists():
+                    self.removed.append(rel)
+                    del self._rows[rel]
+        finally:
+            self.flush()
+
+    def scan(self, base: Path = MK, exclude=EXCLUDE_DIRS, root: Path = ROOT, jobs: int = 1):
+        return self.load_notes(iter_note_paths(base, exclude), root, jobs)
+
+
+def index_options(argv):
+    """(use_index, verify_hash) from --no-index / --rehash command-line flags."""
+    argv = list(argv or ())
+    return '--no-index' not in argv, '--rehash' in argv
+
+
+def load_notes_parallel(paths, root: Path = ROOT, jobs: int = 1):
+    """Like vault_scan.load_notes, with the notes read and parsed by `jobs` worker processes.
+
+    Nothing is cached; the note text is re-read only if a consumer asks for it.
+    """
+    paths = list(paths)
+    results = pool_map(parse_entry, [(str(p), str(root), None) for p in paths], jobs)
+    for p, res in zip(paths, results):
+        if res is not None:
+            _, enc, data = res
+            yield NoteIndex._note_from_row(p, root, enc, data)
+
+
+def load_notes_indexed(paths, root: Path = ROOT, argv=(), db_path: Path = INDEX_DB):
+    """Like vault_scan.load_notes, but backed by the note index unless --no-index is given."""
+    use_index, verify_hash = index_options(argv)
+    jobs = jobs_option(argv)
+    if not use_index:
+        yield from (load_notes_parallel(paths, root, jobs) if jobs > 1 else load_notes(paths, root))
+        return
+    with NoteIndex(db_path, verify_hash=verify_hash) as index:
+        yield from index.load_notes(paths, root, jobs)
+
+
+def scan_notes(base: Path = MK, exclude=EXCLUDE_DIRS, root: Path = ROOT, argv=(), db_path: Path = INDEX_DB):
+    """Like vault_scan.scan_vault, but backed by the note index unless --no-index is given."""
+    return load_notes_indexed(iter_note_paths(base, exclude), root, argv, db_path)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""Process-pool helpers for the per-note dry-run/audit work.
+
+`--jobs N` spreads notes over N worker processes (`--jobs 0` = one per CPU).
+Results always come back in input order, so a script writes exactly the same
+CSV whether it ran serially or in parallel. Worker functions must be defined
+at module level so they can be pickled.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def jobs_option(argv, default: int = 1) -> int:
+    """Worker count from a `--jobs N` / `--jobs=N` command-line option."""
+    args = list(argv or ())
+    value = None
+    for i, a in enumerate(args):
+        if a == '--jobs' and i + 1 < len(args):
+            value = args[i + 1]
+        elif a.startswith('--jobs='):
+            value = a.split('=', 1)[1]
+    if value is None:
+        return default
+    try:
+        n = int(value)
+    except ValueError:
+        return default
+    if n <= 0:
+        n = os.cpu_count() or 1
+    return n
+
+
+def pool_map(func, items, jobs: int = 1, chunksize: int = None):
+    """Return [func(x) for x in items], computed by `jobs` worker processes.
+
+    Items are sent to the workers in chunks (about four per worker by default)
+    and the results are merged back in input order. With jobs <= 1, or too
+    few items to be worth a pool, everything runs in-process.
+    """
+    if jobs <= 1:
+        return [func(x) for x in items]
+    items = list(items)
+    if len(items) < 2:
+        return [func(x) for x in items]
+    jobs = min(jobs, len(items))
+    if chunksize is None:
+        chunksize = max(1, len(items) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(func, items, chunksize=chunksize))
@@ -0,0 +1,65 @@
+"""Compact row records for the audit and dry-run reports.
+
+The reports used to build one dict per row: a link audit of a large vault
+holds millions of 5-key dicts, each with its own copy of the note's path
+string (`str(p.relative_to(ROOT))` was recomputed for every link). The rows
+are NamedTuples now, whose fields are the CSV columns in order: a tuple row
+has no per-row key table, and the path string is interned once per note
+(note_rel) so every row of the note shares it. `python bench.py records`
+measures the difference.
+
+artifacts.write_csv writes these rows positionally; read_records reads a
+report back into them.
+"""
+import csv
+import sys
+from pathlib import Path
+from typing import NamedTuple
+
+from vault_scan import ROOT
+
+
+def note_rel(p: Path, root: Path = ROOT) -> str:
+    """The note's path relative to root, as one shared string for all its rows."""
+    return sys.intern(str(p.relative_to(root)))
+
+
+class LinkRow(NamedTuple):
+    file: str
+    link_type: str
+    current: str
+    status: str
+    proposal: str = ''
+
+
+class RetagRow(NamedTuple):
+    file: str
+    current_yaml_tags: str
+    inline_tags: str
+    keywords_top: str
+    proposed_tags: str
+
+
+class SupplementRow(NamedTuple):
+    file: str
+    current_yaml_tags: str
+    proposed_additions: str
+    final_tags: str
+
+
+class ClassificationRow(NamedTuple):
+    file: str
+    current_folder: str
+    proposed_folder: str
+    action: str
+    confidence: str
+    reasons: str
+
+
+def read_records(fp, record):
+    """Rows of a report CSV as records; columns are matched by header name, missing ones are ''."""
+    reader = csv.reader(fp)
+    header = next(reader, None) or []
+    cols = [header.index(f) if f in header else None for f in record._fields]
+    for row in reader:
+        yield record._make(row[i] if i is not None and i < len(row) else '' for i in cols)
@@ -1,23 +1,16 @@
 #!/usr/bin/env python3
-import re
 from pathlib import Path
 import csv
 
-ROOT = Path(__file__).resolve().parents[1]
-NOTES_DIR = ROOT / 'notes'
+from frontmatter import FrontMatter, replace_tags, split_front_matter
+from lexer import lex_note
+from patterns import WHITESPACE_RE
+from vault_scan import ROOT, NOTES as NOTES_DIR, iter_note_paths, load_note
+
 REPORTS_DIR = ROOT / 'TASKS' / 'artifacts'
 REPORT_CSV = REPORTS_DIR / 'notes_tag_apply.csv'
 
 
-def read_text_best_effort(p: Path) -> str:
-    for enc in ('utf-8', 'utf-8-sig', 'cp932', 'shift_jis'):
-        try:
-            return p.read_text(encoding=enc)
-        except Exception:
-            continue
-    return p.read_text(errors='ignore')
-
-
 def write_text_utf8(p: Path, text: str):
     p.write_text(text, encoding='utf-8', newline='\n')
 
@@ -26,65 +19,15 @@ def normalize_tag(tag: str) -> str:
     t = tag.strip()
     if t.startswith('#'):
         t = t[1:]
-    t = re.sub(r"\s+", "-", t)
+    t = WHITESPACE_RE.sub("-", t)
     t = t.strip(".,;:'\"()[]{}<>")
     t = t.replace('—', '-').replace('–', '-')
     t = t.lower()
     return t
 
 
-def extract_yaml_front_matter(text: str):
-    if not text.startswith('---'):
-        return None, None
-    lines = text.splitlines()
-    if len(lines) < 3:
-        return None, None
-    end_idx = None
-    for i in range(1, min(len(lines), 200)):
-        if lines[i].strip() == '---':
-            end_idx = i
-            break
-    if end_idx is None:
-        return None, None
-    yaml_block = "\n".join(lines[1:end_idx])
-    body = "\n".join(lines[end_idx+1:])
-    return yaml_block, body
-
-
 def parse_tags_from_yaml(yaml_block: str):
-    if not yaml_block:
-        return []
-    tags = []
-    lines = yaml_block.splitlines()
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        m = re.match(r"^(tags?|keywords)\s*:\s*(.*)$", line.strip(), re.IGNORECASE)
-        if m:
-            rest = m.group(2).strip()
-            if rest == '' or rest == '|' or rest == '>':
-                j = i + 1
-                while j < len(lines):
-                    l = lines[j]
-                    if re.match(r"^\s*-\s*", l):
-                        item = re.sub(r"^\s*-\s*", "", l).strip()
-                        if item:
-                            tags.append(item)
-                        j += 1
-                        continue
-                    if re.match(r"^\s*[A-Za-z0-9_-]+\s*:\s*", l) or l.strip() == '':
-                        break
-                    j += 1
-                i = j
-                continue
-            if rest.startswith('[') and rest.endswith(']'):
-                inner = rest[1:-1]
-                parts = [p.strip() for p in inner.split(',') if p.strip()]
-                tags.extend(parts)
-            else:
-                parts = [p.strip() for p in rest.split(',') if p.strip()]
-                tags.extend(parts)
-        i += 1
+    tags = FrontMatter(yaml_block).tags()
     out = []
     seen = set()
     for t in tags:
@@ -96,10 +39,8 @@ def parse_tags_from_yaml(yaml_block: str):
 
 
 def extract_inline_tags(text: str):
-    cleaned = re.sub(r"```[\s\S]*?```", "\n", text)
-    tags = []
-    for m in re.finditer(r"#([^\s#]+)", cleaned):
-        tags.append(m.group(1))
+    # #tag outside code blocks and URLs, from the shared lexer
+    tags = lex_note(text).tags
     out = []
     seen = set()
     for t in tags:
@@ -142,46 +83,14 @@ def propose_tags(existing_yaml, inline_tags, path_tags, limit=5):
     return result
 
 
-def update_yaml_block_preserve(yaml_block: str, new_tags):
-    lines = yaml_block.splitlines() if yaml_block else []
-    out_lines = []
-    skip_mode = False
-    for i, line in enumerate(lines):
-        if not skip_mode:
-            m = re.match(r"^(\s*)(tags?|keywords)\s*:\s*(.*)$", line, re.IGNORECASE)
-            if m:
-                indent = m.group(1)
-                # write our inline tags and enable skip mode to drop following list items if any
-                out_lines.append(f"{indent}tags: [{', '.join(new_tags)}]")
-                skip_mode = True
-                continue
-            else:
-                out_lines.append(line)
-        else:
-            # skip list items under the previous tags key
-            if re.match(r"^\s*-\s*", line):
-                continue
-            # if next mapping key or blank, stop skipping and process this line normally
-            if re.match(r"^\s*[A-Za-z0-9_-]+\s*:\s*", line) or line.strip() == '':
-                skip_mode = False
-                out_lines.append(line)
-            else:
-                # conservative: stop skipping after one non-list line
-                skip_mode = False
-                out_lines.append(line)
-    if not any(re.match(r"^\s*tags\s*:\s*", l, re.IGNORECASE) for l in out_lines):
-        out_lines.append(f"tags: [{', '.join(new_tags)}]")
-    return "\n".join(out_lines)
-
-
 def apply_tags_to_text(text: str, tags):
-    yaml_block, body = extract_yaml_front_matter(text)
+    yaml_block, body = split_front_matter(text)
     if yaml_block is None:
         # create new yaml front matter
         new_yaml = f"tags: [{', '.join(tags)}]"
-        return f"---\n{new_yaml}\n---\n{body if text.startswith('---') else text}"
+        return f"---\n{new_yaml}\n---\n{text}"
     else:
-        new_yaml_block = update_yaml_block_preserve(yaml_block, tags)
+        new_yaml_block = replace_tags(yaml_block, tags)
         return f"---\n{new_yaml_block}\n---\n{body}"
 
 
@@ -190,13 +99,13 @@ def main():
         print(f"notes directory not found: {NOTES_DIR}")
         return
     REPORTS_DIR.mkdir(parents=True, exist_ok=True)
-    files = sorted(NOTES_DIR.rglob('*.md'))
+    files = iter_note_paths(NOTES_DIR, exclude=())
     rows = []
     changed = 0
     created_yaml = 0
     for f in files:
-        text = read_text_best_effort(f)
-        yaml_block, body = extract_yaml_front_matter(text)
+        text = load_note(f).text
+        yaml_block, body = split_front_matter(text)
         yaml_tags = parse_tags_from_yaml(yaml_block) if yaml_block is not None else []
         inline_tags = extract_inline_tags(text)
         path_tags = tags_from_path(f)
@@ -1,30 +1,23 @@
 #!/usr/bin/env python3
-import re
 import os
 import csv
 from pathlib import Path
 
-ROOT = Path(__file__).resolve().parents[1]
-NOTES_DIR = ROOT / 'notes'
+from frontmatter import FrontMatter, split_front_matter
+from lexer import lex_note
+from patterns import WHITESPACE_RE
+from vault_scan import ROOT, NOTES as NOTES_DIR, iter_note_paths, load_note
+
 REPORTS_DIR = ROOT / 'TASKS' / 'artifacts'
 REPORT_CSV = REPORTS_DIR / 'notes_tag_dry_run.csv'
 
 
-def read_text_best_effort(p: Path) -> str:
-    for enc in ('utf-8', 'utf-8-sig', 'cp932', 'shift_jis'):
-        try:
-            return p.read_text(encoding=enc)
-        except Exception:
-            continue
-    return p.read_text(errors='ignore')
-
-
 def normalize_tag(tag: str) -> str:
     t = tag.strip()
     if t.startswith('#'):
         t = t[1:]
     # Replace whitespace with hyphen; trim brackets/punctuations around
-    t = re.sub(r"\s+", "-", t)
+    t = WHITESPACE_RE.sub("-", t)
     t = t.strip(".,;:'\"()[]{}<>")
     t = t.replace('—', '-').replace('–', '-')
     # Obsidian supports unicode; lowercase for ascii for consistency
@@ -32,65 +25,8 @@ def normalize_tag(tag: str) -> str:
     return t
 
 
-def extract_yaml_front_matter(text: str):
-    if not text.startswith('---'):
-        return None, None
-    lines = text.splitlines()
-    if len(lines) < 3:
-        return None, None
-    # find closing '---' on its own line
-    end_idx = None
-    for i in range(1, min(len(lines), 200)):
-        if lines[i].strip() == '---':
-            end_idx = i
-            break
-    if end_idx is None:
-        return None, None
-    yaml_block = "\n".join(lines[1:end_idx])
-    body = "\n".join(lines[end_idx+1:])
-    return yaml_block, body
-
-
 def parse_tags_from_yaml(yaml_block: str):
-    if not yaml_block:
-        return []
-    tags = []
-    # simple line-based parse for tags, tag, keywords
-    lines = yaml_block.splitlines()
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        m = re.match(r"^(tags?|keywords)\s*:\s*(.*)$", line.strip(), re.IGNORECASE)
-        if m:
-            rest = m.group(2).strip()
-            if rest == '' or rest == '|' or rest == '>':
-                # block style list expected following with - item
-                j = i + 1
-                while j < len(lines):
-                    l = lines[j]
-                    if re.match(r"^\s*-\s*", l):
-                        item = re.sub(r"^\s*-\s*", "", l).strip()
-                        if item:
-                            tags.append(item)
-                        j += 1
-                        continue
-                    # stop when next key or blank line without dash encountered
-                    if re.match(r"^\s*[A-Za-z0-9_-]+\s*:\s*", l) or l.strip() == '':
-                        break
-                    j += 1
-                i = j
-                continue
-            # inline list [a, b] or comma-separated
-            if rest.startswith('[') and rest.endswith(']'):
-                inner = rest[1:-1]
-                parts = [p.strip() for p in inner.split(',') if p.strip()]
-                tags.extend(parts)
-            else:
-                # comma separated or single
-                parts = [p.strip() for p in rest.split(',') if p.strip()]
-                tags.extend(parts)
-        i += 1
-    # normalize
+    tags = FrontMatter(yaml_block).tags()
     out = []
     seen = set()
     for t in tags:
@@ -102,13 +38,8 @@ def parse_tags_from_yaml(yaml_block: str):
 
 
 def extract_inline_tags(text: str):
-    # remove code fences to reduce noise
-    cleaned = re.sub(r"```[\s\S]*?```", "\n", text)
-    # Obsidian tags: #tag
-    # Use a simple pattern: # until whitespace or another #
-    tags = []
-    for m in re.finditer(r"#([^\s#]+)", cleaned):
-        tags.append(m.group(1))
+    # #tag outside code blocks and URLs, from the shared lexer
+    tags = lex_note(text).tags
     out = []
     seen = set()
     for t in tags:
@@ -157,11 +88,11 @@ def main():
         print(f"notes directory not found: {NOTES_DIR}")
         return
     REPORTS_DIR.mkdir(parents=True, exist_ok=True)
-    files = sorted(NOTES_DIR.rglob('*.md'))
+    files = iter_note_paths(NOTES_DIR, exclude=())
     rows = []
     for f in files:
         try:
-            text = read_text_best_effort(f)
+            text = load_note(f).text
         except Exception as e:
             rows.append({
                 'file': str(f.relative_to(ROOT)),
@@ -172,7 +103,7 @@ def main():
                 'proposed_tags': ''
             })
             continue
-        yaml_block, body = extract_yaml_front_matter(text)
+        yaml_block, body = split_front_matter(text)
         yaml_tags = parse_tags_from_yaml(yaml_block) if yaml_block is not None else []
         inline_tags = extract_inline_tags(text)
         path_tags = tags_from_path(f)
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""Benchmark suite: the vault scripts end to end on synthetic vaults.
+
+For each size a vault is generated with vault_gen.py into a scratch tree
+holding a copy of scripts/obsidian (the scripts find the vault relative to
+themselves), and each script is run there as its own process, in pipeline
+order (the fuzzy stage reads the audit's CSV):
+
+  cold  the first run, with the note index removed beforehand
+  warm  the best of --repeat further runs over the warm index
+
+Throughput is notes per second of the warm run; peak RSS is the script
+process's own high-water mark (os.wait4; worker processes of --jobs are not
+counted, and it is left blank where wait4 is missing). Results go to
+TASKS/artifacts/vault_bench.json and are compared with the baseline
+(TASKS/artifacts/vault_bench_baseline.json, or --baseline): a warm time or
+peak RSS more than --tolerance above it is reported as a regression, and the
+exit status is 1. --save-baseline records this run as the new baseline
+(merged into it, so sizes or scripts not run keep their numbers).
+
+Usage:
+  python vault_bench.py [--sizes 1000,10000,100000] [--scripts audit,fuzzy,...] [--seed 0]
+                        [--repeat 1] [--tolerance 0.25] [--baseline PATH] [--save-baseline]
+                        [--keep DIR] [-- <args passed to every script, e.g. --jobs 4>]
+
+--keep DIR generates the vaults under DIR and reuses them on the next run
+(a 100k-note vault takes a while to write); otherwise they are temporary.
+Scripts: inventory, audit, fuzzy, frontmatter, retag, classify, pipeline.
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from vault_gen import generate_vault
+from vault_scan import ROOT
+
+HERE = Path(__file__).resolve().parent
+ART = ROOT / 'TASKS' / 'artifacts'
+RESULTS = ART / 'vault_bench.json'
+BASELINE = ART / 'vault_bench_baseline.json'
+SIZES = (1000, 10000, 100000)
+TOLERANCE = 0.25
+
+# run order matters: fuzzy reads the audit's CSV
+SCRIPTS = (
+    ('inventory', 'dir_inventory_mk.py'),
+    ('audit', 'link_audit_mk.py'),
+    ('fuzzy', 'link_fuzzy_proposals_mk.py'),
+    ('frontmatter', 'frontmatter_audit_mk.py'),
+    ('retag', 'retag_mk_dry_run.py'),
+    ('classify', 'classify_mk.py'),
+    ('pipeline', 'link_pipeline.py'),
+)
+
+
+def run_script(script: Path, args, cwd: Path):
+    """(seconds, peak RSS in MB or None) of one run of script."""
+    # stderr goes to a file, not a pipe: nothing reads a pipe while we wait,
+    # so a child writing more than the pipe buffer would block forever
+    with tempfile.TemporaryFile() as errf:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, str(script), *args], cwd=cwd,
+                                stdout=subprocess.DEVNULL, stderr=errf)
+        if hasattr(os, 'wait4'):
+            _, status, usage = os.wait4(proc.pid, 0)
+            seconds = time.perf_counter() - t0
+            code = os.waitstatus_to_exitcode(status)
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            rss = usage.ru_maxrss / (2**20 if sys.platform == 'darwin' else 2**10)
+            proc.returncode = code
+        else:
+            proc.wait()
+            seconds = time.perf_counter() - t0
+            code, rss = proc.returncode, None
+        if code != 0:
+            errf.seek(0)
+            err = errf.read().decode('utf-8', errors='replace')
+            raise RuntimeError(f"{script.name} exited with {code}:\n{err}")
+    return seconds, rss
+
+
+def prepare_tree(base: Path, notes: int, seed: int):
+    """base/scripts/obsidian (a copy of the scripts) next to a generated base/scripts/notes/MK."""
+    scripts = base / 'scripts'
+    marker = base / 'vault.json'
+    want = {'notes': notes, 'seed': seed}
+    if not (marker.exists() and json.loads(marker.read_text(encoding='utf-8')).get('vault') == want):
+        if base.exists():
+            shutil.rmtree(base)
+        counts = generate_vault(scripts, notes, seed)
+        marker.write_text(json.dumps({'vault': want, 'counts': counts}), encoding='utf-8')
+    shutil.rmtree(scripts / 'obsidian', ignore_errors=True)
+    shutil.rmtree(scripts / 'TASKS', ignore_errors=True)
+    shutil.copytree(HERE, scripts / 'obsidian', ignore=shutil.ignore_patterns('__pycache__', 'TASKS'))
+    return scripts
+
+
+def drop_index(scripts: Path):
+    for p in (scripts / 'TASKS' / 'artifacts').glob('mk_note_index.sqlite*'):
+        p.unlink()
+
+
+def bench_size(base: Path, notes: int, names, seed: int, repeat: int, script_args):
+    t0 = time.perf_counter()
+    scripts = prepare_tree(base, notes, seed)
+    print(f"{notes} notes (vault ready in {time.perf_counter() - t0:.1f}s)")
+    results = []
+    for name, script in SCRIPTS:
+        if name not in names:
+            continue
+        path = scripts / 'obsidian' / script
+        drop_index(scripts)
+        cold, cold_rss = run_script(path, script_args, scripts.parent)
+        runs = [run_script(path, script_args, scripts.parent) for _ in range(repeat)]
+        warm = min(s for s, _ in runs)
+        rss = max([r for r in [cold_rss] + [r for _, r in runs] if r is not None], default=None)
+        row = {
+            'script': name, 'notes': notes, 'cold_s': round(cold, 3), 'warm_s': round(warm, 3),
+            'notes_per_s': round(notes / warm, 1), 'peak_rss_mb': None if rss is None else round(rss, 1),
+        }
+        results.append(row)
+        print(f"  {name:<12} cold {cold:>8.2f}s  warm {warm:>8.2f}s  {row['notes_per_s']:>10.0f} notes/s  "
+              f"peak RSS {'-' if rss is None else f'{rss:.0f} MB':>8}")
+    return results
+
+
+def result_key(row) -> str:
+    return f"{row['script']}@{row['notes']}"
+
+
+def compare(results, baseline, tolerance: float = TOLERANCE):
+    """[(key, field, baseline value, new value)] where a result is worse than baseline by more than tolerance."""
+    worse = []
+    for row in results:
+        base = baseline.get(result_key(row))
+        if not base:
+            continue
+        for field in ('warm_s', 'peak_rss_mb'):
+            old, new = base.get(field), row.get(field)
+            if old and new is not None and new > old * (1 + tolerance):
+                worse.append((result_key(row), field, old, new))
+    return worse
+
+
+def load_json(path: Path):
+    try:
+        return json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def write_json(path: Path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(json.dumps(data, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+    os.replace(tmp, path)
+
+
+def opt(args, name, default):
+    for i, a in enumerate(args):
+        if a == name and i + 1 < len(args):
+            return args[i + 1]
+    return default
+
+
+def main():
+    argv = sys.argv[1:]
+    script_args = []
+    if '--' in argv:
+        i = argv.index('--')
+        argv, script_args = argv[:i], argv[i + 1:]
+    if '-h' in argv or '--help' in argv:
+        print(__doc__.strip())
+        return
+    sizes = [int(s) for s in opt(argv, '--sizes', ','.join(map(str, SIZES))).split(',') if s]
+    names = opt(argv, '--scripts', ','.join(name for name, _ in SCRIPTS)).split(',')
+    unknown = set(names) - {name for name, _ in SCRIPTS}
+    if unknown:
+        print(f"Unknown scripts: {', '.join(sorted(unknown))}")
+        sys.exit(2)
+    seed = int(opt(argv, '--seed', '0'))
+    repeat = max(1, int(opt(argv, '--repeat', '1')))
+    tolerance = float(opt(argv, '--tolerance', str(TOLERANCE)))
+    baseline_path = Path(opt(argv, '--baseline', str(BASELINE)))
+    keep = opt(argv, '--keep', None)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='vault_bench-') as tmp:
+        work = Path(keep) if keep else Path(tmp)
+        for n in sizes:
+            results += bench_size(work / f'vault-{n}-{seed}', n, names, seed, repeat, script_args)
+
+    meta = {'python': sys.version.split()[0], 'platform': sys.platform, 'seed': seed, 'script_args': script_args,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    write_json(RESULTS, {'meta': meta, 'results': results})
+    print(f"Results written: {RESULTS}")
+
+    baseline = load_json(baseline_path)
+    worse = compare(results, baseline.get('results', {}), tolerance)
+    for key, field, old, new in worse:
+        print(f"REGRESSION {key} {field}: {old} -> {new} (+{new / old - 1:.0%})")
+    if '--save-baseline' in argv:
+        merged = dict(baseline.get('results', {}))
+        merged.update({result_key(row): row for row in results})
+        write_json(baseline_path, {'meta': meta, 'results': merged})
+        print(f"Baseline written: {baseline_path} ({len(merged)} entries)")
+    elif baseline:
+        print(f"Compared with {baseline_path}: {len(worse)} regression(s), tolerance {tolerance:.0%}")
+    if worse:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Synthetic MK vault for benchmarking the obsidian scripts.
+
+Generates N notes shaped like the real vault: Japanese/English titles and
+prose, front matter in every variant the scripts handle (none, flow and
+block tag lists, aliases, quoted titles, CRLF, BOM, CP932, an unclosed
+fence now and then), headings, inline tags, code blocks and URLs, wikilinks
+with aliases and anchors, relative Markdown links, attachment embeds, and
+broken links both near-miss (a typo of a real note, which the fuzzy stage
+can match) and hopeless. Notes sit in the canonical folders and in nested
+subfolders a few levels deep; the excluded folders (templates, archive,
+attachments, .obsidian) get their share too. The same seed gives the same
+vault.
+
+Usage:
+  python vault_gen.py <dir> [--notes 1000] [--seed 0]
+
+<dir> is the vault root (the scripts read ROOT/notes/MK); it must not exist
+or be empty.
+"""
+import random
+import sys
+from pathlib import Path
+
+TOPS = ('00_inbox', '10_research', '20_notes', '30_projects', '40_prompts', '50_code')
+EXCLUDED = ('70_templates', '90_archive', '.obsidian')
+ATTACH_DIR = '60_attachments'
+SUBDIRS = ('dev', 'python', 'docker', 'infra', 'llm', 'web', 'db', 'メモ', '調査', 'archive', 'rust', 'tips', 'ツール')
+EN_WORDS = (
+    'python docker kubernetes obsidian api database vector search index cache async await thread process '
+    'linux network proxy nginx redis postgres sqlite query schema migration deploy release build test '
+    'pipeline prompt model embedding token context agent tool plugin config review design pattern '
+    'refactor benchmark profile memory latency throughput queue worker batch stream parser lexer regex '
+    'rust golang typescript react node server client http tls auth session cookie storage backup'
+).split()
+JA_WORDS = (
+    'メモ 設計 調査 ガイド まとめ 実装 検証 議事録 手順 比較 要約 プロンプト 日記 データベース 検索 '
+    '研究 ネットワーク モデル 学習 評価 性能 改善 運用 障害 対応 設定 構成 移行 自動化 備忘録 '
+    '概要 詳細 課題 方針 読書 記録 整理 分析 テスト 導入'
+).split()
+TAGS = ('python', 'docker', 'llm', 'prompt', 'research', 'infra', 'db', 'web', 'rust', 'memo', 'ai', 'ops',
+        'tool', 'design', 'review', '設計', '調査', 'メモ')
+SECTIONS = ('Summary', 'Overview', 'Details', 'TL;DR', 'Task', 'Goals', 'Links', 'Notes', 'Input', 'Output',
+            '概要', '手順', 'まとめ', '参考')
+URLS = ('https://github.com/{w}/{w2}', 'https://docs.python.org/3/library/{w}.html', 'http://example.com/{w}',
+        'https://qiita.com/{w}/items/{w2}', 'https://zenn.dev/{w}/articles/{w2}')
+ATTACH_EXTS = ('.png', '.png', '.jpg', '.pdf', '.svg')
+
+
+def make_title(rng):
+    shape = rng.random()
+    if shape < 0.35:
+        return f"{rng.choice(EN_WORDS).capitalize()} {rng.choice(JA_WORDS)}{rng.choice(JA_WORDS)}"
+    if shape < 0.6:
+        return f"{rng.choice(JA_WORDS)}{rng.choice(JA_WORDS)} {rng.choice(EN_WORDS)}"
+    if shape < 0.85:
+        return ' '.join(rng.choice(EN_WORDS) for _ in range(rng.randint(2, 4))).title()
+    return '-'.join(rng.choice(EN_WORDS) for _ in range(rng.randint(2, 3)))
+
+
+def make_folder(rng):
+    top = rng.choice(TOPS)
+    depth = rng.choices((0, 1, 2, 3, 4), (40, 30, 18, 8, 4))[0]
+    return '/'.join([top] + [rng.choice(SUBDIRS) for _ in range(depth)])
+
+
+def typo(rng, name):
+    """A near miss of name, the kind of dead link the fuzzy stage recovers."""
+    if len(name) < 4:
+        return name + 'x'
+    i = rng.randrange(1, len(name) - 1)
+    op = rng.random()
+    if op < 0.4:
+        return name[:i] + name[i + 1:]
+    if op < 0.7:
+        return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+    return name[:i] + rng.choice('aeiouーの') + name[i:]
+
+
+def front_matter(rng, title):
+    kind = rng.random()
+    if kind < 0.15:
+        return []
+    lines = ['---']
+    lines.append(f'title: "{title}"' if rng.random() < 0.6 else f'title: {title}')
+    tags = rng.sample(TAGS, rng.randint(0, 6))
+    style = rng.random()
+    if tags and style < 0.4:
+        lines.append('tags: [' + ', '.join(tags) + ']')
+    elif tags and style < 0.8:
+        lines.append('tags:')
+        lines.extend(f'  - {t}' for t in tags)
+    elif tags:
+        lines.append('tags: ' + ' '.join(tags))
+    if rng.random() < 0.5:
+        lines.append(rng.choice(('status: draft', 'status: active', 'status: done')))
+    if rng.random() < 0.4:
+        lines.append(f'created: 2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}')
+        lines.append(f'updated: 2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}')
+    if rng.random() < 0.2:
+        lines.append(f'aliases: [{rng.choice(EN_WORDS)} {rng.choice(JA_WORDS)}]')
+    if rng.random() < 0.1:
+        lines.append(f'project: {rng.choice(EN_WORDS)}')
+    if rng.random() < 0.1:
+        lines.append(f'source: {URLS[0].format(w=rng.choice(EN_WORDS), w2=rng.choice(EN_WORDS))}')
+    if rng.random() > 0.01:  # now and then a fence is never closed
+        lines.append('---')
+    return lines
+
+
+def prose(rng, k):
+    out = []
+    for _ in range(k):
+        out.append(rng.choice(JA_WORDS) + rng.choice(('は', 'を', 'の', 'で', 'と')) if rng.random() < 0.4
+                   else rng.choice(EN_WORDS))
+    return ' '.join(out) + rng.choice(('。', '.', ''))
+
+
+def body(rng, title, notes, attachments):
+    """Body lines: (lines, links, broken links)."""
+    lines = [f'# {title}', prose(rng, rng.randint(8, 30))]
+    links = broken = 0
+    for _ in range(rng.randint(2, 12)):
+        k = rng.random()
+        if k < 0.15:
+            lines.append(f'## {rng.choice(SECTIONS)}')
+        elif k < 0.35:
+            _, name = rng.choice(notes)
+            form = rng.random()
+            if form < 0.5:
+                lines.append(f'{prose(rng, 3)} [[{name}]] {prose(rng, 2)}')
+            elif form < 0.75:
+                lines.append(f'[[{name}|{rng.choice(JA_WORDS)}]] を参照')
+            else:
+                lines.append(f'see [[{name}#{rng.choice(SECTIONS)}]]')
+            links += 1
+        elif k < 0.45:
+            folder, name = rng.choice(notes)
+            lines.append(f'[{rng.choice(EN_WORDS)}](../{folder}/{name.replace(" ", "%20")}.md)')
+            links += 1
+        elif k < 0.53:
+            _, name = rng.choice(notes)
+            lines.append(f'TODO: [[{typo(rng, name)}]]')
+            links += 1
+            broken += 1
+        elif k < 0.58:
+            lines.append(f'[[{rng.choice(EN_WORDS)} {rng.choice(JA_WORDS)} {rng.randint(0, 99)}]] '
+                         f'[{rng.choice(EN_WORDS)}](missing/{rng.choice(EN_WORDS)}.md#{rng.choice(SECTIONS)})')
+            links += 2
+            broken += 2
+        elif k < 0.66 and attachments:
+            att = rng.choice(attachments)
+            lines.append(f'![[{att}]]' if rng.random() < 0.7 else f'![{att}](../{ATTACH_DIR}/{att})')
+            links += 1
+        elif k < 0.72:
+            u = rng.choice(URLS).format(w=rng.choice(EN_WORDS), w2=rng.choice(EN_WORDS))
+            lines.append(f'{u} {prose(rng, 3)}')
+        elif k < 0.78:
+            lang = rng.choice(('python', 'bash', 'sql', ''))
+            lines += [f'```{lang}', f'# not a tag: {rng.choice(EN_WORDS)}', f'import {rng.choice(EN_WORDS)}', '```']
+        elif k < 0.85:
+            lines.append(f'{prose(rng, 5)} #{rng.choice(TAGS)} #{rng.choice(EN_WORDS)}')
+        else:
+            lines.append(prose(rng, rng.randint(5, 40)))
+    return lines, links, broken
+
+
+def encode(rng, text):
+    r = rng.random()
+    if r < 0.05:
+        text = text.replace('\n', '\r\n')
+    if r > 0.95:
+        return text.encode('cp932', errors='replace')
+    if 0.9 < r <= 0.95:
+        return text.encode('utf-8-sig')
+    return text.encode('utf-8')
+
+
+def generate_vault(root: Path, notes: int = 1000, seed: int = 0):
+    """Write a synthetic vault under root/notes/MK; returns counts of what was written."""
+    rng = random.Random(seed)
+    mk = Path(root) / 'notes' / 'MK'
+    attachments = [f"{rng.choice(EN_WORDS)}_{i}{rng.choice(ATTACH_EXTS)}" for i in range(max(1, notes // 20))]
+    for att in attachments:
+        p = mk / ATTACH_DIR / att
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(b'\x89PNG\r\n' + bytes(rng.randrange(256) for _ in range(rng.randint(16, 256))))
+    names = []
+    seen = set()
+    for i in range(notes):
+        folder = make_folder(rng) if rng.random() > 0.03 else rng.choice(EXCLUDED)
+        title = make_title(rng)
+        # a few names repeat in other folders (ambiguous links); the rest are unique
+        if (folder, title) in seen or rng.random() > 0.02:
+            title = f"{title} {i}"
+        seen.add((folder, title))
+        names.append((folder, title))
+    made = set()
+    counts = {'notes': notes, 'attachments': len(attachments), 'folders': 0, 'links': 0, 'broken_links': 0}
+    for folder, title in names:
+        d = mk / folder
+        if d not in made:
+            d.mkdir(parents=True, exist_ok=True)
+            made.add(d)
+        lines, links, broken = body(rng, title, names, attachments)
+        text = '\n'.join(front_matter(rng, title) + lines) + '\n'
+        (d / f'{title}.md').write_bytes(encode(rng, text))
+        counts['links'] += links
+        counts['broken_links'] += broken
+    counts['folders'] = len(made)
+    return counts
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0].startswith('-'):
+        print(__doc__.strip())
+        sys.exit(2)
+    root = Path(args[0])
+    notes, seed = 1000, 0
+    for i, a in enumerate(args):
+        if a == '--notes' and i + 1 < len(args):
+            notes = int(args[i + 1])
+        elif a == '--seed' and i + 1 < len(args):
+            seed = int(args[i + 1])
+    if root.exists() and any(root.iterdir()):
+        print(f"Not empty: {root}")
+        sys.exit(1)
+    counts = generate_vault(root, notes, seed)
+    print(f"Vault written: {root / 'notes' / 'MK'} " + ' '.join(f"{k}={v}" for k, v in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""Single-pass vault scanner shared by the scripts/obsidian tools.
+
+Walks the vault once (os.scandir, pruning excluded folders instead of
+filtering an rglob afterwards), decodes each note once and hands every tool
+a stream of Note records. Parsed fields are computed lazily on first access,
+so a tool only pays for what it reads.
+"""
+import codecs
+import os
+from functools import cached_property
+from pathlib import Path
+
+import keywords as kw
+from frontmatter import FENCE, MAX_LINES, FrontMatter, split_front_matter
+from lexer import NoteLex, lex_note
+from patterns import HEADING_PREFIX_RE, MDLINK_RE, WIKILINK_RE
+
+ROOT = Path(__file__).resolve().parents[1]
+NOTES = ROOT / 'notes'
+MK = NOTES / 'MK'
+
+# Folders skipped by the audit/apply tools (matched per path segment, case-insensitive).
+EXCLUDE_DIRS = ('70_templates', '60_attachments', '90_archive', '.obsidian')
+
+# Tried in order when there is no BOM; a UTF-8 BOM is sniffed rather than tried.
+ENCODINGS = ('utf-8', 'cp932', 'shift_jis')
+BOMS = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+# NoteHead reads this much at a time.
+HEAD_CHUNK = 64 * 1024
+
+
+def sniff_bom(data: bytes):
+    """Encoding named by a leading byte-order mark, or None."""
+    if data[:1] in (b'\xef', b'\xff', b'\xfe'):
+        for bom, enc in BOMS:
+            if data.startswith(bom):
+                return enc
+    return None
+
+
+def decode_best_effort(data: bytes, hint=None):
+    """Decode note bytes, returning (text, encoding).
+
+    The bytes are decoded without re-reading the file: hint first (an
+    encoding recorded for the same bytes before; the note index keeps one
+    per file), then a BOM if there is one, then UTF-8, which a Shift-JIS
+    note normally fails at its first lead byte, then CP932/Shift-JIS.
+    Newlines are normalised the way Path.read_text() does, so callers see
+    the same text as before.
+    """
+    text = None
+    if hint:
+        try:
+            text, enc = data.decode(hint), hint
+        except (UnicodeDecodeError, LookupError):
+            pass
+    if text is None:
+        enc = sniff_bom(data)
+        encs = (enc,) if enc else ENCODINGS
+        for enc in encs:
+            try:
+                text = data.decode(enc)
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            text, enc = data.decode('utf-8', errors='ignore'), 'utf-8'
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text, enc
+
+
+def read_text_best_effort(p: Path) -> str:
+    return decode_best_effort(p.read_bytes())[0]
+
+
+class NoteHead:
+    """The start of a note, read in bounded chunks only as far as a caller looks.
+
+    For tools that need the front matter and the first heading but not the
+    body (a pasted log can run to megabytes). Lines are decoded on demand
+    with an incremental decoder and match read_text_best_effort().splitlines()
+    for the part that was read. The encoding is decided on the first chunk
+    (hint, BOM, UTF-8, CP932, Shift-JIS); bytes after it that don't decode
+    are dropped rather than re-decoding the whole file.
+    """
+
+    def __init__(self, path: Path, encoding=None, root: Path = ROOT, chunk_size: int = HEAD_CHUNK):
+        self.path = path
+        self.encoding = encoding
+        self.root = root
+        self.chunk_size = chunk_size
+        self.lines = []
+        self.bytes_read = 0
+        self._hint = encoding
+        self._fp = None
+        self._decoder = None
+        self._tentative = False
+        self._pending = ''
+        self._eof = False
+
+    def __repr__(self):
+        return f"NoteHead({str(self.path)!r})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def _open_decoder(self, data: bytes, final: bool, tried=()) -> str:
+        candidates = [self._hint] if self._hint else []
+        bom = sniff_bom(data)
+        candidates.extend((bom,) if bom else ENCODINGS)
+        for enc in candidates:
+            if enc in tried:
+                continue
+            try:
+                decoder = codecs.getincrementaldecoder(enc)()
+                text = decoder.decode(data, final)
+            except (UnicodeError, LookupError):
+                continue
+            break
+        else:
+            enc = 'utf-8'
+            decoder = codecs.getincrementaldecoder(enc)(errors='ignore')
+            text = decoder.decode(data, final)
+        # UTF-8 over pure ASCII is only a guess until non-ASCII bytes show up;
+        # ASCII reads the same in CP932, so switching later loses nothing.
+        self._tentative = enc == 'utf-8' and enc != self._hint and data.isascii() and not final
+        if not self._tentative:
+            decoder.errors = 'ignore'
+        self.encoding = enc
+        self._decoder = decoder
+        return text
+
+    def _decode(self, data: bytes, final: bool) -> str:
+        if self._decoder is None:
+            return self._open_decoder(data, final)
+        if not self._tentative:
+            return self._decoder.decode(data, final)
+        try:
+            text = self._decoder.decode(data, final)
+        except UnicodeError:
+            return self._open_decoder(data, final, tried=('utf-8',))
+        if not data.isascii() or final:
+            self._tentative = False
+            self._decoder.errors = 'ignore'
+        return text
+
+    def _read_more(self) -> bool:
+        """Decode the next chunk into self.lines; False once the file is exhausted."""
+        if self._eof:
+            return False
+        if self._fp is None:
+            self._fp = self.path.open('rb')
+        size = self.chunk_size if self.bytes_read else max(self.chunk_size, 4)  # room for a BOM
+        data = self._fp.read(size)
+        self.bytes_read += len(data)
+        final = len(data) < size
+        pending = self._pending + self._decode(data, final)
+        if not final and pending.endswith('\r'):
+            # may be the first half of a \r\n split across chunks
+            pending, hold = pending[:-1], '\r'
+        else:
+            hold = ''
+        if '\r' in pending:
+            pending = pending.replace('\r\n', '\n').replace('\r', '\n')
+        cut = len(pending) if final else pending.rfind('\n') + 1
+        self.lines.extend(pending[:cut].splitlines())
+        self._pending = pending[cut:] + hold
+        if final:
+            self._eof = True
+            self.close()
+        return True
+
+    def iter_lines(self, start: int = 0):
+        i = start
+        while True:
+            while i >= len(self.lines):
+                if not self._read_more():
+                    return
+            yield self.lines[i]
+            i += 1
+
+    @cached_property
+    def _front_matter(self):
+        """(yaml_block, index of the first body line), as split_front_matter() on the full text."""
+        lines = []
+        for line in self.iter_lines():
+            lines.append(line)
+            if len(lines) > 1 and line.strip() == FENCE:
+                break
+            if len(lines) >= MAX_LINES or not lines[0].startswith(FENCE):
+                return None, 0
+        if len(lines) > 1 and lines[-1].strip() == FENCE:
+            return "\n".join(lines[1:-1]), len(lines)
+        return None, 0
+
+    @cached_property
+    def rel(self) -> Path:
+        return self.path.relative_to(self.root)
+
+    @property
+    def yaml_block(self):
+        return self._front_matter[0]
+
+    @cached_property
+    def front_matter(self) -> FrontMatter:
+        return FrontMatter(self.yaml_block)
+
+    def body_lines(self):
+        return self.iter_lines(self._front_matter[1])
+
+    @cached_property
+    def h1(self) -> str:
+        """First non-empty heading of the body, as Note.h1."""
+        for line in self.body_lines():
+            s = line.strip()
+            if s.startswith('#'):
+                s = HEADING_PREFIX_RE.sub('', s)
+                if s:
+                    return s
+        return ''
+
+
+def is_md_name(name: str) -> bool:
+    return os.path.normcase(name).endswith('.md')
+
+
+def iter_note_paths(base: Path = MK, exclude=EXCLUDE_DIRS):
+    """Return every .md file under base in sorted order, pruning excluded folders."""
+    skip = {e.lower() for e in exclude}
+    out = []
+    stack = [str(base)]
+    while stack:
+        d = stack.pop()
+        try:
+            it = os.scandir(d)
+        except OSError:
+            continue
+        with it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        if e.name.lower() not in skip:
+                            stack.append(e.path)
+                    elif is_md_name(e.name) and e.is_file():
+                        out.append(Path(e.path))
+                except OSError:
+                    continue
+    out.sort()
+    return out
+
+
+class Note:
+    """A vault note with lazily parsed front matter, headings, links and tags.
+
+    The text itself is loaded on first access when the note was created from
+    a cached index entry, so consumers that only need parsed fields never
+    touch the file.
+    """
+
+    def __init__(self, path: Path, text=None, encoding=None, root: Path = ROOT):
+        self.path = path
+        self._text = text
+        self.encoding = encoding
+        self.root = root
+
+    def __repr__(self):
+        return f"Note({str(self.path)!r})"
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text, self.encoding = decode_best_effort(self.path.read_bytes(), self.encoding)
+        return self._text
+
+    @cached_property
+    def rel(self) -> Path:
+        return self.path.relative_to(self.root)
+
+    @cached_property
+    def _front_matter(self):
+        return split_front_matter(self.text)
+
+    @cached_property
+    def yaml_block(self):
+        return self._front_matter[0]
+
+    @property
+    def body(self) -> str:
+        return self._front_matter[1]
+
+    @cached_property
+    def headings(self):
+        out = []
+        for line in self.text.splitlines():
+            s = line.strip()
+            if s.startswith('#'):
+                out.append(HEADING_PREFIX_RE.sub('', s))
+        return out
+
+    @cached_property
+    def h1(self) -> str:
+        """First non-empty heading of the body (front matter excluded)."""
+        for line in self.body.splitlines():
+            s = line.strip()
+            if s.startswith('#'):
+                s = HEADING_PREFIX_RE.sub('', s)
+                if s:
+                    return s
+        return ''
+
+    @cached_property
+    def wikilinks(self):
+        """[(link_type, inner)] for [[...]] and ![[...]]; inner keeps any |alias or #anchor."""
+        text = self.text
+        out = []
+        for m in WIKILINK_RE.finditer(text):
+            typ = 'embed-wikilink' if text[m.start():m.start()+3] == '![[' else 'wikilink'
+            out.append((typ, m.group(1)))
+        return out
+
+    @cached_property
+    def md_links(self):
+        """[(link_type, url)] for [text](url) and ![alt](url)."""
+        text = self.text
+        out = []
+        for m in MDLINK_RE.finditer(text):
+            typ = 'embed-md' if text[m.start()] == '!' else 'md'
+            out.append((typ, m.group(1)))
+        return out
+
+    @cached_property
+    def front_matter(self) -> FrontMatter:
+        return FrontMatter(self.yaml_block)
+
+    @cached_property
+    def tags(self):
+        """Raw tag strings from the tags/tag/keywords keys of the front matter."""
+        return self.front_matter.tags()
+
+    @cached_property
+    def lex(self) -> NoteLex:
+        """Code blocks, URLs, headings, inline tags and word tokens, from one walk over the text."""
+        return lex_note(self.text)
+
+    @cached_property
+    def inline_tags(self):
+        return kw.inline_tags_of(self.lex)
+
+    @cached_property
+    def keyword_scores(self):
+        return kw.keyword_scores_of(self.lex)
+
+    @cached_property
+    def keywords(self):
+        return kw.rank_keywords(self.keyword_scores)
+
+
+def load_note(p: Path, root: Path = ROOT) -> Note:
+    text, enc = decode_best_effort(p.read_bytes())
+    return Note(p, text, enc, root)
+
+
+def load_notes(paths, root: Path = ROOT):
+    """Yield a Note for each path, skipping files that vanished or can't be read."""
+    for p in paths:
+        try:
+            yield load_note(p, root)
+        except OSError:
+            continue
+
+
+def scan_vault(base: Path = MK, exclude=EXCLUDE_DIRS, root: Path = ROOT):
+    """Walk base once and yield a Note per .md file, in sorted path order."""
+    return load_notes(iter_note_paths(base, exclude), root)
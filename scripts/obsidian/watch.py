@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""`--watch` mode for the audit scripts: re-run on file changes under the vault.
+
+A watcher reports which files changed; bursts (an Obsidian sync dropping
+hundreds of files, an editor's save-rename dance) are debounced into one
+batch, and the script's refresh(touched) re-analyses just those notes before
+rewriting its CSV. On Linux the watcher uses inotify (through ctypes, no
+extra packages); elsewhere, or with --poll, it stats the files every second.
+
+Options: --watch, --poll, --debounce SECONDS (quiet time that ends a batch,
+default 1.0). A batch is cut after MAX_BATCH_WAIT seconds even if files keep
+changing. refresh() gets None instead of a set when the watcher lost track
+(inotify queue overflow) and everything has to be re-read.
+"""
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+
+from vault_scan import MK, EXCLUDE_DIRS, iter_note_paths
+
+DEBOUNCE = 1.0
+MAX_BATCH_WAIT = 30.0
+POLL_INTERVAL = 1.0
+
+# <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0o2000000)
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT = struct.Struct('iIII')  # wd, mask, cookie, len; then len bytes of NUL-padded name
+
+
+def watch_option(argv) -> bool:
+    return '--watch' in (argv or ())
+
+
+def debounce_option(argv, default: float = DEBOUNCE) -> float:
+    args = list(argv or ())
+    for i, a in enumerate(args):
+        if a == '--debounce' and i + 1 < len(args):
+            try:
+                return max(0.0, float(args[i + 1]))
+            except ValueError:
+                return default
+    return default
+
+
+def iter_dirs(base: Path, exclude=EXCLUDE_DIRS):
+    """base and every folder under it, pruning excluded folders like iter_note_paths."""
+    skip = {e.lower() for e in exclude}
+    stack = [str(base)]
+    while stack:
+        d = stack.pop()
+        yield d
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    try:
+                        if e.is_dir(follow_symlinks=False) and e.name.lower() not in skip:
+                            stack.append(e.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+
+class InotifyWatcher:
+    """Recursive inotify watch over base (excluded folders are not watched)."""
+
+    kind = 'inotify'
+
+    def __init__(self, base: Path = MK, exclude=EXCLUDE_DIRS):
+        self.base = Path(base)
+        self.skip = {e.lower() for e in exclude}
+        self.exclude = exclude
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, 'inotify is not available')
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e))
+        self.dirs = {}  # wd -> folder path
+        self._watch_tree(self.base)
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def _watch_tree(self, top):
+        for d in iter_dirs(top, self.exclude):
+            wd = self._add(self.fd, os.fsencode(d), WATCH_MASK | IN_ONLYDIR)
+            if wd >= 0:
+                self.dirs[wd] = d
+            elif ctypes.get_errno() == errno.ENOSPC:
+                raise OSError(errno.ENOSPC, 'inotify watch limit reached (fs.inotify.max_user_watches)')
+
+    def _unwatch_tree(self, top):
+        prefix = top + os.sep
+        for wd, d in list(self.dirs.items()):
+            if d == top or d.startswith(prefix):
+                self._rm(self.fd, wd)
+                del self.dirs[wd]
+
+    def read(self, timeout=None):
+        """Paths changed since the last read, waiting up to timeout seconds (None: until something changes).
+
+        Returns None when the kernel queue overflowed and changes were lost.
+        """
+        touched = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return touched
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return touched
+            # after an overflow the queue is still drained; the caller re-reads everything anyway
+            if self._parse(data, touched):
+                touched = None
+
+    def _parse(self, data: bytes, touched) -> bool:
+        overflow = False
+        pos = 0
+        while pos < len(data):
+            wd, mask, _cookie, size = EVENT.unpack_from(data, pos)
+            pos += EVENT.size
+            name = data[pos:pos + size].rstrip(b'\0')
+            pos += size
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            d = self.dirs.get(wd)
+            if d is None or not name:
+                continue
+            path = os.path.join(d, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if os.fsdecode(name).lower() in self.skip:
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # files may have landed before the watch was added
+                    self._watch_tree(path)
+                    if touched is not None:
+                        touched.update(iter_note_paths(Path(path), self.exclude))
+                elif mask & IN_MOVED_FROM:
+                    self._unwatch_tree(path)
+                continue
+            if touched is not None:
+                touched.add(Path(path))
+        return overflow
+
+
+class PollingWatcher:
+    """Fallback watcher: compares (mtime, size) of every file every `interval` seconds."""
+
+    kind = 'polling'
+
+    def __init__(self, base: Path = MK, exclude=EXCLUDE_DIRS, interval: float = POLL_INTERVAL):
+        self.base = Path(base)
+        self.exclude = exclude
+        self.interval = interval
+        self.state = self._snapshot()
+
+    def close(self):
+        pass
+
+    def _snapshot(self):
+        state = {}
+        for d in iter_dirs(self.base, self.exclude):
+            try:
+                with os.scandir(d) as it:
+                    for e in it:
+                        try:
+                            if e.is_file(follow_symlinks=False):
+                                st = e.stat(follow_symlinks=False)
+                                state[Path(e.path)] = (st.st_mtime_ns, st.st_size)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return state
+
+    def read(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.interval if deadline is None else min(self.interval, max(0.0, deadline - time.monotonic()))
+            time.sleep(wait)
+            state = self._snapshot()
+            old = self.state
+            self.state = state
+            touched = {p for p, sig in state.items() if old.get(p) != sig}
+            touched.update(p for p in old if p not in state)
+            if touched or (deadline is not None and time.monotonic() >= deadline):
+                return touched
+
+
+def open_watcher(base: Path = MK, exclude=EXCLUDE_DIRS, poll: bool = False):
+    """inotify where available (Linux), else polling."""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(base, exclude)
+        except OSError as e:
+            print(f"inotify unavailable ({e}); polling instead", file=sys.stderr)
+    return PollingWatcher(base, exclude)
+
+
+def batches(watcher, debounce: float = DEBOUNCE, max_wait: float = MAX_BATCH_WAIT):
+    """Yield debounced change sets (None: re-read everything) from watcher, forever."""
+    while True:
+        touched = watcher.read(None)
+        if touched is not None and not touched:
+            continue
+        deadline = time.monotonic() + max_wait
+        while True:
+            remaining = min(debounce, deadline - time.monotonic())
+            if remaining <= 0:
+                break
+            more = watcher.read(remaining)
+            if more is None:
+                touched = None
+            elif not more:
+                break
+            elif touched is not None:
+                touched |= more
+        yield touched
+
+
+def stale_notes(known, touched, base: Path = MK, exclude=EXCLUDE_DIRS):
+    """Re-list the vault after a batch -> (files, stale, removed).
+
+    files is the sorted note list, stale the notes to re-analyse (touched
+    notes that still exist, new notes; all of them when touched is None),
+    removed the known notes that are gone.
+    """
+    files = iter_note_paths(base, exclude)
+    current = set(files)
+    removed = {p for p in known if p not in current}
+    if touched is None:
+        stale = current
+    else:
+        stale = {p for p in touched if p in current}
+        stale.update(p for p in files if p not in known)
+    return files, stale, removed
+
+
+def watch(refresh, argv, base: Path = MK, exclude=EXCLUDE_DIRS):
+    """Call refresh(None) once, then refresh(touched) per debounced batch when --watch is given.
+
+    The watcher is started before the first run so nothing edited during it
+    is missed. Stops on Ctrl-C.
+    """
+    if not watch_option(argv):
+        refresh(None)
+        return
+    watcher = open_watcher(base, exclude, poll='--poll' in argv)
+    try:
+        refresh(None)
+        print(f"Watching {base} ({watcher.kind}); Ctrl-C to stop")
+        for touched in batches(watcher, debounce_option(argv)):
+            refresh(touched)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
@@ -1,26 +1,21 @@
 #!/usr/bin/env python3
 import re
+import sys
 import unicodedata
 from pathlib import Path
 import csv
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'obsidian'))
+from vault_scan import NoteHead  # noqa: E402 (shared reader in scripts/obsidian)
+
 ROOT = Path(__file__).resolve().parents[1]
 NOTES_DIR = ROOT / 'notes'
 REPORTS_DIR = ROOT / 'reports'
 REPORT_CSV = REPORTS_DIR / 'notes_rename_proposals.csv'
 
 
-def read_text_best_effort(p: Path) -> str:
-    for enc in ('utf-8', 'utf-8-sig', 'cp932', 'shift_jis'):
-        try:
-            return p.read_text(encoding=enc)
-        except Exception:
-            continue
-    return p.read_text(errors='ignore')
-
-
-def first_heading(text: str):
-    for line in text.splitlines():
+def first_heading(lines):
+    for line in lines:
         if line.strip().startswith('#'):
             # get content after leading #'s
             title = re.sub(r"^#+\s*", "", line.strip())
@@ -53,8 +48,9 @@ def main():
     rows = []
     for f in files:
         rel = f.relative_to(ROOT)
-        text = read_text_best_effort(f)
-        title = first_heading(text)
+        # only read as far as the first heading
+        with NoteHead(f) as head:
+            title = first_heading(head.iter_lines())
         base = f.stem
         reason_parts = []
         # prefer H1 title if present; else stem
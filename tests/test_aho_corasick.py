@@ -0,0 +1,45 @@
+import os
+import random
+import sys
+import unittest
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+aho_corasick = load_obsidian_module("aho_corasick")
+
+
+class TestAhoCorasick(unittest.TestCase):
+    def test_examples(self):
+        ac = aho_corasick.AhoCorasick(["he", "she", "his", "hers", "notes/MK/"])
+        self.assertEqual(ac.matches("ushers"), {0, 1, 3})
+        self.assertEqual(ac.matches("see notes/MK/10_research"), {4})
+        self.assertEqual(ac.matches("notes/MK"), set())
+        self.assertEqual(ac.matches(""), set())
+
+    def test_overlapping_and_nested_patterns(self):
+        ac = aho_corasick.AhoCorasick(["notes/", "notes/MK/", "MK/", "notes\\MK\\"])
+        self.assertEqual(ac.matches("x notes/MK/y"), {0, 1, 2})
+        self.assertEqual(ac.matches("notes\\MK\\a"), {3})
+
+    def test_empty_pattern_rejected(self):
+        with self.assertRaises(ValueError):
+            aho_corasick.AhoCorasick(["a", ""])
+
+    def test_matches_substring_search(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            pats = ["".join(rng.choice("ab/") for _ in range(rng.randint(1, 5))) for _ in range(rng.randint(1, 6))]
+            text = "".join(rng.choice("ab/c") for _ in range(rng.randint(0, 30)))
+            ac = aho_corasick.AhoCorasick(pats)
+            self.assertEqual(ac.matches(text), {i for i, p in enumerate(pats) if p in text}, (pats, text))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+apply_journal = load_obsidian_module("apply_journal")
+
+
+class TestApplyJournal(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.journals = self.root / "journal"
+        self.a = self.write("notes/a.md", "a\r\nold\n")
+        self.b = self.write("notes/b.md", "b old\n")
+        self.c = self.write("notes/c.md", "c old\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, rel, text):
+        p = self.root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(text.encode("utf-8"))
+        return p
+
+    def txn(self, batch=64):
+        return apply_journal.ApplyTransaction("test", self.journals, batch=batch, root=self.root)
+
+    def crash(self, txn):
+        """Abandon txn the way a killed process would: no commit, no rollback."""
+        txn._blob.flush()
+        txn._log.flush()
+        txn._log.close()
+        txn._blob.close()
+
+    def leftovers(self):
+        return [p.name for p in self.root.rglob("*.tmp")]
+
+    def test_commit_writes_atomically_and_journals(self):
+        new = self.root / "notes" / "sub" / "new.md"
+        with self.txn(batch=2) as txn:
+            txn.write_text(self.a, "a new\n")
+            self.assertEqual(txn.read_text(self.a), "a new\n")
+            self.assertEqual(self.a.read_text(encoding="utf-8"), "a\nold\n")  # staged only
+            txn.write_text(new, "created\n")
+            self.assertEqual(txn.written, 2)  # batch full: renamed into place
+            self.assertTrue(txn.exists(new))
+        self.assertEqual(self.a.read_bytes(), b"a new\n")
+        self.assertEqual(new.read_text(encoding="utf-8"), "created\n")
+        self.assertEqual(self.leftovers(), [])
+        header, records, final = apply_journal.read_journal(txn.path)
+        self.assertEqual(header["name"], "test")
+        self.assertEqual([r["rel"] for r in records], ["notes/a.md", "notes/sub/new.md"])
+        self.assertEqual(apply_journal.journal_status(final), "committed")
+
+    def test_dry_run_creates_no_journal(self):
+        with self.txn() as txn:
+            self.assertFalse(txn.exists(self.root / "notes" / "x.md"))
+        self.assertIsNone(txn.path)
+        self.assertFalse(self.journals.exists())
+
+    def test_rollback_restores_pre_images(self):
+        new = self.root / "notes" / "sub" / "deeper" / "new.md"
+        with self.txn(batch=1) as txn:
+            txn.write_text(self.a, "a 1\n")
+            txn.write_text(self.a, "a 2\n")
+            txn.write_text(new, "created\n")
+        restored, conflicts = apply_journal.rollback_journal(txn.path)
+        self.assertEqual((restored, conflicts), (["notes/sub/deeper/new.md", "notes/a.md"], []))
+        self.assertEqual(self.a.read_bytes(), b"a\r\nold\n")
+        self.assertFalse((self.root / "notes" / "sub").exists())
+        self.assertEqual(apply_journal.journal_status(apply_journal.read_journal(txn.path)[2]), "rolled back")
+
+    def test_rollback_leaves_later_edits_alone_unless_forced(self):
+        with self.txn() as txn:
+            txn.write_text(self.a, "a new\n")
+            txn.write_text(self.b, "b new\n")
+        self.b.write_text("edited by hand\n", encoding="utf-8")
+        restored, conflicts = apply_journal.rollback_journal(txn.path)
+        self.assertEqual((restored, conflicts), (["notes/a.md"], ["notes/b.md"]))
+        self.assertEqual(self.b.read_text(encoding="utf-8"), "edited by hand\n")
+        apply_journal.rollback_journal(txn.path, force=True)
+        self.assertEqual(self.b.read_text(encoding="utf-8"), "b old\n")
+
+    def test_exception_rolls_back(self):
+        with self.assertRaises(RuntimeError):
+            with self.txn(batch=1) as txn:
+                txn.write_text(self.a, "a new\n")
+                txn.write_text(self.b, "b new\n")
+                raise RuntimeError("boom")
+        self.assertEqual(self.a.read_bytes(), b"a\r\nold\n")
+        self.assertEqual(self.b.read_bytes(), b"b old\n")
+        self.assertEqual(self.leftovers(), [])
+
+    def test_resume_after_crash(self):
+        txn = self.txn(batch=2)
+        txn.write_text(self.a, "a new\n")
+        txn.write_text(self.b, "b new\n")  # batch 1: renamed
+        txn.write_text(self.c, "c 1\n")
+        txn.write_text(self.c, "c 2\n")    # batch 2: staged only
+        self.crash(txn)
+        self.assertEqual(self.c.read_bytes(), b"c old\n")
+        applied, skipped = apply_journal.resume_journal(txn.path)
+        self.assertEqual((applied, skipped), (["notes/c.md"], []))
+        self.assertEqual(self.c.read_bytes(), b"c 2\n")
+        self.assertEqual(self.leftovers(), [])
+        self.assertEqual(apply_journal.journal_status(apply_journal.read_journal(txn.path)[2]), "committed")
+
+    def test_rollback_after_crash(self):
+        txn = self.txn(batch=1)
+        txn.write_text(self.a, "a new\n")
+        txn.batch = 10
+        txn.write_text(self.b, "b new\n")  # staged only
+        self.crash(txn)
+        restored, _ = apply_journal.rollback_journal(txn.path)
+        self.assertEqual(restored, ["notes/a.md"])
+        self.assertEqual((self.a.read_bytes(), self.b.read_bytes()), (b"a\r\nold\n", b"b old\n"))
+        self.assertEqual(self.leftovers(), [])
+
+    def test_write_text_keeps_the_given_encoding(self):
+        with self.txn() as txn:
+            txn.write_text(self.a, "メモ\n", "cp932")
+            self.assertEqual(txn.read_text(self.a), "メモ\n")
+            txn.write_text(self.b, "絵文字 \U0001f600\n", "cp932")  # not in cp932
+        self.assertEqual(self.a.read_bytes(), "メモ\n".encode("cp932"))
+        self.assertEqual(self.b.read_bytes(), "絵文字 \U0001f600\n".encode("utf-8"))
+
+    def test_rename_then_write_rolls_back(self):
+        moved = self.root / "notes" / "new" / "dir" / "a.md"
+        with self.txn() as txn:
+            txn.write_text(self.b, "b new\n")
+            txn.rename(self.a, moved)
+            self.assertEqual(txn.written, 1)  # staged writes go in before the move
+            txn.write_text(moved, "a moved\n")
+            with self.assertRaises(FileExistsError):
+                txn.rename(self.c, moved)
+        self.assertEqual((self.a.exists(), moved.read_bytes(), txn.moved), (False, b"a moved\n", 1))
+        restored, conflicts = apply_journal.rollback_journal(txn.path)
+        self.assertEqual((restored, conflicts), (["notes/new/dir/a.md", "notes/a.md", "notes/b.md"], []))
+        self.assertEqual((self.a.read_bytes(), self.b.read_bytes()), (b"a\r\nold\n", b"b old\n"))
+        self.assertFalse((self.root / "notes" / "new").exists())
+
+    def test_rollback_leaves_a_moved_note_changed_since(self):
+        moved = self.root / "notes" / "a2.md"
+        with self.txn() as txn:
+            txn.rename(self.a, moved)
+        moved.write_text("edited by hand\n", encoding="utf-8")
+        self.assertEqual(apply_journal.rollback_journal(txn.path), ([], ["notes/a2.md"]))
+        self.assertEqual(apply_journal.rollback_journal(txn.path, force=True), (["notes/a.md"], []))
+        self.assertEqual(self.a.read_text(encoding="utf-8"), "edited by hand\n")
+
+    def test_resume_redoes_an_interrupted_move(self):
+        moved = self.root / "notes" / "sub" / "a.md"
+        txn = self.txn()
+        txn.rename(self.a, moved)
+        os.rename(moved, self.a)  # as if the crash came between journal and rename
+        self.crash(txn)
+        self.assertEqual(apply_journal.resume_journal(txn.path), (["notes/sub/a.md"], []))
+        self.assertEqual((self.a.exists(), moved.read_bytes()), (False, b"a\r\nold\n"))
+
+    def test_resume_skips_notes_changed_since(self):
+        txn = self.txn()
+        txn.write_text(self.a, "a new\n")
+        self.crash(txn)
+        self.a.write_text("edited by hand\n", encoding="utf-8")
+        self.assertEqual(apply_journal.resume_journal(txn.path), ([], ["notes/a.md"]))
+        self.assertEqual(self.a.read_text(encoding="utf-8"), "edited by hand\n")
+        self.assertEqual(self.leftovers(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
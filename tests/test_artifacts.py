@@ -0,0 +1,70 @@
+import csv
+import gzip
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+artifacts = load_obsidian_module("artifacts")
+
+
+class TestArtifacts(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, compress):
+        with artifacts.PlanWriter(self.dir / "plan.csv", ["file", "note"], compress) as plan, \
+                artifacts.DiffWriter(self.dir / "out.diff", compress) as diff:
+            plan.write({"file": "notes/a.md", "note": "x, y"})
+            diff.write("notes/a.md", "one\ntwo", "one\n2")
+            plan.write({"file": "notes/b.md", "note": ""})
+            diff.write("notes/b.md", "", "new\n")
+        self.assertEqual(plan.rows, 2)
+        self.assertEqual(diff.files, 2)
+        return plan.path, diff.path
+
+    def test_plain(self):
+        plan_path, diff_path = self.write(False)
+        self.assertEqual(plan_path, self.dir / "plan.csv")
+        with plan_path.open(encoding="utf-8", newline="") as fp:
+            rows = list(csv.DictReader(fp))
+        self.assertEqual(rows, [{"file": "notes/a.md", "note": "x, y"}, {"file": "notes/b.md", "note": ""}])
+        diff = diff_path.read_text(encoding="utf-8")
+        self.assertEqual(
+            diff,
+            "--- a/notes/a.md\n+++ b/notes/a.md\n@@ -1,2 +1,2 @@\n one\n-two\n+2\n"
+            "--- a/notes/b.md\n+++ b/notes/b.md\n@@ -0,0 +1 @@\n+new\n",
+        )
+
+    def test_gzip_matches_plain(self):
+        plan_path, diff_path = self.write(False)
+        plain = (plan_path.read_bytes(), diff_path.read_bytes())
+        gz_plan, gz_diff = self.write(True)
+        self.assertEqual(gz_plan.name, "plan.csv.gz")
+        self.assertEqual(gz_diff.name, "out.diff.gz")
+        self.assertEqual((gzip.decompress(gz_plan.read_bytes()), gzip.decompress(gz_diff.read_bytes())), plain)
+
+    def test_write_csv_replaces_atomically(self):
+        out = self.dir / "out.csv"
+        out.write_text("stale\n", encoding="utf-8")
+        artifacts.write_csv(out, ["file", "n"], [{"file": "a", "n": 1}])
+        self.assertEqual(out.read_bytes(), b"file,n\r\na,1\r\n")
+        self.assertEqual(sorted(p.name for p in self.dir.iterdir()), ["out.csv"])
+
+
+if __name__ == "__main__":
+    unittest.main()
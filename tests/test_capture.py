@@ -0,0 +1,132 @@
+import os
+import sys
+import importlib.util
+import unittest
+from unittest import mock
+
+from PIL import Image, ImageDraw
+
+
+def load_capture_module():
+    here = os.path.dirname(os.path.abspath(__file__))
+    repo_root = os.path.abspath(os.path.join(here, os.pardir))
+    path = os.path.join(repo_root, "apps", "ff14-submarines", "capture.py")
+    spec = importlib.util.spec_from_file_location("ff14_submarines.capture", path)
+    mod = importlib.util.module_from_spec(spec)
+    assert spec and spec.loader
+    sys.modules[spec.name] = mod  # type: ignore[index]
+    spec.loader.exec_module(mod)  # type: ignore
+    return mod
+
+
+capture = load_capture_module()
+
+
+class FakeShot:
+    def __init__(self, size, bgra):
+        self.size = size
+        self.bgra = bgra
+
+
+class FakeMSS:
+    """Stands in for mss.mss(): counts connections, replays BGRA frames."""
+
+    opened = 0
+
+    def __init__(self):
+        FakeMSS.opened += 1
+        self.closed = False
+        self.monitors = [{"left": 0, "top": 0, "width": 2, "height": 1}]
+        self.grabs = []
+
+    def grab(self, monitor):
+        if monitor.get("fail"):
+            raise OSError("display gone")
+        self.grabs.append(monitor)
+        w, h = monitor["width"], monitor["height"]
+        return FakeShot((w, h), bytes([1, 2, 3, 255]) * (w * h))
+
+    def close(self):
+        self.closed = True
+
+
+class TestCaptureSession(unittest.TestCase):
+    def setUp(self):
+        FakeMSS.opened = 0
+        patcher = mock.patch.object(capture.mss, "mss", FakeMSS)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_session_reuses_connection_and_frame(self):
+        region = capture.CaptureRegion(left=0, top=0, width=2, height=1)
+        with capture.CaptureSession() as session:
+            a = capture.capture_region(region, session)
+            self.assertEqual(a.mode, "RGB")
+            self.assertEqual(list(a.getdata()), [(3, 2, 1), (3, 2, 1)])
+            b = capture.capture_region(region, session)
+            self.assertIs(a, b)
+            c = session.grab(capture.CaptureRegion(left=0, top=0, width=1, height=3))
+            self.assertEqual(c.size, (1, 3))
+            self.assertEqual(session.grab_monitor(0).size, (2, 1))
+            sct = session._sct
+        self.assertEqual(FakeMSS.opened, 1)
+        self.assertTrue(sct.closed)
+        self.assertIsNone(session._sct)
+
+    def test_failed_grab_reconnects(self):
+        session = capture.CaptureSession()
+        with self.assertRaises(OSError):
+            session._grab({"fail": True})
+        self.assertIsNone(session._sct)
+        session.grab(capture.CaptureRegion(left=0, top=0, width=1, height=1))
+        self.assertEqual(FakeMSS.opened, 2)
+        session.close()
+
+    def test_capture_region_without_session(self):
+        img = capture.capture_region(capture.CaptureRegion(left=0, top=0, width=2, height=2))
+        self.assertEqual(img.size, (2, 2))
+        self.assertEqual(img.getpixel((1, 1)), (3, 2, 1))
+        self.assertEqual(FakeMSS.opened, 1)
+
+
+def panel(text, size=(400, 120), noise=0):
+    img = Image.new("RGB", size, (20, 30, 60))
+    d = ImageDraw.Draw(img)
+    d.text((12, 40), text, fill=(235, 235, 235))
+    if noise:
+        img.putpixel((5, 5), (20 + noise, 30, 60))
+    return img
+
+
+class TestFrameGate(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.gate = capture.FrameGate(max_skip_sec=600, clock=lambda: self.now)
+
+    def test_identical_and_noisy_frames_are_skipped(self):
+        self.assertTrue(self.gate.changed(panel("Sub-1 [Rank89] 1h 49m")))
+        self.assertFalse(self.gate.changed(panel("Sub-1 [Rank89] 1h 49m")))
+        self.assertFalse(self.gate.changed(panel("Sub-1 [Rank89] 1h 49m", noise=60)))
+
+    def test_changed_digit_passes(self):
+        self.gate.changed(panel("Sub-1 [Rank89] 1h 49m"))
+        self.assertTrue(self.gate.changed(panel("Sub-1 [Rank89] 1h 48m")))
+        self.assertFalse(self.gate.changed(panel("Sub-1 [Rank89] 1h 48m")))
+
+    def test_size_change_timeout_and_reset(self):
+        self.gate.changed(panel("x"))
+        self.assertTrue(self.gate.changed(panel("x", size=(300, 120))))
+        self.now = 599.0
+        self.assertFalse(self.gate.changed(panel("x", size=(300, 120))))
+        self.now = 600.0
+        self.assertTrue(self.gate.changed(panel("x", size=(300, 120))))
+        self.gate.reset()
+        self.assertTrue(self.gate.changed(panel("x", size=(300, 120))))
+
+    def test_tiny_region(self):
+        self.assertTrue(self.gate.changed(Image.new("RGB", (3, 2))))
+        self.assertFalse(self.gate.changed(Image.new("RGB", (3, 2))))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import os
+import sys
+import unittest
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+frontmatter = load_obsidian_module("frontmatter")
+
+YAML = """title: "Quoted title"
+Status: draft
+created: 2024-01-02
+tags:
+  - alpha
+  - 'beta'
+
+  - gamma
+aliases: [One, "Two"]
+source: a, b
+meta:
+  updated: 2024-03-04
+keywords: x, y
+title: second"""
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_split(self):
+        self.assertEqual(frontmatter.split_front_matter("---\na: 1\n---\n# H\nbody"), ("a: 1", "# H\nbody"))
+        self.assertEqual(frontmatter.split_front_matter("# H\n"), (None, "# H\n"))
+        self.assertEqual(frontmatter.split_front_matter("---\na: 1\nno close"), (None, "---\na: 1\nno close"))
+
+    def test_scalars(self):
+        fm = frontmatter.FrontMatter(YAML)
+        self.assertEqual(fm.scalar("title"), "Quoted title")  # first occurrence wins
+        self.assertEqual(fm.scalar("status"), "draft")  # keys are case-insensitive
+        self.assertEqual(fm.scalar("updated"), "2024-03-04")  # nested keys are found too
+        self.assertEqual(fm.scalar("tags"), "")
+        self.assertEqual(fm.scalar("missing"), "")
+        self.assertIn("Created", fm)
+
+    def test_lists(self):
+        fm = frontmatter.FrontMatter(YAML)
+        self.assertEqual(fm.list("tags"), ["alpha", "beta", "gamma"])
+        self.assertEqual(fm.list("aliases"), ["One", "Two"])
+        self.assertEqual(fm.list("source"), ["a", "b"])
+        self.assertEqual(fm.list("missing"), [])
+        self.assertEqual(fm.tags(), ["alpha", "beta", "gamma", "x", "y"])
+
+    def test_block_list_ends_at_next_line_that_is_not_an_item(self):
+        fm = frontmatter.FrontMatter("tags:\n- a\nnot an item\n- b\nstatus: x")
+        self.assertEqual(fm.list("tags"), ["a"])
+        self.assertEqual(fm.scalar("status"), "x")
+
+    def test_empty(self):
+        for block in (None, ""):
+            fm = frontmatter.FrontMatter(block)
+            self.assertEqual(fm.tags(), [])
+            self.assertEqual(fm.scalar("title"), "")
+
+    def test_replace_tags(self):
+        block = "title: T\ntags:\n  - a\n  - b\nstatus: draft\nkeywords: c"
+        self.assertEqual(frontmatter.replace_tags(block, ["x", "y"]), "title: T\ntags: [x, y]\nstatus: draft")
+        self.assertEqual(frontmatter.replace_tags("title: T", ["x"]), "title: T\ntags: [x]")
+        self.assertEqual(frontmatter.replace_tags(block, [], drop_empty=True), "title: T\nstatus: draft")
+        self.assertEqual(frontmatter.replace_tags("title: T", [], drop_empty=True), "title: T")
+
+
+if __name__ == "__main__":
+    unittest.main()
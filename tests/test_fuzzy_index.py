@@ -0,0 +1,52 @@
+import os
+import random
+import sys
+import unittest
+from difflib import SequenceMatcher
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+fuzzy_index = load_obsidian_module("fuzzy_index")
+
+
+def brute_force(names, q, min_score):
+    out = []
+    for name in dict.fromkeys(names):
+        score = SequenceMatcher(None, q, name).ratio()
+        if score >= min_score:
+            out.append((score, name))
+    return sorted(out)
+
+
+class TestFuzzyIndex(unittest.TestCase):
+    def test_lcs_length(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            a = "".join(rng.choice("ab c") for _ in range(rng.randint(0, 10)))
+            b = "".join(rng.choice("ab c") for _ in range(rng.randint(0, 10)))
+            dp = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+            for i, x in enumerate(a):
+                for j, y in enumerate(b):
+                    dp[i + 1][j + 1] = dp[i][j] + 1 if x == y else max(dp[i][j + 1], dp[i + 1][j])
+            self.assertEqual(fuzzy_index.lcs_length(a, fuzzy_index.char_masks(b), len(b)), dp[-1][-1])
+
+    def test_search_matches_full_scan(self):
+        rng = random.Random(1)
+        alphabet = "abcdeopst -メモ設計"
+        names = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 14))) for _ in range(300)]
+        index = fuzzy_index.FuzzyNameIndex(names)
+        for min_score in (0.0, 0.3, 0.5, 0.8, 1.0):
+            for _ in range(40):
+                q = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+                self.assertEqual(sorted(index.search(q, min_score)), brute_force(names, q, min_score), (q, min_score))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sys
+import unittest
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+keywords = load_obsidian_module("keywords")
+keyword_engine = load_obsidian_module("keyword_engine")
+
+
+class TestKeywordScores(unittest.TestCase):
+    def test_counts_and_heading_bonus(self):
+        scores = keywords.keyword_scores("# Docker setup\nDocker docker compose\nthe notes\n")
+        self.assertEqual(scores["docker"], 3 + 2)
+        self.assertEqual(scores["setup"], 1 + 2)
+        self.assertEqual(scores["compose"], 1)
+        self.assertNotIn("the", scores)
+        self.assertNotIn("notes", scores)
+
+    def test_heading_bonus_needs_a_whole_token(self):
+        scores = keywords.keyword_scores("# Blog\nlog entry\n")
+        self.assertEqual(scores["log"], 1)
+        self.assertEqual(scores["blog"], 3)
+
+    def test_japanese_heading(self):
+        scores = keywords.keyword_scores("# プロンプト設計\nプロンプト\n")
+        self.assertEqual(scores["プロンプト"], 2 + 2)
+        self.assertEqual(scores["プロンプト設計"], 1 + 2)
+
+
+class TestKeywordEngine(unittest.TestCase):
+    def test_rare_terms_rank_first(self):
+        engine = keyword_engine.KeywordEngine()
+        docs = [
+            {"python": 3.0, "asyncio": 1.0},
+            {"python": 2.0, "django": 1.0},
+            {"python": 1.0, "rust": 1.0},
+        ]
+        for i, scores in enumerate(docs):
+            self.assertEqual(engine.add(scores), i)
+        self.assertEqual(len(engine), 3)
+        self.assertEqual(engine.df[engine.ids["python"]], 3)
+        # python is in every note, so one mention of a rarer term outranks it
+        self.assertEqual(engine.keywords(2), ["rust", "python"])
+        self.assertEqual(engine.keywords(0)[0], "python")  # tf still counts
+        weights = engine.weights(1)
+        self.assertAlmostEqual(weights["python"], 2.0)
+        self.assertGreater(weights["django"], 1.0)
+
+    def test_single_note_keeps_tf_order(self):
+        scores = {"b": 2.0, "a": 2.0, "c": 5.0}
+        engine = keyword_engine.KeywordEngine()
+        engine.add(scores)
+        self.assertEqual(engine.keywords(0), keywords.rank_keywords(scores))
+
+    def test_idf_follows_new_documents(self):
+        engine = keyword_engine.KeywordEngine()
+        engine.add({"x": 1.0})
+        before = engine.idf[0]
+        engine.add({"y": 1.0})
+        self.assertGreater(engine.idf[0], before)
+        self.assertIs(engine.terms[engine.ids["y"]], sys.intern("y"))
+
+
+if __name__ == "__main__":
+    unittest.main()
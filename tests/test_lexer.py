@@ -0,0 +1,62 @@
+import os
+import sys
+import unittest
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+lexer = load_obsidian_module("lexer")
+
+NOTE = """# Docker setup https://docs.docker.com/get #infra
+Run compose #dev-ops see https://github.com/a/b#readme
+```bash
+# not a heading #nottag
+curl https://api.example.org/v1
+```
+  ## 設計メモ
+#log entry with カタカナ
+"""
+
+
+class TestLexer(unittest.TestCase):
+    def test_features(self):
+        lx = lexer.lex_note(NOTE)
+        self.assertEqual(lx.headings, ["Docker setup   #infra", "設計メモ", "log entry with カタカナ"])
+        self.assertEqual(lx.tags, ["infra", "dev-ops", "log"])
+        self.assertEqual(lx.urls, ["https://docs.docker.com/get", "https://github.com/a/b#readme"])
+        self.assertEqual(lx.hosts, ["docs.docker.com", "github.com", "api.example.org"])
+        self.assertEqual(len(lx.code_spans), 1)
+        start, end = lx.code_spans[0]
+        self.assertTrue(NOTE[start:end].startswith("```bash") and NOTE[start:end].endswith("```"))
+        self.assertEqual(lx.en_tokens, ["Docker", "setup", "infra", "Run", "compose", "dev-ops", "see", "log", "entry", "with"])
+        self.assertEqual(lx.kata_tokens, ["メモ", "カタカナ"])
+        self.assertEqual(lx.ja_tokens, ["設計メモ", "カタカナ"])
+
+    def test_unclosed_fence_is_text(self):
+        lx = lexer.lex_note("intro ```\n# Heading #tag\n")
+        self.assertEqual(lx.code_spans, [])
+        self.assertEqual(lx.headings, ["Heading #tag"])
+        self.assertEqual(lx.tags, ["tag"])
+
+    def test_url_scheme_in_any_case(self):
+        text = "see Https://Example.com/x and hTTp://foo.org/y\n# Docs HTTPS://Docs.Python.org/3\n"
+        lx = lexer.lex_note(text)
+        self.assertEqual(lx.urls, ["Https://Example.com/x", "hTTp://foo.org/y", "HTTPS://Docs.Python.org/3"])
+        self.assertEqual(lx.hosts, ["Example.com", "foo.org", "Docs.Python.org"])
+        self.assertEqual(lx.en_tokens, ["see", "and", "Docs"])
+
+    def test_fence_ends_a_heading_line(self):
+        lx = lexer.lex_note("# Title ```x``` tail\n")
+        self.assertEqual(lx.headings, ["Title"])
+        self.assertEqual(lx.code_spans, [(8, 15)])
+        self.assertEqual(lx.en_tokens, ["Title", "tail"])
+
+
+if __name__ == "__main__":
+    unittest.main()
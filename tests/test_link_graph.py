@@ -0,0 +1,100 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+link_graph = load_obsidian_module("link_graph")
+note_index = load_obsidian_module("note_index")
+
+
+class TestLinkGraph(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.mk = self.root / "notes" / "MK"
+        self.db = self.root / "index.sqlite"
+        self.write("10_research/target.md", "# Target\n[up](../20_notes/a.md)\n")
+        self.write("20_notes/a.md", "[[Target|alias]] and [t](../10_research/target.md#sec) https://x.io\n")
+        self.write("20_notes/b.md", "[[../10_research/target]] ![[pic.png]] [web](https://example.com)\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, rel, text):
+        p = self.mk / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(text, encoding="utf-8")
+        return p
+
+    def sync(self):
+        with note_index.NoteIndex(self.db) as index:
+            for _ in index.scan(self.mk, root=self.root):
+                pass
+        with link_graph.LinkGraph(self.db) as graph:
+            return graph.sync()
+
+    def graph(self):
+        return link_graph.LinkGraph(self.db)
+
+    def test_backlinks_by_path_and_name(self):
+        updated, _ = self.sync()
+        self.assertEqual(len(updated), 3)
+        with self.graph() as g:
+            self.assertEqual(g.backlinks("notes/MK/10_research/target.md"), [
+                ("notes/MK/20_notes/a.md", "md", "../10_research/target.md#sec"),
+                ("notes/MK/20_notes/a.md", "wikilink", "Target|alias"),
+                ("notes/MK/20_notes/b.md", "wikilink", "../10_research/target"),
+            ])
+            self.assertEqual(g.backlinks("notes/MK/pic.png"), [("notes/MK/20_notes/b.md", "embed-wikilink", "pic.png")])
+            self.assertEqual(g.outlinks("notes/MK/20_notes/b.md")[0],
+                             ("wikilink", "../10_research/target", "notes/MK/10_research/target.md", None))
+
+    def test_incremental_update_and_removal(self):
+        self.sync()
+        self.write("20_notes/a.md", "no links any more, longer text\n")
+        (self.mk / "20_notes" / "b.md").unlink()
+        updated, removed = self.sync()
+        self.assertEqual((updated, removed), (["notes/MK/20_notes/a.md"], ["notes/MK/20_notes/b.md"]))
+        with self.graph() as g:
+            self.assertEqual(g.backlinks("notes/MK/10_research/target.md"), [])
+        self.assertEqual(self.sync(), ([], []))
+
+    def test_move_impact(self):
+        self.sync()
+        with self.graph() as g:
+            rel = "notes/MK/10_research/target.md"
+            moved = g.move_impact(rel, "notes/MK/30_projects/target.md")
+            self.assertEqual([(src, reason) for src, _, _, reason in moved], [
+                ("notes/MK/20_notes/a.md", "path"),
+                ("notes/MK/20_notes/b.md", "path"),
+                (rel, "outgoing"),
+            ])
+            renamed = g.move_impact(rel, "notes/MK/10_research/renamed.md")
+            self.assertIn(("notes/MK/20_notes/a.md", "wikilink", "Target|alias", "name"), renamed)
+            self.assertNotIn("outgoing", [r[3] for r in renamed])
+
+    def test_referrers_include_links_by_stem(self):
+        self.write("30_projects/c.md", "[old](../99_gone/target.png) [[other/TargetAx]] [[pic]]\n")
+        self.sync()
+        with self.graph() as g:
+            self.assertEqual(g.referrers("notes/MK/40_new/Target.md"),
+                             ["notes/MK/20_notes/a.md", "notes/MK/20_notes/b.md", "notes/MK/30_projects/c.md"])
+            self.assertEqual(g.referrers("notes/MK/pic.png"), ["notes/MK/20_notes/b.md"])
+            self.assertEqual(g.referrers("notes/MK/pic.md"), ["notes/MK/20_notes/b.md", "notes/MK/30_projects/c.md"])
+            # '_' is literal, not a LIKE wildcard
+            self.assertEqual(g.referrers("notes/MK/target_x.md"), [])
+            self.assertEqual(g.referrers("notes/MK/x/targetax.md"), ["notes/MK/30_projects/c.md"])
+
+
+if __name__ == "__main__":
+    unittest.main()
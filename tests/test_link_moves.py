@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+link_moves = load_obsidian_module("link_moves")
+link_graph = load_obsidian_module("link_graph")
+
+
+class TestLinkMoves(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.graph = link_graph.LinkGraph(Path(self._tmp.name) / "index.sqlite")
+
+    def tearDown(self):
+        self.graph.close()
+        self._tmp.cleanup()
+
+    def test_relink_keeps_anchor_alias_and_extension_style(self):
+        self.assertEqual(link_moves.relink("md", "../a/x%20y.md#sec", "../b/x y.md"), "../b/x%20y.md#sec")
+        self.assertEqual(link_moves.relink("wikilink", "../a/x#h|alias", "../b/x.md"), "../b/x#h|alias")
+        self.assertEqual(link_moves.relink("embed-wikilink", "img/p.png", "p.png"), "./p.png")
+
+    def test_plan_rewrites_links_into_and_out_of_moved_notes(self):
+        g = self.graph
+        g.set_links("MK/in/a.md", [("md", "../ref/b.md"), ("wikilink", "b")])
+        g.set_links("MK/ref/b.md", [("md", "../in/a.md#top"), ("embed-md", "pic.png")])
+        g.set_links("MK/other/c.md", [("wikilink", "../ref/b|B"), ("md", "https://x.io")])
+        plan = link_moves.plan_link_rewrites(g, {"MK/ref/b.md": "MK/notes/b.md"})
+        # b's link to ../in/a.md still resolves from the sibling folder; name-only [[b]] follows the move
+        self.assertEqual(plan, {
+            "MK/in/a.md": {("md", "../ref/b.md"): "../notes/b.md"},
+            "MK/ref/b.md": {("embed-md", "pic.png"): "../ref/pic.png"},
+            "MK/other/c.md": {("wikilink", "../ref/b|B"): "../notes/b|B"},
+        })
+
+    def test_both_ends_moving(self):
+        g = self.graph
+        g.set_links("MK/x/a.md", [("md", "../y/b.md")])
+        plan = link_moves.plan_link_rewrites(g, {"MK/x/a.md": "MK/z/a.md", "MK/y/b.md": "MK/z/b.md"})
+        self.assertEqual(plan, {"MK/x/a.md": {("md", "../y/b.md"): "b.md"}})
+
+    def test_rewrites_do_not_cascade(self):
+        text = "[1](a.md) [2](b.md) ![[a]] [[./a|A]]"
+        rewriter = link_moves.link_rewriter({
+            ("md", "a.md"): "b.md", ("md", "b.md"): "c.md", ("wikilink", "./a|A"): "../x/a|A",
+        })
+        self.assertEqual(rewriter.rewrite(text), "[1](b.md) [2](c.md) ![[a]] [[../x/a|A]]")
+        self.assertEqual(link_moves.link_token("md", "a.md"), "](a.md)")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+fuzzy = load_obsidian_module("link_fuzzy_proposals_mk")
+autoapply = load_obsidian_module("link_autoapply_from_fuzzy_mk")
+LinkRow = load_obsidian_module("records").LinkRow
+
+
+class Collect:
+    """Stands in for PlanWriter/DiffWriter."""
+
+    def __init__(self):
+        self.rows = []
+
+    def write(self, *args):
+        self.rows.append(args)
+
+
+class TestLinkPipelineStages(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.vault = Path(self._tmp.name)
+        self.src = self.write("20_notes/src.md", "see [[Alpha Nte]] and [[Beta]] and [[Gamma Nte|g]]\n")
+        self.alpha = self.write("10_research/Alpha Note.md", "# Alpha\n")
+        self.gamma = self.write("20_notes/Gamma Note.md", "# Gamma\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, rel, text):
+        p = self.vault / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(text, encoding="utf-8")
+        return p
+
+    def findings(self):
+        # 'file' is absolute here; the scripts' ROOT / file keeps it as is
+        return [
+            LinkRow(str(self.src), "wikilink", "Alpha Nte", "not_found"),
+            LinkRow(str(self.src), "wikilink", "Beta", "ok"),
+            LinkRow(str(self.src), "wikilink", "Nothing Like It", "not_found"),
+        ]
+
+    def test_fuzzy_proposals_round_trip_through_csv(self):
+        props = fuzzy.fuzzy_proposals(self.findings(), {"alpha note": [self.alpha]}, 0.5)
+        self.assertEqual([p.current for p in props], ["Alpha Nte", "Nothing Like It"])
+        self.assertEqual(props[0].suggestions, (fuzzy.Suggestion("../10_research/Alpha Note.md", "Alpha Note", 0.95),))
+        self.assertEqual(props[1].suggestions, ())
+        rows = [fuzzy.proposal_row(p) for p in props]
+        self.assertEqual(rows[0]["suggestions"], "../10_research/Alpha Note.md|Alpha Note|0.95")
+        self.assertEqual(autoapply.proposals_from_csv(rows), props)
+
+    def test_pick_suggestion(self):
+        S = fuzzy.Suggestion
+        self.assertEqual(autoapply.pick_suggestion((S("a", "a", 0.9), S("b", "b", 0.86)), 0.85, 0.1), None)
+        self.assertEqual(autoapply.pick_suggestion((S("b", "b", 0.7), S("a", "a", 0.9)), 0.85, 0.1), S("a", "a", 0.9))
+        self.assertEqual(autoapply.pick_suggestion((), 0.85, 0.1), None)
+
+    def test_plan_autoapply_rewrites_each_note_once(self):
+        findings = self.findings() + [
+            LinkRow(str(self.src), "wikilink", "Gamma Nte", "not_found"),
+        ]
+        props = fuzzy.fuzzy_proposals(findings, {"alpha note": [self.alpha], "gamma note": [self.gamma]}, 0.5)
+        reads = []
+
+        def read_text(p):
+            reads.append(p)
+            return p.read_text(encoding="utf-8")
+
+        plan, diff = Collect(), Collect()
+        changed, dirty = autoapply.plan_autoapply(props, 0.85, 0.1, diff, plan, apply=True, read_text=read_text)
+        new = "see [[../10_research/Alpha Note.md]] and [[Beta]] and [[Gamma Note.md|g]]\n"
+        self.assertEqual((changed, reads), (2, [self.src]))
+        self.assertEqual(dirty, {self.src: new})
+        self.assertEqual([r[0]["score"] for r in plan.rows], ["0.95", "0.95"])
+        # one diff for the note, with both rewrites
+        self.assertEqual(diff.rows, [(str(self.src), self.src.read_text(encoding="utf-8"), new)])
+        changed, dirty = autoapply.plan_autoapply(props, 0.85, 0.1, diff, Collect())
+        self.assertEqual((changed, dirty), (2, {}))
+        self.assertEqual(diff.rows[1][2], new)
+
+if __name__ == "__main__":
+    unittest.main()
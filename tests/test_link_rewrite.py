@@ -0,0 +1,60 @@
+import os
+import random
+import re
+import sys
+import unittest
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+link_rewrite = load_obsidian_module("link_rewrite")
+
+
+def sequential(text, replacements):
+    """The per-replacement passes link_apply_mk used before."""
+    for cur, prop, link_type in replacements:
+        if link_type and "wikilink" in link_type:
+            pattern = re.compile(r"(!?\[\[)" + re.escape(cur) + r"(?=(\]|\||#))")
+            text = pattern.sub(lambda m: m.group(1) + prop, text)
+        else:
+            pattern = re.compile(r"(!?\[[^\]]*\]\()" + re.escape(cur) + r"(\))")
+            text = pattern.sub(lambda m: m.group(1) + prop + m.group(2), text)
+    return text
+
+
+class TestLinkRewrite(unittest.TestCase):
+    def test_examples(self):
+        text = "[[a]] ![[a|x]] [[a#h]] [[ab]] [t](a) ![i](a) [t] (a) (a)"
+        changed, new = link_rewrite.rewrite_links(text, [("a", "../n/a.md", "wikilink"), ("a", "b.md", "md")])
+        self.assertTrue(changed)
+        self.assertEqual(new, "[[../n/a.md]] ![[../n/a.md|x]] [[../n/a.md#h]] [[ab]] [t](b.md) ![i](b.md) [t] (a) (a)")
+
+    def test_chained_replacements_match_sequential_passes(self):
+        reps = [("a", "b", "md"), ("b", "c", "md")]
+        self.assertEqual(link_rewrite.rewrite_links("[1](a) [2](b)", reps)[1], "[1](c) [2](c)")
+
+    def test_rows_that_fired(self):
+        rw = link_rewrite.LinkRewriter([("a", "b", "md"), ("b", "c", "md"), ("z", "y", "md"), ("a", "q", "wikilink"), ("c", "c", "md")])
+        self.assertEqual(rw.rewrite_rows("[1](a) [[b]]"), ("[1](c) [[b]]", [True, True, False, False, False]))
+
+    def test_matches_sequential_passes_on_random_input(self):
+        rng = random.Random(0)
+        atoms = ["a", "b", "ab", "c.md", "../d", "x y"]
+        pieces = ["[[", "![[", "]]", "|al", "#h", "[t](", "![i](", ")", " ", "\n", "[", "]", "("] + atoms
+        kinds = ["wikilink", "embed-wikilink", "md", "embed-md", ""]
+        for _ in range(3000):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 14)))
+            reps = [(rng.choice(atoms), rng.choice(atoms), rng.choice(kinds)) for _ in range(rng.randint(1, 4))]
+            self.assertEqual(link_rewrite.rewrite_links(text, reps)[1], sequential(text, reps), (text, reps))
+            fired = [sequential(sequential(text, reps[:i]), [rep]) != sequential(text, reps[:i]) for i, rep in enumerate(reps)]
+            self.assertEqual(link_rewrite.LinkRewriter(reps).rewrite_rows(text)[1], fired, (text, reps))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+note_index = load_obsidian_module("note_index")
+
+
+class TestNoteIndex(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.mk = self.root / "notes" / "MK"
+        self.db = self.root / "index.sqlite"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, rel, text):
+        p = self.mk / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(text, encoding="utf-8")
+        return p
+
+    def scan(self, verify_hash=False):
+        with note_index.NoteIndex(self.db, verify_hash=verify_hash) as index:
+            notes = {n.rel.as_posix(): n for n in index.scan(self.mk, root=self.root)}
+            return notes, sorted(index.changed), sorted(index.removed)
+
+    def test_reuses_fresh_entries_and_reparses_changed_files(self):
+        self.write("a.md", "---\ntags: [x]\n---\n# A\nsee [[b]]\n")
+        b = self.write("b.md", "# B\n")
+        notes, changed, _ = self.scan()
+        self.assertEqual(changed, ["notes/MK/a.md", "notes/MK/b.md"])
+
+        notes, changed, removed = self.scan()
+        self.assertEqual((changed, removed), ([], []))
+        a = notes["notes/MK/a.md"]
+        self.assertIsNone(a._text)
+        self.assertEqual(a.tags, ["x"])
+        self.assertEqual(a.h1, "A")
+        self.assertEqual(a.wikilinks, [("wikilink", "b")])
+        self.assertEqual(a.text, "---\ntags: [x]\n---\n# A\nsee [[b]]\n")
+
+        b.write_text("# B2 longer\n", encoding="utf-8")
+        notes, changed, _ = self.scan()
+        self.assertEqual(changed, ["notes/MK/b.md"])
+        self.assertEqual(notes["notes/MK/b.md"].h1, "B2 longer")
+
+    def test_drops_deleted_files(self):
+        self.write("a.md", "# A\n")
+        gone = self.write("gone.md", "# Gone\n")
+        self.scan()
+        gone.unlink()
+        notes, _, removed = self.scan()
+        self.assertEqual(list(notes), ["notes/MK/a.md"])
+        self.assertEqual(removed, ["notes/MK/gone.md"])
+
+    def test_rehash_skips_touched_but_unchanged_files(self):
+        p = self.write("a.md", "# A\n")
+        self.scan()
+        st = p.stat()
+        os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        _, changed, _ = self.scan(verify_hash=True)
+        self.assertEqual(changed, [])
+
+    def test_parallel_scan_matches_serial(self):
+        for i in range(6):
+            self.write(f"d{i % 2}/n{i}.md", f"---\ntags: [t{i}]\n---\n# N{i}\n[[n{i + 1}]] #inline{i}\n")
+        with note_index.NoteIndex(self.db) as index:
+            cold = [(n.rel.as_posix(), n.h1, n.tags, n.wikilinks) for n in index.scan(self.mk, root=self.root, jobs=3)]
+            self.assertEqual(len(index.changed), 6)
+        with note_index.NoteIndex(self.db) as index:
+            warm = [(n.rel.as_posix(), n.h1, n.tags, n.wikilinks) for n in index.scan(self.mk, root=self.root)]
+            self.assertEqual(index.changed, [])
+        serial = [(n.rel.as_posix(), n.h1, n.tags, n.wikilinks) for n in note_index.scan_notes(
+            self.mk, root=self.root, argv=["--no-index"])]
+        self.assertEqual(cold, serial)
+        self.assertEqual(warm, serial)
+
+    def test_no_index_flag_bypasses_database(self):
+        self.write("a.md", "# A\n")
+        notes = list(note_index.scan_notes(self.mk, root=self.root, argv=["--no-index"], db_path=self.db))
+        self.assertEqual([n.h1 for n in notes], ["A"])
+        self.assertFalse(self.db.exists())
+
+    def test_no_index_with_jobs_parses_in_workers(self):
+        for i in range(4):
+            self.write(f"n{i}.md", f"---\ntags: [t{i}]\n---\n# N{i}\n[[n{i + 1}]] #inline{i}\n")
+        argv = ["--no-index"]
+        serial = [(n.rel.as_posix(), n.h1, n.tags, n.wikilinks, n.inline_tags, n.text)
+                  for n in note_index.scan_notes(self.mk, root=self.root, argv=argv, db_path=self.db)]
+        parallel = [(n.rel.as_posix(), n.h1, n.tags, n.wikilinks, n.inline_tags, n.text)
+                    for n in note_index.scan_notes(self.mk, root=self.root, argv=argv + ["--jobs", "2"], db_path=self.db)]
+        self.assertEqual(parallel, serial)
+        self.assertFalse(self.db.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -68,6 +68,12 @@ class TestOCRExtraction(unittest.TestCase):
         etas = ocr.extract_submarine_etas(text, now=self.now)
         self.assertLessEqual(len(etas), 4)
 
+    def test_age_etas_keeps_return_time(self):
+        etas = ocr.extract_submarine_etas("甲一号 [Rank50] [帰還: 残り 10分]", now=self.now)
+        aged = ocr.age_etas(etas, 4)
+        self.assertEqual((aged[0].remaining_minutes, aged[0].eta), (6, etas[0].eta))
+        self.assertEqual(ocr.age_etas(etas, 30)[0].remaining_minutes, 0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,147 @@
+import os
+import sys
+import importlib.util
+import threading
+import unittest
+
+from PIL import Image
+
+
+def load_ocr_module():
+    here = os.path.dirname(os.path.abspath(__file__))
+    repo_root = os.path.abspath(os.path.join(here, os.pardir))
+    ocr_path = os.path.join(repo_root, "apps", "ff14-submarines", "ocr.py")
+    spec = importlib.util.spec_from_file_location("ff14_submarines.ocr", ocr_path)
+    mod = importlib.util.module_from_spec(spec)
+    assert spec and spec.loader
+    sys.modules[spec.name] = mod  # type: ignore[index]
+    spec.loader.exec_module(mod)  # type: ignore
+    return mod
+
+
+ocr = load_ocr_module()
+
+
+class FakeTesserocr:
+    """Stands in for the tesserocr module: PyTessBaseAPI records what it is asked."""
+
+    def __init__(self, langs=("jpn", "eng")):
+        self.langs = langs
+        self.created = []
+        outer = self
+
+        class PyTessBaseAPI:
+            def __init__(self, lang="eng", psm=3, path=None, oem=None):
+                if not set(lang.split("+")) <= set(outer.langs):
+                    raise RuntimeError(f"Failed to init API, possibly an invalid tessdata path: {path}")
+                self.kwargs = {"lang": lang, "psm": psm, "path": path, "oem": oem}
+                self.image = None
+                self.ended = False
+                self.gate = None
+                outer.created.append(self)
+
+            def SetImage(self, img):
+                self.image = img
+
+            def GetUTF8Text(self):
+                if self.gate:
+                    self.gate.wait()
+                return f"text {self.image.size[0]}x{self.image.size[1]}\n"
+
+            def GetTSVText(self, page):
+                return ("1\t1\t0\t0\t0\t0\t0\t0\t40\t20\t-1\t\n"
+                        "5\t1\t1\t1\t1\t1\t2\t3\t10\t8\t91.5\tRank89")
+
+            def Clear(self):
+                self.image = None
+
+            def End(self):
+                self.ended = True
+
+        self.PyTessBaseAPI = PyTessBaseAPI
+
+
+class FakeFallback:
+    def __init__(self):
+        self.calls = []
+
+    def image_to_string(self, img, lang="jpn", psm=6, oem=None):
+        self.calls.append(("string", lang, psm))
+        return "fallback"
+
+    def image_to_data(self, img, lang="jpn", psm=6, oem=None):
+        self.calls.append(("data", lang, psm))
+        return {"text": []}
+
+
+class TestTesserocrBackend(unittest.TestCase):
+    def setUp(self):
+        self.api = FakeTesserocr()
+        self.fallback = FakeFallback()
+        self.backend = ocr.TesserocrBackend(tessdata="/td", fallback=self.fallback, api_module=self.api)
+        self.img = Image.new("L", (40, 20), 255)
+
+    def test_engine_is_loaded_once_per_setting(self):
+        for _ in range(3):
+            self.assertEqual(self.backend.image_to_string(self.img, "jpn", psm=6), "text 40x20\n")
+        self.backend.image_to_string(self.img, "jpn", psm=7, oem=1)
+        self.assertEqual([a.kwargs for a in self.api.created], [
+            {"lang": "jpn", "psm": 6, "path": "/td", "oem": None},
+            {"lang": "jpn", "psm": 7, "path": "/td", "oem": 1},
+        ])
+        self.assertIsNone(self.api.created[0].image)  # cleared after use
+        self.backend.close()
+        self.assertTrue(all(a.ended for a in self.api.created))
+
+    def test_image_to_data_matches_pytesseract_dict(self):
+        data = self.backend.image_to_data(self.img, "jpn+eng")
+        self.assertEqual(data["text"], ["", "Rank89"])
+        self.assertEqual((data["block_num"], data["left"], data["width"]), ([0, 1], [0, 2], [40, 10]))
+        self.assertEqual(data["conf"], [-1, 91])
+
+    def test_missing_language_falls_back(self):
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(self.backend.image_to_string(self.img, "kor"), "fallback")
+        self.assertEqual(self.backend.image_to_string(self.img, "kor"), "fallback")
+        self.assertEqual(self.backend.image_to_data(self.img, "kor"), {"text": []})
+        self.assertEqual(len(self.fallback.calls), 3)
+        self.assertEqual(self.api.created, [])  # not retried
+
+    def test_concurrent_calls_get_their_own_engine(self):
+        gate = threading.Event()
+        first = self.api.PyTessBaseAPI(lang="jpn", psm=6, path="/td")
+        first.gate = gate
+        self.backend._release(("jpn", 6, None), first)
+        out = []
+        t = threading.Thread(target=lambda: out.append(self.backend.image_to_string(self.img, "jpn")))
+        t.start()
+        while first.image is None:
+            pass
+        self.assertEqual(self.backend.image_to_string(self.img, "jpn"), "text 40x20\n")
+        gate.set()
+        t.join()
+        self.assertEqual((out, len(self.api.created)), (["text 40x20\n"], 2))
+
+
+class TestBackendSelection(unittest.TestCase):
+    def test_get_backend(self):
+        self.assertIsInstance(ocr.get_backend("pytesseract"), ocr.PytesseractBackend)
+        self.assertIs(ocr.get_backend("pytesseract", "x"), ocr.get_backend("pytesseract", "x"))
+        auto = ocr.get_backend("auto")
+        self.assertEqual(auto.name, "tesserocr" if ocr.tesserocr is not None else "pytesseract")
+        with self.assertRaises(ValueError):
+            ocr.get_backend("cuneiform")
+
+    def test_ocr_image_uses_the_given_backend(self):
+        backend = ocr.TesserocrBackend(fallback=FakeFallback(), api_module=FakeTesserocr())
+        text = ocr.ocr_image(Image.new("RGB", (30, 10)), None, "jpn", preprocess_scale=2.0, backend=backend)
+        self.assertEqual(text, "text 60x20\n")
+
+    def test_tessdata_next_to_the_executable(self):
+        here = os.path.dirname(os.path.abspath(__file__))
+        self.assertIsNone(ocr.tessdata_dir(os.path.join(here, "tesseract.exe")))
+        self.assertIsNone(ocr.tessdata_dir(None))
+
+
+if __name__ == "__main__":
+    unittest.main()
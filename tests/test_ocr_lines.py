@@ -0,0 +1,122 @@
+import os
+import sys
+import importlib.util
+import threading
+import unittest
+
+from PIL import Image, ImageDraw
+
+
+def load_ocr_module():
+    here = os.path.dirname(os.path.abspath(__file__))
+    repo_root = os.path.abspath(os.path.join(here, os.pardir))
+    ocr_path = os.path.join(repo_root, "apps", "ff14-submarines", "ocr.py")
+    spec = importlib.util.spec_from_file_location("ff14_submarines.ocr", ocr_path)
+    mod = importlib.util.module_from_spec(spec)
+    assert spec and spec.loader
+    sys.modules[spec.name] = mod  # type: ignore[index]
+    spec.loader.exec_module(mod)  # type: ignore
+    return mod
+
+
+ocr = load_ocr_module()
+
+
+def panel(rows=4, pitch=36):
+    img = Image.new("RGB", (520, 40 + rows * pitch), (28, 34, 52))
+    d = ImageDraw.Draw(img)
+    d.line((0, 4, 519, 4), fill=(235, 235, 225), width=2)  # frame line
+    for i in range(rows):
+        y = 24 + i * pitch
+        d.text((16, y), f"Sub-{i + 1}  [Rank{80 + i}]  [ETA: {i + 1}h {10 * i + 5:02d}m]", fill=(235, 235, 225))
+    return img
+
+
+class RecordingBackend:
+    """Answers each crop with a canned line, keyed by the crop's top edge."""
+
+    name = "recording"
+
+    def __init__(self):
+        self.calls = []
+        self.threads = set()
+        self.lock = threading.Lock()
+
+    def image_to_string(self, img, lang="jpn", psm=6, oem=None):
+        with self.lock:
+            self.calls.append((img.size, psm))
+            self.threads.add(threading.get_ident())
+            n = len(self.calls)
+        if psm == 7:
+            return f"潜水艦{n}号 [Rank89] [帰還: 残り {n}時間 05分]\n"
+        return "block\n"
+
+
+class TestLineBands(unittest.TestCase):
+    def test_finds_each_row(self):
+        binary = ocr.preprocess_image(panel(), scale=2.0, threshold=180)
+        bands = ocr.line_bands(binary)
+        self.assertEqual(len(bands), 4)
+        for i, (top, bottom) in enumerate(bands):
+            self.assertTrue(top < (24 + i * 36) * 2 < bottom, (i, bands))
+            self.assertLess(bottom - top, 36 * 2)
+
+    def test_same_bands_without_numpy(self):
+        binary = ocr.preprocess_image(panel(), scale=2.0, threshold=180)
+        saved, ocr.np = ocr.np, None
+        try:
+            without = ocr.line_bands(binary)
+        finally:
+            ocr.np = saved
+        self.assertEqual(without, ocr.line_bands(binary))
+
+    def test_dark_text_on_light_background(self):
+        binary = ocr.preprocess_image(panel(rows=3), scale=1.0, threshold=180)
+        inverted = binary.point(lambda p: 255 - p)
+        self.assertEqual(ocr.line_bands(inverted, min_height=4), ocr.line_bands(binary, min_height=4))
+        self.assertEqual(len(ocr.line_bands(inverted, min_height=4)), 3)
+
+    def test_blank_image(self):
+        self.assertEqual(ocr.line_bands(Image.new("L", (50, 20), 0)), [])
+
+
+class TestOcrImageLines(unittest.TestCase):
+    def test_each_line_read_with_psm_7(self):
+        backend = RecordingBackend()
+        text = ocr.ocr_image(panel(), None, "jpn", backend=backend, segment_lines=True, jobs=4)
+        self.assertEqual(len(backend.calls), 4)
+        self.assertEqual({psm for _, psm in backend.calls}, {7})
+        self.assertTrue(all(size[0] == 1040 and size[1] < 72 for size, _ in backend.calls))
+        self.assertEqual(len(text.splitlines()), 4)
+        self.assertEqual(len(ocr.extract_submarine_etas(text)), 4)
+
+    def test_serial_and_parallel_keep_line_order(self):
+        a, b = RecordingBackend(), RecordingBackend()
+        ocr.ocr_image(panel(), None, "jpn", backend=a, segment_lines=True, jobs=1)
+        ocr.ocr_image(panel(), None, "jpn", backend=b, segment_lines=True, jobs=4)
+        self.assertEqual(len(a.threads), 1)
+        self.assertEqual(sorted(a.calls), sorted(b.calls))
+
+    def test_merged_rows_are_read_as_a_block(self):
+        img = Image.new("RGB", (520, 200), (28, 34, 52))
+        d = ImageDraw.Draw(img)
+        for y in (24, 60) + tuple(range(100, 164, 8)):  # two rows, then eight packed without gaps
+            d.text((16, y), "Sub-9  [Rank99]", fill=(235, 235, 225))
+        backend = RecordingBackend()
+        ocr.ocr_image(img, None, "jpn", backend=backend, segment_lines=True)
+        self.assertEqual(sorted(psm for _, psm in backend.calls), [6, 7, 7])
+
+    def test_whole_panel_when_no_lines(self):
+        backend = RecordingBackend()
+        img = Image.new("RGB", (100, 40), (28, 34, 52))
+        self.assertEqual(ocr.ocr_image(img, None, "jpn", backend=backend, segment_lines=True), "block\n")
+        self.assertEqual(backend.calls, [((200, 80), 6)])
+
+    def test_segmentation_without_threshold(self):
+        backend = RecordingBackend()
+        ocr.ocr_image(panel(), None, "jpn", backend=backend, segment_lines=True, preprocess_threshold=None)
+        self.assertEqual(len(backend.calls), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import os
+import sys
+import unittest
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+parallel = load_obsidian_module("parallel")
+
+
+class TestParallel(unittest.TestCase):
+    def test_jobs_option(self):
+        self.assertEqual(parallel.jobs_option([]), 1)
+        self.assertEqual(parallel.jobs_option(["--jobs", "4"]), 4)
+        self.assertEqual(parallel.jobs_option(["--apply", "--jobs=3"]), 3)
+        self.assertEqual(parallel.jobs_option(["--jobs", "x"]), 1)
+        self.assertEqual(parallel.jobs_option(["--jobs", "0"]), os.cpu_count() or 1)
+
+    def test_pool_map_keeps_input_order(self):
+        items = list(range(50, 0, -1))
+        self.assertEqual(parallel.pool_map(abs, items, jobs=3), items)
+        self.assertEqual(parallel.pool_map(str, iter(items), jobs=1), [str(x) for x in items])
+
+
+if __name__ == "__main__":
+    unittest.main()
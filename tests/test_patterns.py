@@ -0,0 +1,44 @@
+import os
+import sys
+import unittest
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+patterns = load_obsidian_module("patterns")
+classify_mk = load_obsidian_module("classify_mk")
+
+
+class TestPatterns(unittest.TestCase):
+    def test_links_and_tags(self):
+        text = "See [[A|alias]] ![[img.png]] [doc](../x.md) ![p](p.png) #tag #日本語 url#frag"
+        self.assertEqual(patterns.WIKILINK_RE.findall(text), ["A|alias", "img.png"])
+        self.assertEqual(patterns.MDLINK_RE.findall(text), ["../x.md", "p.png"])
+        self.assertEqual(patterns.INLINE_TAG_RE.findall(text), ["tag", "日本語", "frag"])
+
+    def test_code_blocks_and_urls(self):
+        text = "a\n```py\nx = 1\n```\nsee https://www.Example.com/p?q=1 and HTTP://x.org\n"
+        self.assertEqual(patterns.CODE_BLOCK_RE.sub("\n", text), "a\n\n\nsee https://www.Example.com/p?q=1 and HTTP://x.org\n")
+        self.assertEqual(patterns.URL_HOST_RE.findall(text), ["www.Example.com", "x.org"])
+        self.assertEqual(len(patterns.URL_SCHEME_RE.findall(text)), 2)
+        self.assertTrue(patterns.EXTERNAL_RE.match("ftp://host"))
+        self.assertFalse(patterns.EXTERNAL_RE.match("notes/a.md"))
+
+    def test_tokens(self):
+        self.assertEqual(patterns.EN_TOKEN_RE.findall("a go Rust-lang x2y"), ["Rust-lang", "x2y"])
+        self.assertEqual(patterns.KATA_TOKEN_RE.findall("プロンプト設計とメモ"), ["プロンプト", "メモ"])
+        self.assertEqual(patterns.JA_TOKEN_RE.findall("プロンプト設計 abc"), ["プロンプト設計"])
+
+    def test_project_yaml(self):
+        for yaml, hit in (("status: active", True), ("project: portal", True), ("status: draft", False), ("", False)):
+            self.assertEqual(bool(classify_mk.PROJECT_YAML_RE.search(yaml)), hit, yaml)
+
+
+if __name__ == "__main__":
+    unittest.main()
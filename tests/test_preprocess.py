@@ -0,0 +1,91 @@
+import os
+import sys
+import importlib.util
+import unittest
+
+from PIL import Image, ImageDraw, ImageFilter, ImageOps
+
+
+def load_ocr_module():
+    here = os.path.dirname(os.path.abspath(__file__))
+    repo_root = os.path.abspath(os.path.join(here, os.pardir))
+    ocr_path = os.path.join(repo_root, "apps", "ff14-submarines", "ocr.py")
+    spec = importlib.util.spec_from_file_location("ff14_submarines.ocr", ocr_path)
+    mod = importlib.util.module_from_spec(spec)
+    assert spec and spec.loader
+    sys.modules[spec.name] = mod  # type: ignore[index]
+    spec.loader.exec_module(mod)  # type: ignore
+    return mod
+
+
+ocr = load_ocr_module()
+
+
+def panel():
+    img = Image.new("RGB", (160, 60), (30, 36, 60))
+    d = ImageDraw.Draw(img)
+    d.rectangle((4, 30, 150, 56), fill=(70, 80, 110))
+    d.text((8, 8), "Sub-1 [Rank89] 1h 49m", fill=(240, 240, 230))
+    d.text((8, 36), "Sub-2 [Rank90] 12m", fill=(200, 210, 220))
+    return img
+
+
+def legacy(img, scale, threshold, sharpen):
+    g = ImageOps.grayscale(img)
+    if scale and scale != 1.0:
+        g = g.resize((max(1, int(g.width * scale)), max(1, int(g.height * scale))))
+    if threshold is not None:
+        g = g.point(lambda p: 255 if p >= int(threshold) else 0)
+    if sharpen:
+        g = g.filter(ImageFilter.SHARPEN)
+    return g
+
+
+class TestPreprocess(unittest.TestCase):
+    def without_numpy(self, fn):
+        saved, ocr.np = ocr.np, None
+        try:
+            return fn()
+        finally:
+            ocr.np = saved
+
+    def test_same_pixels_as_the_pil_chain(self):
+        img = panel()
+        for scale in (1.0, 2.0, 3.0):
+            for threshold in (180, 100, None):
+                for sharpen in (True, False):
+                    want = legacy(img, scale, threshold, sharpen).tobytes()
+                    kw = dict(scale=scale, threshold=threshold, sharpen=sharpen)
+                    self.assertEqual(ocr.preprocess_image(img, **kw).tobytes(), want, kw)
+                    self.assertEqual(self.without_numpy(lambda: ocr.preprocess_image(img, **kw)).tobytes(), want, kw)
+
+    @unittest.skipIf(ocr.np is None, "NumPy not installed")
+    def test_array_path(self):
+        a = ocr.preprocess_array(panel(), scale=2.0, threshold=180)
+        self.assertEqual((a.shape, str(a.dtype)), ((120, 320), "uint8"))
+        self.assertEqual(set(a.ravel().tolist()), {0, 255})
+
+    def test_otsu_splits_a_bimodal_image(self):
+        g = Image.new("L", (100, 10), 40)
+        g.paste(200, (50, 0, 100, 10))
+        level = ocr.otsu_level(g)
+        self.assertTrue(40 < level <= 200, level)
+        out = ocr.preprocess_image(g, scale=1.0, threshold="otsu")
+        self.assertEqual((out.getpixel((10, 5)), out.getpixel((90, 5))), (0, 255))
+
+    def test_adaptive_and_otsu_match_without_numpy(self):
+        img = panel()
+        for threshold in ("otsu", "adaptive"):
+            got = ocr.preprocess_image(img, scale=2.0, threshold=threshold)
+            self.assertEqual(self.without_numpy(lambda: ocr.preprocess_image(img, scale=2.0, threshold=threshold)).tobytes(),
+                             got.tobytes(), threshold)
+            self.assertEqual(set(got.getdata()), {0, 255})
+
+    def test_resample_filter(self):
+        img = panel()
+        near = ocr.preprocess_image(img, scale=2.0, threshold=None, sharpen=False, resample="nearest")
+        self.assertEqual(near.tobytes(), ImageOps.grayscale(img).resize((320, 120), Image.NEAREST).tobytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
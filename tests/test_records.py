@@ -0,0 +1,62 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+records = load_obsidian_module("records")
+artifacts = load_obsidian_module("artifacts")
+link_audit = load_obsidian_module("link_audit_mk")
+
+
+class FakeNote:
+    def __init__(self, path, wikilinks=(), md_links=()):
+        self.path = path
+        self.wikilinks = list(wikilinks)
+        self.md_links = list(md_links)
+
+
+class TestRecords(unittest.TestCase):
+    def test_rows_are_slotless_tuples(self):
+        row = records.LinkRow("a.md", "wikilink", "B", "not_found")
+        self.assertEqual(row.proposal, "")
+        self.assertFalse(hasattr(row, "__dict__"))
+        self.assertEqual(link_audit.FIELDS, ["file", "link_type", "current", "status", "proposal"])
+
+    def test_write_and_read_back(self):
+        rows = [
+            records.LinkRow("n/a.md", "wikilink", "x, \"y\"", "broken", "../b.md"),
+            records.LinkRow("n/a.md", "mdlink", "https://e.com", "external"),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            out = Path(tmp) / "audit.csv"
+            artifacts.write_csv(out, list(records.LinkRow._fields), rows)
+            with out.open(encoding="utf-8", newline="") as fp:
+                self.assertEqual(list(records.read_records(fp, records.LinkRow)), rows)
+
+    def test_read_matches_columns_by_name(self):
+        fp = io.StringIO("status,file,extra\r\nok,a.md,1\r\n")
+        self.assertEqual(list(records.read_records(fp, records.LinkRow)), [records.LinkRow("a.md", "", "", "ok", "")])
+
+    def test_audit_rows_share_the_note_path(self):
+        note = FakeNote(records.ROOT / "notes" / "MK" / "20_notes" / "a.md",
+                        wikilinks=[("wikilink", "Nope"), ("embed", "Also Nope")],
+                        md_links=[("mdlink", "https://example.com")])
+        rows = link_audit.audit_file(note, {}, set())
+        self.assertEqual([r.status for r in rows], ["not_found", "not_found", "external"])
+        self.assertEqual(rows[0].file, os.path.join("notes", "MK", "20_notes", "a.md"))
+        self.assertTrue(all(r.file is rows[0].file for r in rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+vault_gen = load_obsidian_module("vault_gen")
+vault_bench = load_obsidian_module("vault_bench")
+vault_scan = load_obsidian_module("vault_scan")
+
+
+class TestVaultGen(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def snapshot(self, root):
+        return {p.relative_to(root).as_posix(): p.read_bytes() for p in root.rglob("*") if p.is_file()}
+
+    def test_same_seed_same_vault(self):
+        a, b = self.root / "a", self.root / "b"
+        counts = vault_gen.generate_vault(a, 200, seed=3)
+        self.assertEqual(vault_gen.generate_vault(b, 200, seed=3), counts)
+        self.assertEqual(self.snapshot(a), self.snapshot(b))
+        self.assertGreater(counts["broken_links"], 0)
+        self.assertGreater(counts["links"], counts["broken_links"])
+
+    def test_vault_shape(self):
+        counts = vault_gen.generate_vault(self.root, 300, seed=0)
+        mk = self.root / "notes" / "MK"
+        notes = list(mk.rglob("*.md"))
+        self.assertEqual(len(notes), 300)
+        self.assertEqual(len(list((mk / vault_gen.ATTACH_DIR).iterdir())), counts["attachments"])
+        # every note decodes, and the scanner skips the excluded folders
+        texts = [vault_scan.decode_best_effort(p.read_bytes())[0] for p in notes]
+        self.assertTrue(any(t.startswith("---") for t in texts))
+        self.assertTrue(any(not t.startswith("---") for t in texts))
+        self.assertTrue(any(len(p.relative_to(mk).parts) > 3 for p in notes))
+        scanned = vault_scan.iter_note_paths(mk)
+        self.assertLess(len(scanned), len(notes))
+        self.assertFalse(any(set(p.relative_to(mk).parts) & set(vault_gen.EXCLUDED) for p in scanned))
+
+
+class TestVaultBench(unittest.TestCase):
+    def test_compare_flags_only_what_got_worse(self):
+        baseline = {
+            "audit@1000": {"warm_s": 1.0, "peak_rss_mb": 100.0},
+            "retag@1000": {"warm_s": 1.0, "peak_rss_mb": None},
+        }
+        results = [
+            {"script": "audit", "notes": 1000, "warm_s": 1.2, "peak_rss_mb": 140.0},
+            {"script": "retag", "notes": 1000, "warm_s": 1.5, "peak_rss_mb": 50.0},
+            {"script": "fuzzy", "notes": 1000, "warm_s": 9.0, "peak_rss_mb": 50.0},
+        ]
+        self.assertEqual(vault_bench.compare(results, baseline, 0.25), [
+            ("audit@1000", "peak_rss_mb", 100.0, 140.0),
+            ("retag@1000", "warm_s", 1.0, 1.5),
+        ])
+
+    def test_run_script_survives_a_flood_of_stderr(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            script = Path(tmp) / "noisy.py"
+            script.write_text("import sys\nsys.stderr.write('x' * 300000)\nsys.exit(int(sys.argv[1]))\n")
+            seconds, _ = vault_bench.run_script(script, ["0"], Path(tmp))
+            self.assertGreater(seconds, 0)
+            with self.assertRaises(RuntimeError) as cm:
+                vault_bench.run_script(script, ["3"], Path(tmp))
+            self.assertIn("exited with 3", str(cm.exception))
+            self.assertIn("x" * 300000, str(cm.exception))
+
+    def test_script_table_names_existing_scripts(self):
+        here = Path(vault_bench.__file__).parent
+        for _, script in vault_bench.SCRIPTS:
+            self.assertTrue((here / script).exists(), script)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+vault_scan = load_obsidian_module("vault_scan")
+
+
+class TestVaultScan(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.mk = self.root / "notes" / "MK"
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, rel, text, encoding="utf-8"):
+        p = self.mk / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(text.encode(encoding))
+        return p
+
+    def test_prunes_excluded_folders_and_sorts(self):
+        self.write("20_notes/b.md", "b")
+        self.write("10_research/a.md", "a")
+        self.write("70_templates/t.md", "t")
+        self.write(".obsidian/plugin.md", "p")
+        self.write("20_notes/image.png", "x")
+        names = [p.relative_to(self.mk).as_posix() for p in vault_scan.iter_note_paths(self.mk)]
+        self.assertEqual(names, ["10_research/a.md", "20_notes/b.md"])
+
+    def test_decodes_cp932_and_normalises_newlines(self):
+        self.write("sjis.md", "# 見出し\r\n本文\r\n", encoding="cp932")
+        notes = list(vault_scan.scan_vault(self.mk, root=self.root))
+        self.assertEqual(len(notes), 1)
+        note = notes[0]
+        self.assertEqual(note.encoding, "cp932")
+        self.assertEqual(note.text, "# 見出し\n本文\n")
+        self.assertEqual(note.rel.as_posix(), "notes/MK/sjis.md")
+
+    def test_detects_bom_and_falls_back(self):
+        decode = vault_scan.decode_best_effort
+        self.assertEqual(decode("---\na: 1\n---\n".encode("utf-8-sig")), ("---\na: 1\n---\n", "utf-8-sig"))
+        self.assertEqual(decode("# 見出し\n".encode("utf-16")), ("# 見出し\n", "utf-16"))
+        self.assertEqual(decode(b"plain\n"), ("plain\n", "utf-8"))
+        self.assertEqual(decode("日本語".encode("cp932")), ("日本語", "cp932"))
+        self.assertEqual(decode(b"ok \x81"), ("ok ", "utf-8"))
+        # a recorded encoding is tried first
+        self.assertEqual(decode(b"\xc3\xa9", "cp932"), ("ﾃｩ", "cp932"))
+        self.assertEqual(decode(b"\xc3\xa9"), ("é", "utf-8"))
+
+    def test_bom_note_keeps_front_matter(self):
+        self.write("bom.md", "---\ntitle: T\n---\n# H\n", encoding="utf-8-sig")
+        note = next(vault_scan.scan_vault(self.mk, root=self.root))
+        self.assertEqual(note.encoding, "utf-8-sig")
+        self.assertEqual(note.yaml_block, "title: T")
+
+    def test_parsed_fields(self):
+        self.write(
+            "n.md",
+            "---\ntitle: T\ntags: [a, #b]\n---\n# Head\nSee [[Other|alias]] and ![[img.png]]\n"
+            "[doc](../x.md#sec) ![pic](p.png)\n",
+        )
+        note = next(vault_scan.scan_vault(self.mk, root=self.root))
+        self.assertEqual(note.yaml_block, "title: T\ntags: [a, #b]")
+        self.assertEqual(note.h1, "Head")
+        self.assertEqual(note.tags, ["a", "#b"])
+        self.assertEqual(note.wikilinks, [("wikilink", "Other|alias"), ("embed-wikilink", "img.png")])
+        self.assertEqual(note.md_links, [("md", "../x.md#sec"), ("embed-md", "p.png")])
+
+    def test_note_head_matches_full_decode(self):
+        text = "---\ntitle: T\r\ntags: [a]\n---\n\n# 見出し\r\n本文\rline\n"
+        for encoding in ("utf-8", "cp932", "utf-8-sig", "utf-16"):
+            p = self.write(f"{encoding}.md", text, encoding=encoding)
+            note = next(vault_scan.load_notes([p], root=self.root))
+            for chunk_size in (1, 3, 7, 64 * 1024):
+                with vault_scan.NoteHead(p, root=self.root, chunk_size=chunk_size) as head:
+                    self.assertEqual(list(head.iter_lines()), note.text.splitlines(), (encoding, chunk_size))
+                    self.assertEqual(head.encoding, note.encoding)
+                    self.assertEqual(head.yaml_block, note.yaml_block)
+                    self.assertEqual(head.h1, note.h1)
+
+    def test_note_head_reads_only_the_header(self):
+        p = self.write("log.md", "---\ntitle: T\n---\n# Log\n" + "x" * 100 + "\n" * 10000)
+        with vault_scan.NoteHead(p, root=self.root, chunk_size=256) as head:
+            self.assertEqual(head.h1, "Log")
+            self.assertEqual(head.front_matter.scalar("title"), "T")
+        self.assertLess(head.bytes_read, p.stat().st_size)
+
+    def test_note_head_decides_cp932_after_ascii_prefix(self):
+        p = self.write("late.md", "# Title\n" + "a" * 50 + "\n日本語\n", encoding="cp932")
+        with vault_scan.NoteHead(p, root=self.root, chunk_size=8) as head:
+            self.assertEqual(list(head.iter_lines()), ["# Title", "a" * 50, "日本語"])
+            self.assertEqual(head.encoding, "cp932")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+
+def load_obsidian_module(name):
+    here = os.path.dirname(os.path.abspath(__file__))
+    scripts = os.path.abspath(os.path.join(here, os.pardir, "scripts", "obsidian"))
+    if scripts not in sys.path:
+        sys.path.insert(0, scripts)
+    return __import__(name)
+
+
+watch = load_obsidian_module("watch")
+
+
+class FakeWatcher:
+    """Replays read() results; raises KeyboardInterrupt when they run out."""
+
+    def __init__(self, reads):
+        self.reads = list(reads)
+
+    def read(self, timeout=None):
+        if not self.reads:
+            raise KeyboardInterrupt
+        return self.reads.pop(0)
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.base = Path(self._tmp.name)
+        self.write("20_notes/a.md", "a\n")
+        self.write("60_attachments/skip.md", "x\n")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, rel, text):
+        p = self.base / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text(text, encoding="utf-8")
+        return p
+
+    def test_options(self):
+        self.assertTrue(watch.watch_option(["--watch"]))
+        self.assertFalse(watch.watch_option([]))
+        self.assertEqual(watch.debounce_option(["--debounce", "0.25"]), 0.25)
+        self.assertEqual(watch.debounce_option(["--debounce", "x"]), watch.DEBOUNCE)
+
+    def test_batches_merge_bursts(self):
+        a, b = Path("a.md"), Path("b.md")
+        w = FakeWatcher([{a}, {b}, set(), set(), {a}, None, {b}, set()])
+        got = []
+        with self.assertRaises(KeyboardInterrupt):
+            for batch in watch.batches(w, debounce=0.01):
+                got.append(batch)
+        # a burst ends at the first quiet read; an overflow turns the batch into a rescan
+        self.assertEqual(got, [{a, b}, None])
+
+    def test_stale_notes(self):
+        a = self.base / "20_notes" / "a.md"
+        gone = self.base / "20_notes" / "gone.md"
+        new = self.write("30_projects/new.md", "n\n")
+        files, stale, removed = watch.stale_notes({a, gone}, {a, self.base / "pic.png"}, self.base)
+        self.assertEqual(files, [a, new])
+        self.assertEqual((stale, removed), ({a, new}, {gone}))
+        self.assertEqual(watch.stale_notes({a}, None, self.base)[1], {a, new})
+
+    def test_polling_watcher(self):
+        w = watch.PollingWatcher(self.base, interval=0.01)
+        self.assertEqual(w.read(0.02), set())
+        a = self.write("20_notes/a.md", "changed, and longer\n")
+        b = self.write("20_notes/sub/b.md", "b\n")
+        self.write("60_attachments/skip.md", "ignored\n")
+        self.assertEqual(w.read(0.05), {a, b})
+        a.unlink()
+        self.assertEqual(w.read(0.05), {a})
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux-only")
+    def test_inotify_watcher(self):
+        w = watch.InotifyWatcher(self.base)
+        try:
+            self.assertEqual(w.read(0.01), set())
+            a = self.write("20_notes/a.md", "changed\n")
+            self.write("60_attachments/skip.md", "ignored\n")
+            self.assertEqual(w.read(1.0), {a})
+            # a new folder is watched, and what landed in it before that is reported
+            b = self.write("30_projects/deep/b.md", "b\n")
+            touched = set()
+            deadline = time.monotonic() + 1.0
+            while b not in touched and time.monotonic() < deadline:
+                touched |= w.read(0.1)
+            self.assertIn(b, touched)
+            c = self.write("30_projects/deep/c.md", "c\n")
+            self.assertIn(c, w.read(1.0))
+            os.rename(a, self.base / "30_projects" / "a.md")
+            self.assertEqual(w.read(1.0), {a, self.base / "30_projects" / "a.md"})
+        finally:
+            w.close()
+
+    def test_watch_runs_once_without_flag(self):
+        calls = []
+        watch.watch(calls.append, [], self.base)
+        self.assertEqual(calls, [None])
+
+
+if __name__ == "__main__":
+    unittest.main()